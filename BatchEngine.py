@@ -0,0 +1,304 @@
+from Snake import Snake
+from typing import *
+from snake_rules import BOARD_SIZE, LEVEL_UP
+import numpy as np
+
+class BatchEngine(object):
+    """
+    Plays many games of snake at once, with the state of all the games kept in NumPy arrays.
+
+    The rules are the same as GameState.step (eating, levelling up, going through the gate, moving with
+    the teleport at the edges, biting itself and stumbling on the gate), but every rule is applied to all
+    the games in a single vectorized operation instead of a Python loop over Snake and Block objects.
+    The rare events that need a variable amount of work (placing a new snake after the gate) are done
+    game by game.
+
+    Everything is stored in grid cells, like GameState. A cell is numbered y * (columns + 1) + x: the
+    grid has one extra column and one extra row because a snake eating a fruit next to the right or the
+    bottom edge grows one block past the edge, exactly like Snake.eat_fruit does.
+
+    The directions and the actions are numbered like snake_rules.DIRECTIONS: UP, DOWN, LEFT, RIGHT.
+
+    Constants:
+        OPPOSITE = The opposite of each direction
+        DELTA_X, DELTA_Y = The change of x and y of each direction
+        GATE_SHAPE = The cells of the gate relative to its top left cell
+        FRUIT_TRIES = The number of random cells tried for a fruit before looking for a free cell exactly
+
+    Attributes:
+        size (int): The number of games
+        columns (int): The number of columns of the board
+        rows (int): The number of rows of the board
+        capacity (int): The maximum length of a snake
+        body (np.ndarray): The (size, capacity) ring buffers of the cells of the snakes
+        head_index (np.ndarray): The position of the head of each snake in its ring buffer
+        length (np.ndarray): The length of each snake
+        occupancy (np.ndarray): The (size, cells) number of blocks of each snake on every cell
+        direction (np.ndarray): The direction of each snake
+        fruit (np.ndarray): The cell of each fruit, or -1 if the board is full
+        gate (np.ndarray): The top left cell of each gate, only meaningful when the gate is open
+        gate_open (np.ndarray): Is the gate of each game open
+        food_count (np.ndarray): The number of fruits eaten in the current level, starting from 1
+        speed_level (np.ndarray): The number of gates each snake has gone through
+        score (np.ndarray): The number of fruits eaten in each game
+        steps (np.ndarray): The number of steps played in each game
+        alive (np.ndarray): Is the snake of each game still alive
+        eat_self (np.ndarray): Has the snake of each game died by biting itself
+        eat_gate (np.ndarray): Has the snake of each game died by stumbling on the gate
+    """
+    OPPOSITE = np.array([1, 0, 3, 2], dtype=np.int8)
+    DELTA_X = np.array([0, 0, -1, 1], dtype=np.int64)
+    DELTA_Y = np.array([-1, 1, 0, 0], dtype=np.int64)
+    GATE_SHAPE = ((0, 0), (0, 1), (1, 0), (2, 0), (2, 1))
+    FRUIT_TRIES = 8
+
+    def __init__(self, size: int, seed: Optional[int] = None, capacity: Optional[int] = None,
+                 board_size: Tuple[int, int] = BOARD_SIZE):
+        """
+        Create the given number of games, all of them at their initial state.
+
+        Args:
+            size (int): The number of games
+            seed (int): The seed of the random number generator, or None for a random seed
+            capacity (int): The maximum length of a snake, by default the number of cells of the grid
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board of every game
+        """
+        self.size = size
+        self.columns, self.rows = board_size
+        self._width = self.columns + 1
+        cells = self._width * (self.rows + 1)
+        self.capacity = capacity if capacity is not None else cells
+        self._rng = np.random.default_rng(seed)
+
+        self.body = np.zeros((size, self.capacity), dtype=np.int32)
+        self.head_index = np.zeros(size, dtype=np.int64)
+        self.length = np.zeros(size, dtype=np.int64)
+        self.occupancy = np.zeros((size, cells), dtype=np.uint8)
+        self.direction = np.zeros(size, dtype=np.int8)
+        self.fruit = np.zeros(size, dtype=np.int64)
+        self.gate = np.zeros(size, dtype=np.int64)
+        self.gate_open = np.zeros(size, dtype=bool)
+        self.food_count = np.zeros(size, dtype=np.int64)
+        self.speed_level = np.zeros(size, dtype=np.int64)
+        self.score = np.zeros(size, dtype=np.int64)
+        self.steps = np.zeros(size, dtype=np.int64)
+        self.alive = np.zeros(size, dtype=bool)
+        self.eat_self = np.zeros(size, dtype=bool)
+        self.eat_gate = np.zeros(size, dtype=bool)
+
+        self.reset()
+
+    def reset(self, games: Optional[np.ndarray] = None) -> None:
+        """
+        Resets the given games to the initial state: a snake moving right and a fruit
+
+        Args:
+            games (np.ndarray): The indices (or a boolean mask) of the games to reset, or None for all of them
+
+        Returns:
+            None
+        """
+        games = np.arange(self.size) if games is None else np.asarray(games)
+        if games.dtype == bool:
+            games = np.flatnonzero(games)
+        if games.size == 0:
+            return
+
+        self.gate_open[games] = False
+        self.direction[games] = 3  # Always start the game with a moving right snake
+        self.food_count[games] = 1
+        self.speed_level[games] = 0
+        self.score[games] = 0
+        self.steps[games] = 0
+        self.alive[games] = True
+        self.eat_self[games] = False
+        self.eat_gate[games] = False
+        self.length[games] = Snake.MIN_LENGTH
+        self._place_snakes(games)
+        self.fruit[games] = self._sample_fruits(games)
+
+    def step(self, actions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Plays one tick of every game whose snake is still alive
+
+        Args:
+            actions (np.ndarray): The direction to turn to in each game, or -1 to keep going straight.
+                                  None keeps all the snakes going straight
+
+        Returns:
+            The boolean array telling which snakes are still alive after the step
+        """
+        games = np.flatnonzero(self.alive)
+        if games.size == 0:
+            return self.alive
+
+        # Turn, unless the action is the opposite of the current direction
+        if actions is not None:
+            action = np.asarray(actions)[games]
+            turning = (action >= 0) & (action != self.OPPOSITE[self.direction[games]])
+            self.direction[games[turning]] = action[turning]
+        direction = self.direction[games]
+
+        # Check if eats fruit: the new head is put one block past the fruit, without teleporting
+        eating = ~self.gate_open[games] & (self._heads(games) == self.fruit[games])
+        if eating.any():
+            eaters = games[eating]
+            fruit = self.fruit[eaters]
+            new_heads = (fruit // self._width + self.DELTA_Y[direction[eating]]) * self._width \
+                        + fruit % self._width + self.DELTA_X[direction[eating]]
+            self._push_heads(eaters, new_heads)
+            self.length[eaters] += 1
+            self.food_count[eaters] += 1
+            self.score[eaters] += 1
+            self.fruit[eaters] = self._sample_fruits(eaters)
+
+        # Check for level up
+        levelling = games[self.food_count[games] % LEVEL_UP == 0]
+        if levelling.size > 0:
+            self.gate_open[levelling] = True
+            self.food_count[levelling] = 1
+            x = self._rng.integers(0, self.columns - 2, levelling.size)
+            y = self._rng.integers(0, self.rows - 2, levelling.size)
+            self.gate[levelling] = y * self._width + x
+
+        # Go through the gate when the head reaches its entrance
+        passing = self.gate_open[games] & (self._heads(games) == self.gate[games] + self._width + 1)
+        if passing.any():
+            passers = games[passing]
+            self.gate_open[passers] = False
+            self.speed_level[passers] += 1
+            self._place_snakes(passers)
+
+        # Move: the tail leaves its cell and the head moves one cell forward
+        tails = self.body[games, (self.head_index[games] - self.length[games] + 1) % self.capacity]
+        self.occupancy[games, tails] -= 1
+        heads = self._heads(games)
+        x = heads % self._width + self.DELTA_X[direction]
+        y = heads // self._width + self.DELTA_Y[direction]
+        # Teleport if collides with any edges
+        x = np.where(x < 0, self.columns - 1, np.where(x >= self.columns, 0, x))
+        y = np.where(y < 0, self.rows - 1, np.where(y >= self.rows, 0, y))
+        new_heads = y * self._width + x
+        self.head_index[games] = (self.head_index[games] + 1) % self.capacity
+        self.body[games, self.head_index[games]] = new_heads
+        self.occupancy[games, new_heads] += 1
+        self.steps[games] += 1
+
+        # Has the snake eaten itself or stumbled on the wall of the gate
+        eat_self = self.occupancy[games, new_heads] > 1
+        eat_gate = self.gate_open[games] & self._on_gate(games, x, y)
+        self.eat_self[games] = eat_self
+        self.eat_gate[games] = eat_gate
+        self.alive[games] = ~(eat_self | eat_gate)
+
+        return self.alive
+
+    def get_snake_cells(self, game: int) -> List[Tuple[int, int]]:
+        """
+        Returns the cells of the snake of the given game as (x, y) tuples, from the head to the tail
+
+        Args:
+            game (int): The index of the game
+
+        Returns:
+            The List of the cells of the snake
+        """
+        positions = (self.head_index[game] - np.arange(self.length[game])) % self.capacity
+        return [(int(cell % self._width), int(cell // self._width)) for cell in self.body[game, positions]]
+
+    def to_cell(self, cell: int) -> Tuple[int, int]:
+        """
+        Converts the number of a cell to its (x, y) coordinate on the grid
+
+        Args:
+            cell (int): The number of the cell
+
+        Returns:
+            The (x, y) coordinate of the cell
+        """
+        return (int(cell % self._width), int(cell // self._width))
+
+    def _heads(self, games: np.ndarray) -> np.ndarray:
+        """
+        Returns the cells of the heads of the snakes of the given games
+        """
+        return self.body[games, self.head_index[games]]
+
+    def _push_heads(self, games: np.ndarray, cells: np.ndarray) -> None:
+        """
+        Adds a new head to the snakes of the given games without removing their tails
+        """
+        self.head_index[games] = (self.head_index[games] + 1) % self.capacity
+        self.body[games, self.head_index[games]] = cells
+        self.occupancy[games, cells] += 1
+
+    def _place_snakes(self, games: np.ndarray) -> None:
+        """
+        Puts a new snake, as long as the current one, at a random position of the board of the given games,
+        exactly like a new Snake is created
+        """
+        self.occupancy[games] = 0
+        for game in games:
+            length = int(self.length[game])
+            if length > self.capacity:
+                raise ValueError("The snake is longer than the capacity of the engine")
+
+            x = self._rng.integers(min(length + 1, self.columns - 1), self.columns)
+            y = self._rng.integers(1, self.rows)
+            # The cells from the tail to the head, a snake too long to fit in a row wraps around the left edge
+            cells = y * self._width + (x - np.arange(length - 1, -1, -1)) % self.columns
+            self.body[game, :length] = cells
+            self.head_index[game] = length - 1
+            np.add.at(self.occupancy[game], cells, 1)
+
+    def _sample_fruits(self, games: np.ndarray) -> np.ndarray:
+        """
+        Picks a random empty cell for the fruit of each of the given games, or -1 if the board is full.
+        The fruit is never placed on the first row or the first column, like snake_rules.create_free_cells
+        """
+        fruits = np.full(games.size, -1, dtype=np.int64)
+        pending = np.arange(games.size)
+        # Most of the board is usually empty, so a few random tries place almost every fruit
+        for _ in range(self.FRUIT_TRIES):
+            if pending.size == 0:
+                return fruits
+
+            x = self._rng.integers(1, self.columns, pending.size)
+            y = self._rng.integers(1, self.rows, pending.size)
+            cells = y * self._width + x
+            pending_games = games[pending]
+            free = (self.occupancy[pending_games, cells] == 0) \
+                   & ~(self.gate_open[pending_games] & self._on_gate(pending_games, x, y))
+            fruits[pending[free]] = cells[free]
+            pending = pending[~free]
+
+        # Look for the free cells exactly on the nearly full boards
+        for index in pending:
+            game = games[index]
+            occupancy = self.occupancy[game].reshape(self.rows + 1, self._width)
+            free = occupancy[1:self.rows, 1:self.columns] == 0
+            if self.gate_open[game]:
+                gate_x = self.gate[game] % self._width
+                gate_y = self.gate[game] // self._width
+                for dx, dy in self.GATE_SHAPE:
+                    if gate_x + dx >= 1 and gate_y + dy >= 1:
+                        free[gate_y + dy - 1, gate_x + dx - 1] = False
+
+            candidates = np.flatnonzero(free)
+            if candidates.size > 0:
+                choice = candidates[self._rng.integers(candidates.size)]
+                fruits[index] = (choice // (self.columns - 1) + 1) * self._width + choice % (self.columns - 1) + 1
+
+        return fruits
+
+    def _on_gate(self, games: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Checks if the cells (x, y) lie on one of the blocks of the gate of the given games
+        """
+        dx = x - self.gate[games] % self._width
+        dy = y - self.gate[games] // self._width
+        on_gate = np.zeros(games.size, dtype=bool)
+        for gate_dx, gate_dy in self.GATE_SHAPE:
+            on_gate |= (dx == gate_dx) & (dy == gate_dy)
+
+        return on_gate
@@ -0,0 +1,441 @@
+from Block import Block
+from FreeCellIndex import FreeCellIndex
+from GameState import GameState
+from Snake import Snake
+from array import array
+from random import Random
+from typing import *
+from snake_rules import (UP, DOWN, LEFT, RIGHT, OPPOSITE_DIRECTIONS, LEVEL_UP, create_free_cells, create_fruit,
+                         create_gate_at)
+
+class BitBoard(object):
+    """
+    A compact form of the state of a game, for search-based bots that copy game states millions of times.
+
+    The cells of the board are numbered y * (columns + 1) + x, with one extra column and one extra row
+    because a snake eating a fruit next to the right or the bottom edge grows one block past the edge (see
+    BatchEngine). The cells the snake lies on are the bits of a Python int, the body is an array of cell
+    numbers from the tail to the head, and the fruit and the gate are cell numbers. Since an int never
+    changes, a clone shares the occupancy with the board it was cloned from, and cloning only copies the
+    array of the body, in one block of memory. Testing a cell is a shift and a mask.
+
+    Every bit operation costs a machine word per 64 cells of the board, so a BitBoard suits boards of the
+    size of the classic one. On big boards, GameState costs the same whatever the size of the board.
+
+    step() follows the rules of GameState.step exactly. The random placements (a new fruit, the gate and
+    the snake after the gate) are drawn by _place_fruit(), _place_gate() and _place_snake() from rng. A clone
+    shares rng with the board it was cloned from until one of them places something, which copies it first,
+    so the clones of a board draw the same placements whatever order they are stepped in. The gate and the
+    snake are drawn like the rules draw them, but a fruit is drawn without the index of the free cells of
+    the game, so after the first fruit eaten a BitBoard no longer places the same fruits as the game it was
+    made from.
+
+    Constants:
+        NO_CELL: The cell of a missing fruit or gate
+        DELTA: The (dx, dy) move of each direction
+        GATE_SHAPE: The cells of the gate relative to its top left cell
+        FRUIT_TRIES: The number of random cells tried for a fruit before looking for a free cell exactly
+
+    Attributes:
+        columns (int): The number of columns of the board
+        rows (int): The number of rows of the board
+        rng (Random): The random number generator of the placements
+        seed (int): The seed of the game the board was made from
+        occupancy (int): The bits of the cells the snake lies on
+        fruit (int): The cell of the fruit, or NO_CELL if the board is full
+        gate (int): The top left cell of the gate, or NO_CELL if the gate is closed
+        gate_open (bool): Is the gate open
+        direction (str): The direction the snake is moving in (UP | DOWN | LEFT | RIGHT)
+        food_count (int): The number of fruits eaten in the current level, starting from 1
+        speed_level (int): The number of gates the snake has gone through
+        score (int): The number of fruits eaten
+        steps (int): The number of steps played
+        eat_self (bool): Has the snake died by biting itself
+        eat_gate (bool): Has the snake died by stumbling on the gate
+        is_running (bool): Is the snake still alive
+        _width (int): The number of cells of a row, the extra column included
+        _body (array): The cells of the snake from the tail to the head, from position _start on
+        _start (int): The position of the tail in _body, the cells before it have been left behind
+        _extra (Dict[int, int]): The number of blocks of the snake beyond the first on each cell it overlaps
+        _gate_mask (int): The bits of the cells of the gate, 0 if the gate is closed
+        _shared_rng (bool): Is the random number generator shared with a clone
+    """
+    NO_CELL = -1
+    DELTA = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)}
+    GATE_SHAPE = ((0, 0), (0, 1), (1, 0), (2, 0), (2, 1))
+    FRUIT_TRIES = 8
+    _shared_rng = False
+
+    def __init__(self, board_size: Tuple[int, int], body: Sequence[Tuple[int, int]], direction: str,
+                 fruit: Optional[Tuple[int, int]] = None, gate: Optional[Tuple[int, int]] = None,
+                 rng: Optional[Random] = None):
+        """
+        Create a board with a snake, a fruit and a gate, at the start of a level
+
+        Args:
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board
+            body (Sequence[Tuple[int, int]]): The (column, row) of the blocks of the snake, from the head to the tail
+            direction (str): The direction the snake is moving in (UP | DOWN | LEFT | RIGHT)
+            fruit (Tuple[int, int]): The (column, row) of the fruit, or None if there is none
+            gate (Tuple[int, int]): The (column, row) of the top left block of the open gate, or None if it is closed
+            rng (Random): The random number generator of the placements, or None for a new one
+        """
+        self.columns, self.rows = board_size
+        self._width = self.columns + 1
+        self.rng = rng if rng is not None else Random()
+        self.seed = None
+        self.direction = direction
+        self.food_count = 1
+        self.speed_level = 0
+        self.score = 0
+        self.steps = 0
+        self.eat_self = False
+        self.eat_gate = False
+        self.is_running = True
+        self._set_body([self.to_cell(coordinate) for coordinate in reversed(body)])
+        self.fruit = self.to_cell(fruit) if fruit is not None else BitBoard.NO_CELL
+        self.gate_open = gate is not None
+        self._set_gate(self.to_cell(gate) if gate is not None else BitBoard.NO_CELL)
+
+    @classmethod
+    def from_game(cls, game: GameState, rng: Optional[Random] = None) -> 'BitBoard':
+        """
+        Create the BitBoard of the current state of a game
+
+        Args:
+            game (GameState): The game, which is left untouched
+            rng (Random): The random number generator of the placements, or None for a copy of the one of the
+                          game, so the placements are decided by the state of the game
+
+        Returns:
+            The BitBoard of the game
+        """
+        if rng is None:
+            rng = BitBoard._copy_rng(game.rng)
+
+        board = cls(game.board_size, [block.get_coordinate() for block in game.snake.get_body()], game.direction,
+                    game.fruit.get_coordinate() if game.fruit is not None else None,
+                    game.gate[0].get_coordinate() if game.gate is not None else None, rng)
+        board.seed = game.seed
+        board.gate_open = game.gate_open
+        board.food_count = game.food_count
+        board.speed_level = game.speed_level
+        board.score = game.score
+        board.steps = game.steps
+        board.eat_self = game.eat_self
+        board.eat_gate = game.eat_gate
+        board.is_running = game.is_running
+        return board
+
+    def to_game(self) -> GameState:
+        """
+        Create a GameState in the state of the board. The random number generator of the game starts from
+        the state of rng, but the free cells of the game are indexed anew, so the next fruits of the game are
+        not the ones the board would place
+
+        Args:
+            None
+
+        Returns:
+            The GameState, with no change recorded
+        """
+        game = GameState.__new__(GameState)
+        game.seed = self.seed
+        game.board_size = (self.columns, self.rows)
+        game.rng = BitBoard._copy_rng(self.rng)
+        game.free_cells = create_free_cells(game.board_size)
+        game.snake = self.to_snake(game.free_cells)
+        game.fruit = self.get_fruit()
+        game.gate = self.get_gate()
+        if game.gate is not None:
+            for block in game.gate:
+                game.free_cells.block(block.get_coordinate())
+        game.gate_open = self.gate_open
+        game.direction = self.direction
+        game.food_count = self.food_count
+        game.speed_level = self.speed_level
+        game.score = self.score
+        game.steps = self.steps
+        game.eat_self = self.eat_self
+        game.eat_gate = self.eat_gate
+        game.is_running = self.is_running
+        game._clear_changes()
+        game.changed_cells = None
+        return game
+
+    def to_snake(self, free_cells: Optional[FreeCellIndex] = None) -> Snake:
+        """
+        Create the Snake lying on the cells of the snake of the board
+
+        Args:
+            free_cells (FreeCellIndex): The index of the empty cells the Snake keeps up to date, or None
+
+        Returns:
+            The Snake
+        """
+        return Snake.from_coordinates(self.get_body(), free_cells)
+
+    def get_fruit(self) -> Optional[Block]:
+        """
+        Returns the Block of the fruit, or None if there is no fruit
+        """
+        return create_fruit(self.to_coordinate(self.fruit)) if self.fruit != BitBoard.NO_CELL else None
+
+    def get_gate(self) -> Optional[List[Block]]:
+        """
+        Returns the Blocks of the gate, or None if the gate is closed
+        """
+        return create_gate_at(self.to_coordinate(self.gate)) if self.gate != BitBoard.NO_CELL else None
+
+    def get_body(self) -> List[Tuple[int, int]]:
+        """
+        Returns the (column, row) of the blocks of the snake, from the head to the tail
+        """
+        return [self.to_coordinate(cell) for cell in reversed(self._body[self._start:])]
+
+    def get_head(self) -> int:
+        """
+        Returns the cell of the head of the snake
+        """
+        return self._body[-1]
+
+    def get_length(self) -> int:
+        """
+        Returns the number of blocks of the snake
+        """
+        return len(self._body) - self._start
+
+    def to_cell(self, coordinate: Tuple[int, int]) -> int:
+        """
+        Converts a (column, row) to the number of its cell
+
+        Args:
+            coordinate (Tuple[int, int]): The (column, row)
+
+        Returns:
+            The number of the cell
+        """
+        return coordinate[1] * self._width + coordinate[0]
+
+    def to_coordinate(self, cell: int) -> Tuple[int, int]:
+        """
+        Converts the number of a cell to its (column, row)
+
+        Args:
+            cell (int): The number of the cell
+
+        Returns:
+            The (column, row) of the cell
+        """
+        return (cell % self._width, cell // self._width)
+
+    def occupies(self, cell: int) -> bool:
+        """
+        Checks if a block of the snake lies on the given cell
+
+        Args:
+            cell (int): The number of the cell
+
+        Returns:
+            True if the cell is on the body of the snake or False otherwise
+        """
+        return self.occupancy >> cell & 1 == 1
+
+    def on_gate(self, cell: int) -> bool:
+        """
+        Checks if a block of the open gate lies on the given cell
+
+        Args:
+            cell (int): The number of the cell
+
+        Returns:
+            True if the cell is on the gate or False otherwise
+        """
+        return self._gate_mask >> cell & 1 == 1
+
+    def clone(self) -> 'BitBoard':
+        """
+        Returns a copy of the board, which can be stepped without changing this one. The occupancy is shared,
+        being an int, and only the cells of the body are copied. The random number generator is shared until
+        one of the boards places something
+
+        Args:
+            None
+
+        Returns:
+            The copy of the board
+        """
+        board = BitBoard.__new__(BitBoard)
+        board.__dict__.update(self.__dict__)
+        board._body = self._body[self._start:]
+        board._start = 0
+        board._extra = dict(self._extra)
+        self._shared_rng = board._shared_rng = True
+        return board
+
+    def step(self, direction: Optional[str] = None) -> bool:
+        """
+        Plays one tick of the game, with the same rules as GameState.step
+
+        Args:
+            direction (str): The direction to turn to before moving, or None to keep going straight
+
+        Returns:
+            True if the snake is still alive after the step or False otherwise
+        """
+        if not self.is_running:
+            return False
+
+        if direction is not None and direction != OPPOSITE_DIRECTIONS[self.direction]:
+            self.direction = direction
+        dx, dy = BitBoard.DELTA[self.direction]
+
+        # Eat the fruit: the snake grows a block in front of the fruit, without going over the edge
+        if not self.gate_open and self._body[-1] == self.fruit:
+            self._push(self.fruit + dy * self._width + dx)
+            self.fruit = self._place_fruit()
+            self.food_count += 1
+            self.score += 1
+
+        if self.food_count % LEVEL_UP == 0:
+            self.gate_open = True
+            self.food_count = 1
+            self._set_gate(self._place_gate())
+
+        # Go through the gate from its entrance: a snake as long takes the board at a random position
+        if self.gate_open and self._body[-1] == self.gate + self._width + 1:
+            length = self.get_length()
+            self._set_gate(BitBoard.NO_CELL)
+            self.gate_open = False
+            self._set_body([self.to_cell(coordinate) for coordinate in reversed(self._place_snake(length))])
+            self.speed_level += 1
+
+        # Move one block forward, teleporting to the opposite edge over an edge
+        head = self._body[-1]
+        x = head % self._width + dx
+        y = head // self._width + dy
+        if x < 0:
+            x = self.columns - 1
+        elif x >= self.columns:
+            x = 0
+        elif y < 0:
+            y = self.rows - 1
+        elif y >= self.rows:
+            y = 0
+        self._pop_tail()
+        head = y * self._width + x
+        self._push(head)
+        self.steps += 1
+
+        if head in self._extra:
+            self.is_running = False
+            self.eat_self = True
+        if self._gate_mask >> head & 1:
+            self.is_running = False
+            self.eat_gate = True
+
+        return self.is_running
+
+    def _place_fruit(self) -> int:
+        """
+        Picks a random free cell for the fruit, never on the first row or the first column like
+        snake_rules.create_free_cells, or returns NO_CELL if the board is full
+        """
+        rng = self._own_rng()
+        blocked = self.occupancy | self._gate_mask
+        # Most of the board is usually empty, so a few random tries place almost every fruit
+        for _ in range(BitBoard.FRUIT_TRIES):
+            cell = rng.randint(1, self.rows - 1) * self._width + rng.randint(1, self.columns - 1)
+            if not blocked >> cell & 1:
+                return cell
+
+        free = [y * self._width + x for y in range(1, self.rows) for x in range(1, self.columns)
+                if not blocked >> (y * self._width + x) & 1]
+        return rng.choice(free) if free else BitBoard.NO_CELL
+
+    def _place_gate(self) -> int:
+        """
+        Picks the top left cell of a new gate, drawn like snake_rules.create_gate
+        """
+        rng = self._own_rng()
+        x = rng.randint(0, self.columns - 3)
+        y = rng.randint(0, self.rows - 3)
+        return y * self._width + x
+
+    def _place_snake(self, length: int) -> List[Tuple[int, int]]:
+        """
+        Picks the (column, row) of the blocks of a new snake of the given length, from the head to the tail,
+        drawn like a new Snake
+        """
+        rng = self._own_rng()
+        x = rng.randint(min(length + 1, self.columns - 1), self.columns - 1)
+        y = rng.randint(1, self.rows - 1)
+        return [((x - i) % self.columns, y) for i in range(length)]
+
+    def _own_rng(self) -> Random:
+        """
+        Returns the random number generator of the placements, copied first if it is shared with a clone
+        """
+        if self._shared_rng:
+            self.rng = BitBoard._copy_rng(self.rng)
+            self._shared_rng = False
+        return self.rng
+
+    @staticmethod
+    def _copy_rng(rng: Random) -> Random:
+        """
+        Returns a random number generator in the same state as the given one
+        """
+        # Random() would seed the new generator from the system first, only to overwrite the state
+        copy = Random.__new__(Random)
+        copy.setstate(rng.getstate())
+        return copy
+
+    def _set_body(self, cells: Iterable[int]) -> None:
+        """
+        Puts the snake on the given cells, from the tail to the head
+        """
+        self._body = array("l")
+        self._start = 0
+        self._extra = {}
+        self.occupancy = 0
+        for cell in cells:
+            self._push(cell)
+
+    def _set_gate(self, gate: int) -> None:
+        """
+        Puts the gate at the given top left cell, or removes it with NO_CELL
+        """
+        self.gate = gate
+        self._gate_mask = 0
+        if gate != BitBoard.NO_CELL:
+            for dx, dy in BitBoard.GATE_SHAPE:
+                self._gate_mask |= 1 << (gate + dy * self._width + dx)
+
+    def _push(self, cell: int) -> None:
+        """
+        Adds a new head to the snake on the given cell
+        """
+        self._body.append(cell)
+        if self.occupancy >> cell & 1:
+            self._extra[cell] = self._extra.get(cell, 0) + 1
+        else:
+            self.occupancy |= 1 << cell
+
+    def _pop_tail(self) -> None:
+        """
+        Removes the tail of the snake. The cells left behind are dropped from the array once they are half of it
+        """
+        cell = self._body[self._start]
+        self._start += 1
+        if self._start > 32 and self._start * 2 > len(self._body):
+            del self._body[:self._start]
+            self._start = 0
+
+        count = self._extra.get(cell)
+        if count is None:
+            self.occupancy &= ~(1 << cell)
+        elif count > 1:
+            self._extra[cell] = count - 1
+        else:
+            del self._extra[cell]
@@ -1,26 +1,35 @@
+from SurfaceCache import SurfaceCache
 from typing import *
-import pygame
+
+if TYPE_CHECKING:
+    import pygame
 
 class Block(object):
     """
-    This class representing the pixels used to draw all the objects in the game.
-    Each pixels will have its coordinate and its color.
+    This class representing the cells of the board taken by the objects in the game.
+    Each block will have its coordinate on the board, in cells, and its color and size to draw it with.
+
+    Constants:
+        SURFACE_CACHE: The cache of surfaces shared by all the blocks, so that blocks with the same
+                       color and size are drawn with the same surface
 
     Attributes:
-        _x: the x-coordinate
-        _y: the y-coordinate
+        _x: the x-coordinate, the column of the block
+        _y: the y-coordinate, the row of the block
         color: the color of the block (this will vary between different game objects)
-        _size: the size of the block
+        _size: the size of the block on the screen, in pixels
     """
+    SURFACE_CACHE = SurfaceCache()
+
     def __init__(self, x: int, y: int, color: Tuple[int, int ,int], size: Tuple[int, int]):
         """
         Construct a block given its coordinate and color.
 
         Args:
-            x: the x-coordinate
-            y: the y-coordinate
+            x: the x-coordinate, in cells
+            y: the y-coordinate, in cells
             color: the color of the block
-            size: the size of the block, given as a tuple of (width, height)
+            size: the size of the block on the screen, given as a tuple of (width, height) in pixels
         """
         self._x = x
         self._y = y
@@ -64,6 +73,19 @@ class Block(object):
 
         return (self._x, self._y)
 
+    def get_screen_coordinate(self) -> Tuple[int, int]:
+        """
+        Returns the coordinate of the top left corner of the current block on the screen, in pixels: its cell
+        times its size
+
+        Args:
+            None
+
+        Returns:
+            The coordinate of the current block on the screen as a tuple
+        """
+        return (self._x * self._size[0], self._y * self._size[1])
+
     def get_color(self) -> Tuple[int, int, int]:
         """
         Returns the color of the current block as a RGB tuple
@@ -91,10 +113,10 @@ class Block(object):
 
     def change_x(self, pixels_num: int) -> None:
         """
-        Move the current block by a number of pixels horizontally
+        Move the current block by a number of cells horizontally
 
         Args:
-            pixels_num (int): The number of pixels that the block needs to move
+            pixels_num (int): The number of cells that the block needs to move
 
         Returns:
             None
@@ -103,10 +125,10 @@ class Block(object):
 
     def change_y(self, pixels_num: int) -> None:
         """
-        Move the current block by a number of pixels vertically
+        Move the current block by a number of cells vertically
 
         Args:
-            pixels_num (int): The number of pixels that the block needs to move
+            pixels_num (int): The number of cells that the block needs to move
 
         Returns:
             None
@@ -149,7 +171,7 @@ class Block(object):
         """
         self._y = new_y
 
-    def draw(self) -> pygame.Surface:
+    def draw(self) -> 'pygame.Surface':
         """
         Draw the current block on the screen and return the surface of the block
 
@@ -157,12 +179,7 @@ class Block(object):
             None
 
         Returns:
-            A new Surface object on which the current block is drawn on
+            The Surface object on which the current block is drawn on. The surface is shared with
+            all the blocks of the same color and size, so it must not be drawn on
         """
-
-        width = self._size[0]
-        height = self._size[1]
-        surface = pygame.Surface((width, height), depth=32)
-        surface.fill(self._color)
-
-        return surface
\ No newline at end of file
+        return Block.SURFACE_CACHE.get(self._color, self._size)
@@ -0,0 +1,144 @@
+from GameState import GameState
+from Snake import Snake
+from typing import *
+from snake_rules import FRUIT_COLOR, GATE_COLOR
+import numpy as np
+
+class BoardGrid(object):
+    """
+    A picture of the board of a GameState as a uint8 tensor of shape (5, rows, columns), with one channel
+    for each of empty, body, head, fruit and gate. A cell can be in more than one channel, the head lying
+    on the fruit for example, and is in the empty channel only when it is in none of the others.
+
+    The tensor is allocated once and kept up to date in place: after every step of the game only the cells
+    listed in GameState.changed_cells are written again, so following a game costs a handful of writes per
+    step instead of a new tensor. The grid can also keep a (rows, columns, 3) uint8 image of the board, with
+    one pixel per cell, updated the same way.
+
+    The views returned by get_view() and get_image() are read-only and share the memory of the grid, so they
+    are overwritten by the next update(). Callers that need to keep an observation must copy it.
+
+    Constants:
+        EMPTY, BODY, HEAD, FRUIT, GATE: The channels of the grid
+        HEAD_COLOR: The color of the head in the image
+
+    Attributes:
+        game (GameState): The game the grid follows
+        columns (int): The number of columns of the board
+        rows (int): The number of rows of the board
+    """
+    EMPTY, BODY, HEAD, FRUIT, GATE = range(5)
+    HEAD_COLOR = (255, 255, 255)
+
+    _COLORS = {BODY: Snake.SNAKE_COLOR, HEAD: HEAD_COLOR, FRUIT: FRUIT_COLOR, GATE: GATE_COLOR}
+
+    def __init__(self, game: GameState, image: bool = False):
+        """
+        Create the grid of the given game and fill it with the current state of the game
+
+        Args:
+            game (GameState): The game to follow
+            image (bool): Should the grid also keep an RGB image of the board
+        """
+        self.game = game
+        self.columns, self.rows = game.board_size
+        self._grid = np.zeros((5, self.rows, self.columns), dtype=np.uint8)
+        self._view = self._grid.view()
+        self._view.flags.writeable = False
+        self._image = None
+        self._image_view = None
+        if image:
+            self._image = np.zeros((self.rows, self.columns, 3), dtype=np.uint8)
+            self._image_view = self._image.view()
+            self._image_view.flags.writeable = False
+        self.update()
+
+    def get_view(self) -> np.ndarray:
+        """
+        Returns the grid as a read-only array, which is overwritten by the next update
+
+        Args:
+            None
+
+        Returns:
+            The (5, rows, columns) uint8 grid of the board
+        """
+        return self._view
+
+    def get_image(self) -> Optional[np.ndarray]:
+        """
+        Returns the image of the board as a read-only array, which is overwritten by the next update
+
+        Args:
+            None
+
+        Returns:
+            The (rows, columns, 3) uint8 image of the board, or None if the grid was created without an image
+        """
+        return self._image_view
+
+    def update(self) -> None:
+        """
+        Brings the grid up to date with the game after a step, rewriting only the cells that have changed.
+        The whole grid is rebuilt after the game has been reset
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        game = self.game
+        gate = set()
+        if game.gate_open:
+            gate = {block.get_coordinate() for block in game.gate}
+
+        if game.changed_cells is None:
+            self._rebuild(gate)
+            return
+
+        for coordinate in game.changed_cells:
+            self._write(coordinate, gate)
+
+    def _rebuild(self, gate: Set[Tuple[int, int]]) -> None:
+        """
+        Fills the whole grid from the blocks of the game
+        """
+        game = self.game
+        self._grid.fill(0)
+        self._grid[BoardGrid.EMPTY] = 1
+        if self._image is not None:
+            self._image.fill(0)
+
+        coordinates = [block.get_coordinate() for block in game.snake.get_body()]
+        coordinates.extend(gate)
+        if game.fruit is not None:
+            coordinates.append(game.fruit.get_coordinate())
+        for coordinate in coordinates:
+            self._write(coordinate, gate)
+
+    def _write(self, coordinate: Tuple[int, int], gate: Set[Tuple[int, int]]) -> None:
+        """
+        Writes the content of the given cell. The head is not counted as body, the fruit is hidden while the
+        gate is open, and in the image the gate is drawn over the fruit, the fruit over the head and the head
+        over the body
+        """
+        x, y = coordinate
+        # A snake eating next to the edge can grow one block past it
+        if x >= self.columns or y >= self.rows:
+            return
+
+        game = self.game
+        head = coordinate == game.snake.get_head().get_coordinate()
+        body = not head and game.snake.occupies(coordinate)
+        fruit = not game.gate_open and game.fruit is not None and coordinate == game.fruit.get_coordinate()
+        on_gate = coordinate in gate
+        self._grid[:, y, x] = (not (body or head or fruit or on_gate), body, head, fruit, on_gate)
+        if self._image is not None:
+            color = (0, 0, 0)
+            for channel, present in ((BoardGrid.GATE, on_gate), (BoardGrid.FRUIT, fruit),
+                                     (BoardGrid.HEAD, head), (BoardGrid.BODY, body)):
+                if present:
+                    color = BoardGrid._COLORS[channel]
+                    break
+            self._image[y, x] = color
@@ -0,0 +1,195 @@
+from Block import Block
+from GameState import GameState
+from Snake import Snake
+from collections import defaultdict
+from typing import *
+from snake_rules import BACKGROUND_COLOR, FRUIT_COLOR, GATE_COLOR
+import pygame
+
+def merge_cells(coordinates: Iterable[Tuple[int, int]], size: Tuple[int, int]) -> List[pygame.Rect]:
+    """
+    Covers cells with as few rectangles as possible without covering any other cell: the cells next to each
+    other on a row are merged into runs, and the same runs on consecutive rows are merged into one rectangle
+
+    Args:
+        coordinates (Iterable[Tuple[int, int]]): The coordinates of the top left corners of the cells
+        size (Tuple[int, int]): The size of a cell, given as a tuple of (width, height)
+
+    Returns:
+        The rectangles covering the cells
+    """
+    width, height = size
+    rows = defaultdict(list)
+    for x, y in coordinates:
+        rows[y].append(x)
+
+    rects = []
+    above = {}  # The rectangles ending on the row above, by the span of their run
+    for y in sorted(rows):
+        columns = sorted(rows[y])
+        runs = []
+        start = end = columns[0]
+        for x in columns[1:]:
+            if x == end + width:
+                end = x
+            elif x != end:
+                runs.append((start, end + width))
+                start = end = x
+        runs.append((start, end + width))
+
+        current = {}
+        for run in runs:
+            rect = above.get(run)
+            if rect is not None and rect.bottom == y:
+                rect.height += height
+            else:
+                rect = pygame.Rect(run[0], y, run[1] - run[0], height)
+                rects.append(rect)
+            current[run] = rect
+        above = current
+    return rects
+
+class BoardRenderer(object):
+    """
+    Draws a GameState on a surface, redrawing only the cells that have changed.
+
+    Every cell of the board is drawn as a block of Snake.SNAKE_BLOCK_SIZE pixels, the top left cell in the
+    top left corner of the surface. The cells that fall outside the surface are not drawn.
+
+    After every step of the game, add_changes() collects the cells the step has changed (see
+    GameState.changed_cells). flush() then draws each of them once, from what lies on it now: the gate over the
+    fruit, the fruit over the snake, the snake over the background. It returns the changed areas merged into
+    a few rectangles for pygame.display.update. A step changes the same few cells (the head, the tail, the
+    fruit or the gate) however long the snake is, so the blits of a frame do not grow with the snake. Only
+    a reset of the game, or a new level that moves the whole snake, redraws more.
+
+    Attributes:
+        game (GameState): The game drawn
+        screen (pygame.Surface): The surface the game is drawn on
+        blits (int): The number of cells drawn by the last flush
+        _dirty (Set[Tuple[int, int]]): The (column, row) of the cells to draw again
+        _full (bool): Must the whole board be drawn again
+    """
+    def __init__(self, game: GameState, screen: pygame.Surface):
+        """
+        Create a renderer, whose first flush draws the whole board
+
+        Args:
+            game (GameState): The game to draw
+            screen (pygame.Surface): The surface to draw the game on
+        """
+        self.game = game
+        self.screen = screen
+        self.blits = 0
+        self._dirty = set()
+        self._full = True
+
+    def add_changes(self) -> None:
+        """
+        Collects the cells changed by the last step of the game, or the whole board after a reset
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.game.changed_cells is None:
+            self._full = True
+        else:
+            self._dirty.update(self.game.changed_cells)
+
+    def add_cells(self, coordinates: Iterable[Tuple[int, int]]) -> None:
+        """
+        Collects cells to write again, whose content has changed outside of a step of the game
+
+        Args:
+            coordinates (Iterable[Tuple[int, int]]): The (column, row) of the cells
+
+        Returns:
+            None
+        """
+        self._dirty.update(coordinates)
+
+    def add_area(self, area: pygame.Rect) -> None:
+        """
+        Collects the cells under an area of the surface, to draw again what something else has drawn over them
+
+        Args:
+            area (pygame.Rect): The area of the surface
+
+        Returns:
+            None
+        """
+        width, height = Snake.SNAKE_BLOCK_SIZE
+        for y in range(area.top // height, (area.bottom + height - 1) // height):
+            for x in range(area.left // width, (area.right + width - 1) // width):
+                self._dirty.add((x, y))
+
+    def flush(self, snake: Optional[Snake] = None) -> List[pygame.Rect]:
+        """
+        Draws the cells collected since the last flush
+
+        Args:
+            snake (Snake): The snake to draw instead of the one of the game, or None. Used when the snake has
+                           gone through the gate, to draw the old snake until it has disappeared
+
+        Returns:
+            The areas of the surface drawn, for updating purpose
+        """
+        if self._full:
+            self._full = False
+            self._dirty.clear()
+            return self._draw_all()
+
+        game = self.game
+        snake = snake if snake is not None else game.snake
+        screen = self.screen
+        bounds = screen.get_rect()
+        columns, rows = game.board_size
+        size = width, height = Snake.SNAKE_BLOCK_SIZE
+        gate = set()
+        if game.gate_open:
+            gate = {block.get_coordinate() for block in game.gate}
+        fruit = game.fruit.get_coordinate() if game.fruit is not None and not game.gate_open else None
+        surfaces = {color: Block.SURFACE_CACHE.get(color, size) for color in (GATE_COLOR, FRUIT_COLOR,
+                                                                              Snake.SNAKE_COLOR)}
+
+        drawn = []
+        for coordinate in self._dirty:
+            pixel = (coordinate[0] * width, coordinate[1] * height)
+            # A snake eating next to the edge can grow one block past it
+            if not (coordinate[0] < columns and coordinate[1] < rows and bounds.collidepoint(pixel)):
+                continue
+
+            if coordinate in gate:
+                screen.blit(surfaces[GATE_COLOR], pixel)
+            elif coordinate == fruit:
+                screen.blit(surfaces[FRUIT_COLOR], pixel)
+            elif snake.occupies(coordinate):
+                screen.blit(surfaces[Snake.SNAKE_COLOR], pixel)
+            else:
+                screen.fill(BACKGROUND_COLOR, (pixel, size))
+            drawn.append(pixel)
+
+        self._dirty.clear()
+        self.blits = len(drawn)
+        return merge_cells(drawn, size)
+
+    def _draw_all(self) -> List[pygame.Rect]:
+        """
+        Draws the whole board
+        """
+        game = self.game
+        columns, rows = game.board_size
+        self.screen.fill(BACKGROUND_COLOR)
+        blocks = list(game.snake.get_body())
+        if game.gate_open:
+            blocks += game.gate
+        elif game.fruit is not None:
+            blocks.append(game.fruit)
+        for block in blocks:
+            if block.get_x() < columns and block.get_y() < rows:
+                self.screen.blit(block.draw(), block.get_screen_coordinate())
+        self.blits = len(blocks)
+        return [self.screen.get_rect()]
@@ -0,0 +1,328 @@
+from collections import OrderedDict
+from typing import *
+import json
+import math
+import time
+
+class PhaseHistogram(object):
+    """
+    A histogram of durations with a fixed number of buckets, so that recording a duration never allocates
+    and the memory used does not grow with the number of frames.
+
+    The buckets grow geometrically, BUCKETS_PER_OCTAVE per doubling of the duration, from MIN_NS up.
+    A percentile is read as the upper bound of the bucket it falls in, so it is at most 1 / BUCKETS_PER_OCTAVE
+    of an octave (about 9%) above the exact value.
+
+    Constants:
+        MIN_NS = 1000: The upper bound of the first bucket, in nanoseconds (1 microsecond)
+        BUCKETS_PER_OCTAVE = 8: The number of buckets per doubling of the duration
+        BUCKET_COUNT = 200: The number of buckets, enough for durations up to about 30 seconds
+
+    Attributes:
+        _counts (List[int]): The number of durations in every bucket
+        _count (int): The number of durations recorded
+        _total (int): The sum of the durations recorded, in nanoseconds
+        _max (int): The longest duration recorded, in nanoseconds
+    """
+    MIN_NS = 1000
+    BUCKETS_PER_OCTAVE = 8
+    BUCKET_COUNT = 200
+
+    def __init__(self):
+        """
+        Create an empty histogram
+        """
+        self._counts = [0] * PhaseHistogram.BUCKET_COUNT
+        self._count = 0
+        self._total = 0
+        self._max = 0
+
+    def record(self, duration: int) -> None:
+        """
+        Adds a duration to the histogram
+
+        Args:
+            duration (int): The duration in nanoseconds
+
+        Returns:
+            None
+        """
+        if duration <= PhaseHistogram.MIN_NS:
+            bucket = 0
+        else:
+            bucket = min(math.ceil(math.log2(duration / PhaseHistogram.MIN_NS) * PhaseHistogram.BUCKETS_PER_OCTAVE),
+                         PhaseHistogram.BUCKET_COUNT - 1)
+        self._counts[bucket] += 1
+        self._count += 1
+        self._total += duration
+        if duration > self._max:
+            self._max = duration
+
+    def get_count(self) -> int:
+        """
+        Returns the number of durations recorded
+
+        Args:
+            None
+
+        Returns:
+            The number of durations
+        """
+        return self._count
+
+    def get_mean(self) -> float:
+        """
+        Returns the mean of the durations recorded
+
+        Args:
+            None
+
+        Returns:
+            The mean duration in nanoseconds, 0 if nothing was recorded
+        """
+        return self._total / self._count if self._count else 0.0
+
+    def get_max(self) -> int:
+        """
+        Returns the longest duration recorded
+
+        Args:
+            None
+
+        Returns:
+            The longest duration in nanoseconds
+        """
+        return self._max
+
+    def get_percentile(self, percentile: float) -> float:
+        """
+        Returns the duration under which the given percentage of the durations recorded fall
+
+        Args:
+            percentile (float): The percentage, from 0 to 100
+
+        Returns:
+            The duration in nanoseconds, 0 if nothing was recorded
+        """
+        if not self._count:
+            return 0.0
+
+        rank = math.ceil(self._count * percentile / 100) or 1
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                upper = PhaseHistogram.MIN_NS * 2 ** (bucket / PhaseHistogram.BUCKETS_PER_OCTAVE)
+                return min(upper, self._max)
+        return float(self._max)
+
+    def get_counts(self) -> List[int]:
+        """
+        Returns the number of durations in every bucket
+
+        Args:
+            None
+
+        Returns:
+            A copy of the counts of the buckets
+        """
+        return list(self._counts)
+
+class FrameProfiler(object):
+    """
+    Measures how long every phase of the frames of the main loop takes.
+
+    A frame starts with start_frame(). Every call to mark(phase) records the time elapsed since the previous
+    mark (or the start of the frame) as the duration of that phase, so the phases must be marked in the order
+    they run. A phase run several times in a frame is recorded every time. end_frame() records the duration of
+    the whole frame. The breakdown of the slowest frame is kept to tell which phase caused the worst spike.
+
+    Attributes:
+        enabled (bool): Are the frames measured
+        frames (int): The number of frames measured
+        _histograms (OrderedDict[str, PhaseHistogram]): The histogram of every phase, and of the whole frames
+                                                        under "frame"
+        _frame_start (int): When the current frame started, in nanoseconds
+        _last (int): When the previous phase of the current frame ended, in nanoseconds
+        _phases (Dict[str, int]): The durations of the phases of the current frame
+        _worst (Dict[str, int]): The durations of the phases of the slowest frame, and of the frame itself
+    """
+    enabled = True
+
+    def __init__(self, phases: Sequence[str]):
+        """
+        Create a profiler
+
+        Args:
+            phases (Sequence[str]): The names of the phases, in the order they run in a frame
+        """
+        self._histograms = OrderedDict((phase, PhaseHistogram()) for phase in phases)
+        self._histograms["frame"] = PhaseHistogram()
+        self.frames = 0
+        self._frame_start = 0
+        self._last = 0
+        self._phases = {}
+        self._worst = {"frame": 0}
+
+    def start_frame(self) -> None:
+        """
+        Starts measuring a frame
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._frame_start = self._last = time.perf_counter_ns()
+        self._phases.clear()
+
+    def mark(self, phase: str) -> None:
+        """
+        Records the end of a phase of the current frame
+
+        Args:
+            phase (str): The name of the phase that just ended
+
+        Returns:
+            None
+        """
+        now = time.perf_counter_ns()
+        duration = now - self._last
+        self._histograms[phase].record(duration)
+        self._phases[phase] = self._phases.get(phase, 0) + duration
+        self._last = now
+
+    def end_frame(self) -> None:
+        """
+        Records the end of the current frame
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        duration = time.perf_counter_ns() - self._frame_start
+        self._histograms["frame"].record(duration)
+        self.frames += 1
+        if duration > self._worst["frame"]:
+            self._worst = dict(self._phases, frame=duration)
+
+    def add_histogram(self, name: str, histogram: PhaseHistogram) -> None:
+        """
+        Shows a histogram kept by something else next to the phases, in the summary, the overlay and the dump
+
+        Args:
+            name (str): The name shown for the histogram
+            histogram (PhaseHistogram): The histogram, of durations in nanoseconds
+
+        Returns:
+            None
+        """
+        self._histograms[name] = histogram
+
+    def get_histogram(self, phase: str) -> PhaseHistogram:
+        """
+        Returns the histogram of a phase
+
+        Args:
+            phase (str): The name of the phase, or "frame" for the whole frames
+
+        Returns:
+            The histogram of the durations of the phase
+        """
+        return self._histograms[phase]
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the statistics of every phase, in milliseconds
+
+        Args:
+            None
+
+        Returns:
+            For every phase, and for "frame", its count, mean, p50, p95, p99 and max
+        """
+        summary = OrderedDict()
+        for phase, histogram in self._histograms.items():
+            summary[phase] = {
+                "count": histogram.get_count(),
+                "mean_ms": histogram.get_mean() / 1e6,
+                "p50_ms": histogram.get_percentile(50) / 1e6,
+                "p95_ms": histogram.get_percentile(95) / 1e6,
+                "p99_ms": histogram.get_percentile(99) / 1e6,
+                "max_ms": histogram.get_max() / 1e6,
+            }
+        return summary
+
+    def get_worst_frame(self) -> Dict[str, float]:
+        """
+        Returns the breakdown of the slowest frame
+
+        Args:
+            None
+
+        Returns:
+            The duration of every phase of the slowest frame, and of the frame under "frame", in milliseconds
+        """
+        return {phase: duration / 1e6 for phase, duration in self._worst.items()}
+
+    def format_lines(self) -> List[str]:
+        """
+        Returns the statistics as lines of text, for the overlay of the game
+
+        Args:
+            None
+
+        Returns:
+            A header and a line per phase with its p50, p95, p99 and max, then the slowest frame
+        """
+        lines = ["{:<10} {:>7} {:>7} {:>7} {:>7}".format("ms", "p50", "p95", "p99", "max")]
+        for phase, stats in self.get_summary().items():
+            lines.append("{:<10} {:>7.2f} {:>7.2f} {:>7.2f} {:>7.2f}".format(
+                phase, stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["max_ms"]))
+        worst = self.get_worst_frame()
+        phases = sorted((phase for phase in worst if phase != "frame"), key=worst.get, reverse=True)
+        lines.append("worst {:.1f}: ".format(worst["frame"]) +
+                     ", ".join("{} {:.1f}".format(phase, worst[phase]) for phase in phases[:3]))
+        return lines
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the statistics, the slowest frame and the buckets of every histogram to a JSON file
+
+        Args:
+            path (str): The path of the file
+
+        Returns:
+            None
+        """
+        report = {
+            "frames": self.frames,
+            "summary": self.get_summary(),
+            "worst_frame_ms": self.get_worst_frame(),
+            "histograms": {
+                "min_ns": PhaseHistogram.MIN_NS,
+                "buckets_per_octave": PhaseHistogram.BUCKETS_PER_OCTAVE,
+                "counts": {phase: histogram.get_counts() for phase, histogram in self._histograms.items()},
+            },
+        }
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+class NullProfiler(FrameProfiler):
+    """
+    A profiler that measures nothing, used when profiling is off so that the main loop does not have to
+    check: every call is an empty method
+    """
+    enabled = False
+
+    def start_frame(self) -> None:
+        pass
+
+    def mark(self, phase: str) -> None:
+        pass
+
+    def end_frame(self) -> None:
+        pass
@@ -0,0 +1,318 @@
+from random import Random
+import random
+from typing import *
+
+class FreeCellIndex(object):
+    """
+    An index of the empty cells of a rectangular area of the board, used to place the fruit.
+
+    The cells are kept in a virtual array where the free cells come first and the blocked cells last,
+    together with the position of every cell in that array. Blocking or freeing a cell swaps it with the
+    last free cell, and picking a random free cell is a single random index into the free part, so all
+    the operations take constant time. Only the cells that have been moved away from their initial
+    place are stored, so creating an index is free and its memory grows with the number of blocked
+    cells, not with the size of the board.
+
+    A cell can be blocked by more than one object at a time (e.g. the snake and the gate), so the index
+    keeps a count of blockers and the cell is only free again when all of them have left.
+
+    Cells outside the indexed area are ignored.
+
+    branch() gives an index of the same free cells that shares the containers of this one and only records
+    the cells blocked and freed, so that a game played on from a snapshot does not copy the index at every
+    step (see GameState.restore). The containers are copied and the recorded changes applied the first time
+    the free cells of the branch are read, usually to place a fruit, or once there are more changes than
+    blocked cells.
+
+    Attributes:
+        _first_column (int): The first column of the indexed area
+        _first_row (int): The first row of the indexed area
+        _columns (int): The number of columns of the indexed area
+        _rows (int): The number of rows of the indexed area
+        _free (int): The number of free cells
+        _cells (Dict[int, int]): The cells that are not at their initial place in the array, by position
+        _positions (Dict[int, int]): The positions of the cells that are not at their initial place
+        _blockers (Dict[int, int]): The number of objects blocking each blocked cell
+        _changes (List[Tuple[Tuple[int, int], bool]]): The (column, row) of the cells blocked (True) and freed
+                                                      (False) since the index was branched and not applied
+                                                      yet, or None if the containers are its own
+    """
+    def __init__(self, first_cell: Tuple[int, int], last_cell: Tuple[int, int]):
+        """
+        Create an index where all the cells between first_cell and last_cell (inclusive) are free.
+
+        Args:
+            first_cell (Tuple[int, int]): The (column, row) of the top left cell of the indexed area
+            last_cell (Tuple[int, int]): The (column, row) of the bottom right cell of the indexed area
+        """
+        self._first_column = first_cell[0]
+        self._first_row = first_cell[1]
+        self._columns = max(last_cell[0] - first_cell[0] + 1, 0)
+        self._rows = max(last_cell[1] - first_cell[1] + 1, 0)
+        self._free = self._columns * self._rows
+        self._cells = {}
+        self._positions = {}
+        self._blockers = {}
+        self._changes = None
+
+    def get_free_count(self) -> int:
+        """
+        Returns the number of free cells
+
+        Args:
+            None
+
+        Returns:
+            The number of free cells in the indexed area
+        """
+        if self._changes is not None:
+            self._apply_changes()
+        return self._free
+
+    def is_full(self) -> bool:
+        """
+        Checks if there is no free cell left
+
+        Args:
+            None
+
+        Returns:
+            True if every cell of the indexed area is blocked or False otherwise
+        """
+        if self._changes is not None:
+            self._apply_changes()
+        return self._free == 0
+
+    def is_free(self, coordinate: Tuple[int, int]) -> bool:
+        """
+        Checks if the cell at the given coordinate is free
+
+        Args:
+            coordinate (Tuple[int, int]): The (column, row) of the cell
+
+        Returns:
+            True if the cell is in the indexed area and nothing blocks it, or False otherwise
+        """
+        if self._changes is not None:
+            self._apply_changes()
+        cell = self._to_cell(coordinate)
+        return cell is not None and cell not in self._blockers
+
+    def block(self, coordinate: Tuple[int, int]) -> None:
+        """
+        Records that one more object lies on the cell at the given coordinate
+
+        Args:
+            coordinate (Tuple[int, int]): The (column, row) of the cell
+
+        Returns:
+            None
+        """
+        cell = self._to_cell(coordinate)
+        if cell is None:
+            return
+        if self._changes is not None:
+            self._record(coordinate, True)
+            return
+
+        count = self._blockers.get(cell, 0)
+        self._blockers[cell] = count + 1
+        if count == 0:
+            # Move the cell to the end of the free part and shrink the free part
+            self._free -= 1
+            self._swap(self._position_of(cell), self._free)
+
+    def unblock(self, coordinate: Tuple[int, int]) -> None:
+        """
+        Records that one object has left the cell at the given coordinate
+
+        Args:
+            coordinate (Tuple[int, int]): The (column, row) of the cell
+
+        Returns:
+            None
+        """
+        cell = self._to_cell(coordinate)
+        if cell is None:
+            return
+        if self._changes is not None:
+            self._record(coordinate, False)
+            return
+
+        count = self._blockers[cell] - 1
+        if count > 0:
+            self._blockers[cell] = count
+            return
+
+        # Move the cell to the start of the blocked part and grow the free part
+        del self._blockers[cell]
+        self._swap(self._position_of(cell), self._free)
+        self._free += 1
+
+    def pick(self, rng: Optional[Random] = None) -> Optional[Tuple[int, int]]:
+        """
+        Picks a free cell uniformly at random
+
+        Args:
+            rng (Random): The random number generator to pick the cell with, or None to use the
+                          global one of the random module
+
+        Returns:
+            The (column, row) of the picked cell, or None if the indexed area is full
+        """
+        if self._changes is not None:
+            self._apply_changes()
+        if self._free == 0:
+            return None
+
+        rng = rng if rng is not None else random
+        cell = self._cell_at(rng.randrange(self._free))
+        column = self._first_column + cell % self._columns
+        row = self._first_row + cell // self._columns
+        return (column, row)
+
+    def get_state(self) -> Tuple[int, Dict[int, int], Dict[int, int]]:
+        """
+        Returns what is needed to rebuild the index exactly, including the order of the free cells which
+        decides the cell a given random number picks
+
+        Args:
+            None
+
+        Returns:
+            The tuple (free count, cells away from their initial place by position, blockers by cell)
+        """
+        if self._changes is not None:
+            self._apply_changes()
+        return (self._free, dict(self._cells), dict(self._blockers))
+
+    def set_state(self, state: Tuple[int, Dict[int, int], Dict[int, int]]) -> None:
+        """
+        Puts the index back in a state returned by get_state()
+
+        Args:
+            state (Tuple[int, Dict[int, int], Dict[int, int]]): The state of the index
+
+        Returns:
+            None
+        """
+        free, cells, blockers = state
+        self._free = free
+        self._cells = dict(cells)
+        self._positions = {cell: position for position, cell in cells.items()}
+        self._blockers = dict(blockers)
+        self._changes = None
+
+    def copy(self) -> 'FreeCellIndex':
+        """
+        Returns an index of the same free cells, in the same order, that can change without changing this one
+
+        Args:
+            None
+
+        Returns:
+            The copy of the index
+        """
+        if self._changes is not None:
+            self._apply_changes()
+        index = FreeCellIndex.__new__(FreeCellIndex)
+        index.__dict__.update(self.__dict__)
+        index._cells = self._cells.copy()
+        index._positions = self._positions.copy()
+        index._blockers = self._blockers.copy()
+        return index
+
+    def branch(self) -> 'FreeCellIndex':
+        """
+        Returns an index of the same free cells, in the same order, that can change without changing this one.
+        Unlike copy(), it costs the same whatever the number of blocked cells: the branch shares the containers
+        of this index and copies them only when its free cells are read, so this index must not change as long
+        as the branch is used
+
+        Args:
+            None
+
+        Returns:
+            The branch of the index
+        """
+        index = FreeCellIndex.__new__(FreeCellIndex)
+        index.__dict__.update(self.__dict__)
+        index._changes = list(self._changes) if self._changes is not None else []
+        return index
+
+    def _record(self, coordinate: Tuple[int, int], blocked: bool) -> None:
+        """
+        Records a cell blocked or freed in a branch. Once the changes outnumber the blocked cells, applying them
+        costs no more than the copy it saves, so they are applied rather than kept growing
+        """
+        self._changes.append((coordinate, blocked))
+        if len(self._changes) > len(self._blockers):
+            self._apply_changes()
+
+    def _apply_changes(self) -> None:
+        """
+        Copies the containers shared with the index this one was branched from, then blocks and frees the
+        cells recorded since, in the same order
+        """
+        changes = self._changes
+        self._changes = None
+        self._cells = self._cells.copy()
+        self._positions = self._positions.copy()
+        self._blockers = self._blockers.copy()
+        for coordinate, blocked in changes:
+            if blocked:
+                self.block(coordinate)
+            else:
+                self.unblock(coordinate)
+
+    def _to_cell(self, coordinate: Tuple[int, int]) -> Optional[int]:
+        """
+        Converts the (column, row) of a cell to its number in the indexed area
+
+        Args:
+            coordinate (Tuple[int, int]): The (column, row) of the cell
+
+        Returns:
+            The number of the cell, or None if the coordinate is outside the indexed area
+        """
+        column = coordinate[0] - self._first_column
+        row = coordinate[1] - self._first_row
+        if column < 0 or column >= self._columns or row < 0 or row >= self._rows:
+            return None
+
+        return row * self._columns + column
+
+    def _cell_at(self, position: int) -> int:
+        """
+        Returns the cell at the given position of the array
+        """
+        return self._cells.get(position, position)
+
+    def _position_of(self, cell: int) -> int:
+        """
+        Returns the position of the given cell in the array
+        """
+        return self._positions.get(cell, cell)
+
+    def _place(self, cell: int, position: int) -> None:
+        """
+        Puts the cell at the given position of the array, only storing cells away from their initial place
+        """
+        if cell == position:
+            self._cells.pop(position, None)
+            self._positions.pop(cell, None)
+        else:
+            self._cells[position] = cell
+            self._positions[cell] = position
+
+    def _swap(self, first: int, second: int) -> None:
+        """
+        Swaps the cells at the two given positions of the array
+        """
+        if first == second:
+            return
+
+        first_cell = self._cell_at(first)
+        second_cell = self._cell_at(second)
+        self._place(first_cell, second)
+        self._place(second_cell, first)
@@ -0,0 +1,465 @@
+from Block import Block
+from FreeCellIndex import FreeCellIndex
+from Snake import Snake
+from random import Random
+from typing import *
+from snake_rules import (BOARD_SIZE, RIGHT, DIRECTIONS, LEVEL_UP, OPPOSITE_DIRECTIONS, DEATH_CAUSES,
+                         create_free_cells, generate_fruit, create_fruit, check_fruit_collision, advance_snake,
+                         check_eat_self, create_gate, create_gate_at, passed_gate, check_gate_collision)
+import struct
+
+class GameSnapshot(NamedTuple):
+    """
+    The state of a game at one tick, taken by GameState.snapshot() and put back by GameState.restore().
+    It shares the snake, the index of the free cells and the random number generator with the game, which
+    copies them before changing them again, so a snapshot must not be changed
+
+    Attributes:
+        seed (int): The seed of the game
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board
+        rng (Random): The random number generator of the game
+        free_cells (FreeCellIndex): The empty cells of the board
+        snake (Snake): The snake
+        fruit (Block): The fruit, or None
+        gate (List[Block]): The gate, or None
+        gate_open (bool): Is the gate open
+        direction (str): The direction the snake is moving in
+        food_count (int): The number of fruits eaten in the current level, starting from 1
+        speed_level (int): The number of gates the snake has gone through
+        score (int): The number of fruits eaten
+        steps (int): The number of steps played
+        eat_self (bool): Has the snake died by biting itself
+        eat_gate (bool): Has the snake died by stumbling on the gate
+        is_running (bool): Is the snake still alive
+    """
+    seed: int
+    board_size: Tuple[int, int]
+    rng: Random
+    free_cells: FreeCellIndex
+    snake: Snake
+    fruit: Optional[Block]
+    gate: Optional[List[Block]]
+    gate_open: bool
+    direction: str
+    food_count: int
+    speed_level: int
+    score: int
+    steps: int
+    eat_self: bool
+    eat_gate: bool
+    is_running: bool
+
+class GameState(object):
+    """
+    The state of one game of snake, and the transition from one tick of the game to the next.
+
+    Everything a game needs is kept in the object, so any number of games can run in the same process.
+    The game does not draw anything, but after every step it tells what has changed (the tail left
+    behind, the fruit eaten, the gate opened or passed) so that a display can update only those parts.
+
+    All the random choices of a game (the snake, fruit and gate positions) come from its own random number
+    generator, so a game is entirely decided by its seed and the directions it is given.
+
+    The game is played on a grid of cells whose size is chosen when the game is created, and every position
+    is a (column, row) cell of it: mapping the cells to pixels is left to whatever draws the game. A step
+    only touches the cells of the head, the tail, the fruit and the gate, and the empty cells are indexed
+    sparsely (see FreeCellIndex), so neither a step nor a reset costs more on a bigger board.
+
+    snapshot() and restore() save and put back the state of a game in memory, for bots searching the moves
+    ahead. Both only keep references: the game shares its snake, its free cells and its random number
+    generator with its snapshots, and copies them the first time it changes them again. Playing on from a
+    snapshot thus costs one copy of the containers of the snake, whose blocks are shared, so it grows with
+    the length of the snake. The free cells are branched instead (see FreeCellIndex.branch) and only
+    copied, with the cells the snake has blocked and freed since, when a fruit is placed or after about
+    length / 2 steps. Placing a fruit also copies the random number generator.
+
+    Attributes:
+        seed (int): The seed the current game was started with
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board
+        rng (Random): The random number generator of the game
+        free_cells (FreeCellIndex): The empty cells of the board where the fruit can be placed
+        snake (Snake): The snake of the game
+        fruit (Block): The fruit, or None if there is no empty cell left
+        gate (List[Block]): The gate, or None if the gate is closed
+        gate_open (bool): Is the gate open
+        direction (str): The direction the snake is moving in (UP | DOWN | LEFT | RIGHT)
+        food_count (int): Keeps track of the number of fruits eaten in the current level. When it reaches
+                          LEVEL_UP it goes back to 1 and the gate opens
+        speed_level (int): The number of gates the snake has gone through
+        score (int): The number of fruits eaten
+        steps (int): The number of steps played
+        eat_self (bool): Has the snake died by biting itself
+        eat_gate (bool): Has the snake died by stumbling on the gate
+        is_running (bool): Is the snake still alive
+
+        tail (Block): The tail left behind by the last step
+        ate_fruit (bool): Has the snake eaten a fruit in the last step
+        opened_gate (bool): Has the gate opened in the last step
+        old_snake (Snake): The snake that has gone through the gate in the last step, or None
+        old_gate (List[Block]): The gate the snake has gone through in the last step, or None
+        changed_cells (List[Tuple[int, int]]): The cells whose content may have changed in the last step, or
+                                               None after a reset, when the whole board has changed
+
+        _shared (bool): Are the snake and the free cells shared with a snapshot
+        _shared_rng (bool): Is the random number generator shared with a snapshot
+
+    Constants:
+        HEADER: The layout of the start of the binary form of a state (see to_bytes)
+        MAX_BOARD_SIZE: The largest number of columns or rows of a board, as the cells are saved on 16 bits
+    """
+    # seed, steps, score, speed_level, food_count, direction, flags, fruit cell, gate cell, snake length
+    HEADER = struct.Struct("<QIIIIBBhhhhI")
+    MAX_BOARD_SIZE = 32767
+    _RNG_STATE = struct.Struct("<625IBd")
+    _COUNT = struct.Struct("<I")
+    _PAIR = struct.Struct("<II")
+    _FLAGS = ("gate_open", "is_running", "eat_self", "eat_gate")
+    _shared = False
+    _shared_rng = False
+
+    def __init__(self, seed: Optional[int] = None, board_size: Tuple[int, int] = BOARD_SIZE):
+        """
+        Create a new game, with a snake moving right and a fruit.
+
+        Args:
+            seed (int): The seed of the game, or None for a random seed
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board, at least 3x3 for the gate
+                                          and at most 32767 each way
+        """
+        if not (3 <= board_size[0] <= GameState.MAX_BOARD_SIZE and 3 <= board_size[1] <= GameState.MAX_BOARD_SIZE):
+            raise ValueError("A board must have from 3 to {} columns and rows, got {}x{}".format(
+                GameState.MAX_BOARD_SIZE, *board_size))
+
+        self.board_size = (board_size[0], board_size[1])
+        self.rng = Random(seed)
+        self.reset(seed)
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        """
+        Resets the game to the initial state
+
+        Args:
+            seed (int): The seed of the new game, or None to draw it from the random number generator of the game
+
+        Returns:
+            None
+        """
+        rng = self._own_rng()
+        if seed is None:
+            seed = rng.getrandbits(64)
+        self.seed = seed
+        rng.seed(seed)
+        self._shared = False
+
+        self.free_cells = create_free_cells(self.board_size)
+        self.snake = self._create_snake(Snake.MIN_LENGTH)
+        self.fruit = self._create_fruit()
+        self.gate = None
+        self.gate_open = False
+        self.direction = RIGHT  # Always start the game with a moving right snake
+        self.food_count = 1
+        self.speed_level = 0
+        self.score = 0
+        self.steps = 0
+        self.eat_self = False
+        self.eat_gate = False
+        self.is_running = True
+        self._clear_changes()
+        self.changed_cells = None
+
+    def turn(self, direction: str) -> None:
+        """
+        Turns the snake to the given direction, unless it is the opposite of the current direction
+
+        Args:
+            direction (str): The new direction (UP | DOWN | LEFT | RIGHT)
+
+        Returns:
+            None
+        """
+        if direction != OPPOSITE_DIRECTIONS[self.direction]:
+            self.direction = direction
+
+    def step(self, direction: Optional[str] = None) -> bool:
+        """
+        Plays one tick of the game: the snake turns, eats the fruit, opens or goes through the gate,
+        moves one block forward and finally dies if it has bitten itself or stumbled on the gate
+
+        Args:
+            direction (str): The direction to turn to before moving, or None to keep going straight
+
+        Returns:
+            True if the snake is still alive after the step or False otherwise
+        """
+        if not self.is_running:
+            return False
+
+        if self._shared:
+            self._unshare()
+        self._clear_changes()
+        if direction is not None:
+            self.turn(direction)
+
+        # Check if eats fruit
+        if not self.gate_open and check_fruit_collision(self.fruit, self.snake):
+            self.changed_cells.append(self.snake.get_head().get_coordinate())
+            self.snake.eat_fruit(self.direction, self.fruit)
+            self.changed_cells.append(self.snake.get_head().get_coordinate())
+            self.fruit = self._create_fruit()
+            self._add_changes([self.fruit])
+            self.food_count += 1
+            self.score += 1
+            self.ate_fruit = True
+
+        # Check for level up
+        if self.food_count % LEVEL_UP == 0:
+            self._open_gate()
+
+        # If the snake passed the gate, make it go throught the gate
+        # and after going through it, remove the gate and place the snake
+        # at a new random position with the same length
+        if self.gate_open and passed_gate(self.snake, self.gate):
+            self._go_through_gate()
+
+        self.changed_cells.append(self.snake.get_head().get_coordinate())
+        self.tail = advance_snake(self.direction, self.snake, self.board_size)
+        self.changed_cells.append(self.tail.get_coordinate())
+        self.changed_cells.append(self.snake.get_head().get_coordinate())
+        self.steps += 1
+
+        # Has the snake eaten itself?
+        if check_eat_self(self.snake):
+            self.is_running = False
+            self.eat_self = True
+
+        # Has the snake stumbled on the wall of the gate
+        if self.gate_open and check_gate_collision(self.snake, self.gate):
+            self.is_running = False
+            self.eat_gate = True
+
+        return self.is_running
+
+    def get_death_cause(self) -> Optional[str]:
+        """
+        Tells why the snake has died
+
+        Args:
+            None
+
+        Returns:
+            "eat_self" or "eat_gate", or None if the snake is still alive
+        """
+        if self.eat_self:
+            return DEATH_CAUSES[1]
+        if self.eat_gate:
+            return DEATH_CAUSES[2]
+        return None
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the binary form of the state of the game: everything from_bytes() needs to carry on playing
+        exactly like this game, the state of the random number generator and the order of the free cells
+        included. The changes of the last step are not kept, nor is the size of the board, which must be
+        given back to from_bytes()
+
+        Args:
+            None
+
+        Returns:
+            The binary form of the state
+        """
+        if not 0 <= self.seed < 1 << 64:
+            raise ValueError("Only the games with a 64 bits seed can be saved, got {}".format(self.seed))
+
+        flags = sum(1 << bit for bit, name in enumerate(GameState._FLAGS) if getattr(self, name))
+        fruit = self.fruit.get_coordinate() if self.fruit is not None else (-1, -1)
+        gate = self.gate[0].get_coordinate() if self.gate is not None else (-1, -1)
+        body = self.snake.get_body()
+        parts = [GameState.HEADER.pack(self.seed, self.steps, self.score, self.speed_level, self.food_count,
+                                       DIRECTIONS.index(self.direction), flags, *fruit, *gate, len(body))]
+        parts.append(struct.pack("<{}h".format(2 * len(body)),
+                                 *(value for block in body for value in block.get_coordinate())))
+
+        _, internal, gauss = self.rng.getstate()
+        parts.append(GameState._RNG_STATE.pack(*internal, gauss is not None, gauss or 0.0))
+
+        free, cells, blockers = self.free_cells.get_state()
+        parts.append(GameState._COUNT.pack(free))
+        for pairs in (cells, blockers):
+            parts.append(GameState._COUNT.pack(len(pairs)))
+            parts.extend(GameState._PAIR.pack(*pair) for pair in pairs.items())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, board_size: Tuple[int, int] = BOARD_SIZE) -> 'GameState':
+        """
+        Rebuilds a game from the binary form of its state
+
+        Args:
+            data (bytes): The binary form returned by to_bytes()
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board of the saved game
+
+        Returns:
+            The GameState, which plays on exactly like the game it was saved from
+        """
+        (seed, steps, score, speed_level, food_count, direction, flags,
+         fruit_x, fruit_y, gate_x, gate_y, length) = GameState.HEADER.unpack_from(data)
+        offset = GameState.HEADER.size
+        cells = struct.unpack_from("<{}h".format(2 * length), data, offset)
+        offset += 4 * length
+        *internal, has_gauss, gauss = GameState._RNG_STATE.unpack_from(data, offset)
+        offset += GameState._RNG_STATE.size
+        free, = GameState._COUNT.unpack_from(data, offset)
+        offset += GameState._COUNT.size
+        pairs = []
+        for _ in range(2):
+            count, = GameState._COUNT.unpack_from(data, offset)
+            offset += GameState._COUNT.size
+            pairs.append(dict(GameState._PAIR.iter_unpack(data[offset:offset + count * GameState._PAIR.size])))
+            offset += count * GameState._PAIR.size
+
+        game = cls.__new__(cls)
+        game.seed = seed
+        game.board_size = (board_size[0], board_size[1])
+        game.rng = Random()
+        game.rng.setstate((3, tuple(internal), gauss if has_gauss else None))
+        game.free_cells = create_free_cells(game.board_size)
+        game.snake = Snake.from_coordinates([(cells[i], cells[i + 1]) for i in range(0, len(cells), 2)], game.free_cells)
+        game.fruit = create_fruit((fruit_x, fruit_y)) if fruit_x >= 0 else None
+        game.gate = create_gate_at((gate_x, gate_y)) if gate_x >= 0 else None
+        # The snake has blocked its cells again, but the order of the free cells must be the saved one
+        game.free_cells.set_state((free, pairs[0], pairs[1]))
+        for bit, name in enumerate(GameState._FLAGS):
+            setattr(game, name, bool(flags >> bit & 1))
+        game.direction = DIRECTIONS[direction]
+        game.food_count = food_count
+        game.speed_level = speed_level
+        game.score = score
+        game.steps = steps
+        game._clear_changes()
+        game.changed_cells = None
+        return game
+
+    def snapshot(self) -> GameSnapshot:
+        """
+        Saves the state of the game, to be put back later by restore(). Nothing is copied, the game copies what
+        it shares with the snapshot the next time it changes it
+
+        Args:
+            None
+
+        Returns:
+            The snapshot of the game
+        """
+        self._shared = True
+        self._shared_rng = True
+        return GameSnapshot(self.seed, self.board_size, self.rng, self.free_cells, self.snake, self.fruit,
+                            self.gate, self.gate_open, self.direction, self.food_count, self.speed_level,
+                            self.score, self.steps, self.eat_self, self.eat_gate, self.is_running)
+
+    def restore(self, snapshot: GameSnapshot) -> None:
+        """
+        Puts the game back in the state of a snapshot, which can be restored again any number of times. The
+        game then plays on exactly like the game the snapshot was taken from, and the whole board is reported
+        as changed
+
+        Args:
+            snapshot (GameSnapshot): The snapshot returned by snapshot()
+
+        Returns:
+            None
+        """
+        (self.seed, self.board_size, self.rng, self.free_cells, self.snake, self.fruit, self.gate,
+         self.gate_open, self.direction, self.food_count, self.speed_level, self.score, self.steps,
+         self.eat_self, self.eat_gate, self.is_running) = snapshot
+        self._shared = True
+        self._shared_rng = True
+        self._clear_changes()
+        self.changed_cells = None
+
+    def _unshare(self) -> None:
+        """
+        Copies the snake shared with a snapshot and branches the free cells, before a step changes them
+        """
+        self.free_cells = self.free_cells.branch()
+        self.snake = self.snake.copy(self.free_cells)
+        self._shared = False
+
+    def _own_rng(self) -> Random:
+        """
+        Returns the random number generator of the game, copied first if it is shared with a snapshot
+        """
+        if self._shared_rng:
+            # Random() would seed the new generator from the system first, only to overwrite the state
+            rng = Random.__new__(Random)
+            rng.setstate(self.rng.getstate())
+            self.rng = rng
+            self._shared_rng = False
+        return self.rng
+
+    def _open_gate(self) -> None:
+        """
+        Opens a gate at a random position, the snake needs to go through it to get to the next level
+        """
+        self.gate_open = True
+        self.food_count = 1
+        self.gate = self._create_gate()
+        self.opened_gate = True
+        for block in self.gate:
+            self.free_cells.block(block.get_coordinate())
+        # The fruit is hidden while the gate is open
+        self._add_changes(self.gate + [self.fruit])
+
+    def _go_through_gate(self) -> None:
+        """
+        Moves the snake to the next level: the gate is removed and a snake of the same length
+        takes the place of the old one at a random position
+        """
+        self.old_snake = self.snake
+        self.old_gate = self.gate
+        self.old_snake.leave_board()
+        for block in self.gate:
+            self.free_cells.unblock(block.get_coordinate())
+
+        self.gate = None
+        self.gate_open = False
+        self.snake = self._create_snake(self.old_snake.get_length())
+        self.speed_level += 1
+        self._add_changes(self.old_snake.get_body())
+        self._add_changes(self.old_gate + [self.fruit])
+        self._add_changes(self.snake.get_body())
+
+    def _add_changes(self, blocks: Iterable[Optional[Block]]) -> None:
+        """
+        Records that the cells of the given blocks have changed in the current step, skipping the missing ones
+        """
+        self.changed_cells.extend(block.get_coordinate() for block in blocks if block is not None)
+
+    def _create_snake(self, length: int) -> Snake:
+        """
+        Creates a snake of the given length at a random position of the board
+        """
+        return Snake(self.board_size[0], self.board_size[1], length, self.free_cells, self._own_rng())
+
+    def _create_fruit(self) -> Optional[Block]:
+        """
+        Creates a fruit at a random empty cell of the board, or returns None if the board is full
+        """
+        return generate_fruit(self.free_cells, self._own_rng())
+
+    def _create_gate(self) -> List[Block]:
+        """
+        Creates a gate at a random position of the board
+        """
+        return create_gate(self._own_rng(), self.board_size)
+
+    def _clear_changes(self) -> None:
+        """
+        Forgets what has changed in the last step
+        """
+        self.tail = None
+        self.ate_fruit = False
+        self.opened_gate = False
+        self.old_snake = None
+        self.old_gate = None
+        self.changed_cells = []
@@ -0,0 +1,57 @@
+from Snake import Snake
+from typing import *
+import pygame
+
+class GateAnimation(object):
+    """
+    The snake going through the gate to the next level, drawn as its tail disappearing one block at a time.
+
+    The animation does not wait by itself: the main loop calls step() once per tick, so the events are still
+    handled and the ticks keep their pace while it plays. A step erases one block, whatever the length of the
+    snake, the rest of the snake being already on the screen. The block is erased by the renderer of the game,
+    which knows where and how big the cells are drawn (see BoardRenderer and GridRenderer).
+
+    Attributes:
+        snake (Snake): The snake going through the gate, which has left the board
+        renderer (Union[BoardRenderer, GridRenderer]): The renderer the snake is drawn by
+    """
+    def __init__(self, snake: Snake, renderer: Any):
+        """
+        Create the animation of a snake going through the gate
+
+        Args:
+            snake (Snake): The snake going through the gate, as it is on the screen
+            renderer (Union[BoardRenderer, GridRenderer]): The renderer the snake is drawn by
+        """
+        self.snake = snake
+        self.renderer = renderer
+
+    def is_finished(self) -> bool:
+        """
+        Checks if the whole snake has gone through the gate
+
+        Args:
+            None
+
+        Returns:
+            True if no block of the snake is left or False otherwise
+        """
+        return self.snake.get_length() == 0
+
+    def step(self) -> List[pygame.Rect]:
+        """
+        Removes the tail of the snake and draws its cell again, which is erased unless another block of the snake
+        lies there
+
+        Args:
+            None
+
+        Returns:
+            The areas drawn, for updating purpose
+        """
+        if self.is_finished():
+            return []
+
+        tail = self.snake.remove_tail()
+        self.renderer.add_cells([tail.get_coordinate()])
+        return self.renderer.flush(self.snake)
@@ -0,0 +1,209 @@
+from GameState import GameState
+from Snake import Snake
+from typing import *
+from snake_rules import BACKGROUND_COLOR, FRUIT_COLOR, GATE_COLOR
+import pygame
+
+class GridRenderer(object):
+    """
+    Draws a GameState with one pixel per cell of the board, then scales the picture to the screen in one call.
+
+    The board is kept in a surface of one pixel per cell, of the size of GameState.board_size (50x35 for the
+    classic board). After every step of the game, add_changes() collects the cells the step has changed (see
+    GameState.changed_cells) and flush() writes the pixels of those cells, with the same priorities as
+    BoardRenderer, then scales the whole surface to the screen with pygame.transform.scale. The work of a frame
+    is a few pixel writes and one scale of the size of the screen, however many cells the board has and
+    however long the snake is. A reset writes the pixels of the whole board at once through a pygame.PixelArray.
+
+    A board with more columns or rows than the screen has pixels is reduced to the size of the screen instead,
+    a pixel then covering several cells, so the surface never takes more memory than the screen. A pixel shows
+    the gate if it covers a cell of the gate, else the fruit if it covers the fruit, else the snake if it
+    covers any cell of the snake, so that nothing disappears when the board is reduced. The cells of the snake
+    covered by every pixel are counted as the snake moves, which keeps a frame as cheap as without reduction.
+
+    It has the same methods as BoardRenderer, so the main loop can draw with either of them.
+
+    Attributes:
+        game (GameState): The game drawn
+        screen (pygame.Surface): The surface the board is scaled to
+        board (pygame.Surface): The surface of the board, with one pixel per cell or per group of cells
+        blits (int): The number of pixels written by the last flush
+        _columns (int): The number of columns of the board
+        _rows (int): The number of rows of the board
+        _cells (Set[Tuple[int, int]]): The (column, row) of the cells drawn as snake
+        _counts (Dict[Tuple[int, int], int]): The number of cells drawn as snake covered by every pixel, if any
+        _dirty (Set[Tuple[int, int]]): The (column, row) of the cells to write again
+        _full (bool): Must the whole board be written again
+        _scale (bool): Must the board be scaled to the screen again, even if no cell has changed
+    """
+    def __init__(self, game: GameState, screen: pygame.Surface):
+        """
+        Create a renderer, whose first flush writes the whole board
+
+        Args:
+            game (GameState): The game to draw
+            screen (pygame.Surface): The surface to scale the board to
+        """
+        self.game = game
+        self.screen = screen
+        self._columns, self._rows = game.board_size
+        width, height = screen.get_size()
+        self.board = pygame.Surface((min(self._columns, width), min(self._rows, height)), depth=32)
+        self.blits = 0
+        self._cells = set()
+        self._counts = {}
+        self._dirty = set()
+        self._full = True
+        self._scale = False
+
+    def add_changes(self) -> None:
+        """
+        Collects the cells changed by the last step of the game, or the whole board after a reset
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.game.changed_cells is None:
+            self._full = True
+        else:
+            self._dirty.update(self.game.changed_cells)
+
+    def add_cells(self, coordinates: Iterable[Tuple[int, int]]) -> None:
+        """
+        Collects cells to write again, whose content has changed outside of a step of the game
+
+        Args:
+            coordinates (Iterable[Tuple[int, int]]): The (column, row) of the cells
+
+        Returns:
+            None
+        """
+        self._dirty.update(coordinates)
+
+    def add_area(self, area: pygame.Rect) -> None:
+        """
+        Makes the next flush draw the screen again, to cover what something else has drawn over an area of it.
+        The whole screen is scaled from the board at once, so the area itself does not matter
+
+        Args:
+            area (pygame.Rect): The area of the screen
+
+        Returns:
+            None
+        """
+        self._scale = True
+
+    def flush(self, snake: Optional[Snake] = None) -> List[pygame.Rect]:
+        """
+        Writes the cells collected since the last flush and scales the board to the screen
+
+        Args:
+            snake (Snake): The snake to draw instead of the one of the game, or None (see BoardRenderer.flush)
+
+        Returns:
+            The area of the screen drawn, for updating purpose, empty if nothing has changed
+        """
+        if self._full:
+            self._full = False
+            self._dirty.clear()
+            self._write_all()
+        elif self._dirty:
+            self._write_cells(snake if snake is not None else self.game.snake)
+        elif self._scale:
+            self.blits = 0
+        else:
+            self.blits = 0
+            return []
+
+        self._scale = False
+        return [pygame.transform.scale(self.board, self.screen.get_size(), self.screen).get_rect()]
+
+    def _to_pixel(self, coordinate: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        Returns the pixel of the board surface covering the given cell
+        """
+        return (coordinate[0] * self.board.get_width() // self._columns,
+                coordinate[1] * self.board.get_height() // self._rows)
+
+    def _color(self, pixel: Tuple[int, int], gate: Set[Tuple[int, int]],
+               fruit: Optional[Tuple[int, int]]) -> Tuple[int, int, int]:
+        """
+        Returns the color of a pixel from what the cells it covers hold
+        """
+        if pixel in gate:
+            return GATE_COLOR
+        if pixel == fruit:
+            return FRUIT_COLOR
+        if pixel in self._counts:
+            return Snake.SNAKE_COLOR
+        return BACKGROUND_COLOR
+
+    def _get_gate_and_fruit(self) -> Tuple[Set[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        Returns the pixels covering the gate, and the pixel covering the fruit or None if it is not shown
+        """
+        game = self.game
+        gate = set()
+        if game.gate_open:
+            gate = {self._to_pixel(block.get_coordinate()) for block in game.gate}
+        fruit = None
+        if game.fruit is not None and not game.gate_open:
+            fruit = self._to_pixel(game.fruit.get_coordinate())
+        return gate, fruit
+
+    def _write_cells(self, snake: Snake) -> None:
+        """
+        Writes the pixels of the collected cells, counting the cells of the snake they cover again
+        """
+        pixels = set()
+        for coordinate in self._dirty:
+            # A snake eating next to the edge can grow one block past it
+            if not (coordinate[0] < self._columns and coordinate[1] < self._rows):
+                continue
+
+            pixel = self._to_pixel(coordinate)
+            occupied = snake.occupies(coordinate)
+            if occupied and coordinate not in self._cells:
+                self._cells.add(coordinate)
+                self._counts[pixel] = self._counts.get(pixel, 0) + 1
+            elif not occupied and coordinate in self._cells:
+                self._cells.remove(coordinate)
+                count = self._counts[pixel] - 1
+                if count:
+                    self._counts[pixel] = count
+                else:
+                    del self._counts[pixel]
+            pixels.add(pixel)
+
+        gate, fruit = self._get_gate_and_fruit()
+        for pixel in pixels:
+            self.board.set_at(pixel, self._color(pixel, gate, fruit))
+
+        self._dirty.clear()
+        self.blits = len(pixels)
+
+    def _write_all(self) -> None:
+        """
+        Writes the pixels of the whole board at once
+        """
+        coordinates = (block.get_coordinate() for block in self.game.snake.get_body())
+        self._cells = {coordinate for coordinate in coordinates
+                       if coordinate[0] < self._columns and coordinate[1] < self._rows}
+        self._counts = {}
+        for coordinate in self._cells:
+            pixel = self._to_pixel(coordinate)
+            self._counts[pixel] = self._counts.get(pixel, 0) + 1
+
+        gate, fruit = self._get_gate_and_fruit()
+        pixels = set(self._counts) | gate
+        if fruit is not None:
+            pixels.add(fruit)
+
+        self.board.fill(BACKGROUND_COLOR)
+        with pygame.PixelArray(self.board) as array:
+            for pixel in pixels:
+                array[pixel] = self._color(pixel, gate, fruit)
+        self.blits = len(pixels)
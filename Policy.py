@@ -0,0 +1,99 @@
+from GameState import GameState
+from random import Random
+from typing import *
+from snake_rules import DIRECTIONS, UP, DOWN, LEFT, RIGHT, OPPOSITE_DIRECTIONS
+
+class Policy(object):
+    """
+    An agent playing a GameState: it is told about every new game with reset() and chooses the direction
+    of every step with act().
+
+    Policies are sent to worker processes by the self-play runner, so they must be picklable: define them
+    at the top level of a module and keep their state in plain attributes.
+    """
+    def get_name(self) -> str:
+        """
+        Returns the name of the policy, used to tell the results of different policies apart
+        """
+        return type(self).__name__
+
+    def reset(self, seed: int) -> None:
+        """
+        Gets the policy ready for a new game
+
+        Args:
+            seed (int): The seed of the game, from which a policy can seed its own random choices
+
+        Returns:
+            None
+        """
+        pass
+
+    def act(self, game: GameState) -> Optional[str]:
+        """
+        Chooses the direction of the next step
+
+        Args:
+            game (GameState): The game being played
+
+        Returns:
+            The direction to turn to (UP | DOWN | LEFT | RIGHT), or None to keep going straight
+        """
+        raise NotImplementedError
+
+class RandomPolicy(Policy):
+    """
+    Turns to a random direction at every step
+    """
+    def __init__(self):
+        self._rng = Random()
+
+    def reset(self, seed: int) -> None:
+        self._rng.seed(seed)
+
+    def act(self, game: GameState) -> Optional[str]:
+        return self._rng.choice(DIRECTIONS)
+
+class GreedyPolicy(Policy):
+    """
+    Heads straight for the fruit, or for the entrance of the gate when it is open, avoiding the body of the
+    snake and the walls of the gate when it can. Ties between equally good directions are broken at random.
+    """
+    _MOVES = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)}
+
+    def __init__(self):
+        self._rng = Random()
+
+    def reset(self, seed: int) -> None:
+        self._rng.seed(seed)
+
+    def act(self, game: GameState) -> Optional[str]:
+        columns, rows = game.board_size
+        head_x, head_y = game.snake.get_head().get_coordinate()
+        walls = set()
+        if game.gate_open:
+            walls = {block.get_coordinate() for block in game.gate}
+            gate_x, gate_y = game.gate[0].get_coordinate()
+            # The gate can only be entered from the cell under its entrance, going up
+            below = (gate_x + 1, gate_y + 2)
+            target = (gate_x + 1, gate_y + 1) if (head_x, head_y) == below else below
+        elif game.fruit is not None:
+            target = game.fruit.get_coordinate()
+        else:
+            return None
+
+        tail = game.snake.get_body()[-1].get_coordinate()
+        choices = [direction for direction in DIRECTIONS if direction != OPPOSITE_DIRECTIONS[game.direction]]
+        self._rng.shuffle(choices)
+        best, best_distance = None, None
+        for direction in choices:
+            dx, dy = GreedyPolicy._MOVES[direction]
+            cell = ((head_x + dx) % columns, (head_y + dy) % rows)
+            # The tail moves out of the way in the same step
+            if cell in walls or (game.snake.occupies(cell) and cell != tail):
+                continue
+            distance = abs(cell[0] - target[0]) + abs(cell[1] - target[1])
+            if best_distance is None or distance < best_distance:
+                best, best_distance = direction, distance
+
+        return best
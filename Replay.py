@@ -0,0 +1,434 @@
+from GameState import GameState
+from typing import *
+from snake_rules import BOARD_SIZE, DIRECTIONS, DEATH_CAUSES
+import bisect
+import struct
+import zlib
+
+class ReplayError(ValueError):
+    """
+    Raised when the bytes of a replay cannot be read
+    """
+    pass
+
+class Replay(object):
+    """
+    A recording of one game: the seed of the game and the direction of the snake at every tick.
+
+    Since a game is entirely decided by its seed and its directions, that is enough to play the game again
+    and rebuild any of its frames with simulate(). A replay also keeps what the game it was recorded from
+    claimed to reach (the score, the level and the cause of death), so that the claims can be checked.
+
+    The directions are packed four ticks to a byte (two bits each, numbered like snake_rules.DIRECTIONS),
+    so a ten minutes game at the fastest speed takes a few KB.
+
+    A replay can also hold snapshots of the state of the game at some ticks (see GameState.to_bytes), so
+    that a frame can be rebuilt by playing on from the last snapshot before it instead of from the start.
+
+    The binary format is:
+
+        header: magic (4s), version (B), death cause (B, index in DEATH_CAUSES), flags (H),
+                seed (Q), ticks (I), score (I), speed level (I), columns (H), rows (H), all little-endian
+        body: ceil(ticks / 4) bytes of directions, the first tick in the lowest bits of the first byte
+        snapshots, if flags has FLAG_SNAPSHOTS: count (I), then for each snapshot its tick (I), its size (I)
+                and the zlib compressed state of the game
+
+    Version 1 had no columns and rows, its games were all played on the board of snake_rules.BOARD_SIZE.
+
+    Constants:
+        MAGIC: The bytes every replay starts with
+        VERSION: The version of the format
+        HEADER: The layout of the header
+        FLAG_SNAPSHOTS: The flag telling that the replay holds snapshots
+
+    Attributes:
+        seed (int): The seed of the game
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board of the game
+        ticks (int): The number of steps recorded
+        moves (bytearray): The packed directions
+        score (int): The score claimed by the game
+        speed_level (int): The level claimed by the game
+        death_cause (str): The cause of death claimed by the game, or None if the game was not over
+        snapshots (Dict[int, bytes]): The compressed snapshots by tick
+    """
+    MAGIC = b"SNKR"
+    VERSION = 2
+    HEADER = struct.Struct("<4sBBHQIIIHH")
+    FLAG_SNAPSHOTS = 1
+
+    _HEADER_V1 = struct.Struct("<4sBBHQIII")
+    _SNAPSHOT_HEADER = struct.Struct("<II")
+
+    def __init__(self, seed: int, directions: Iterable[str] = (), score: int = 0, speed_level: int = 0,
+                 death_cause: Optional[str] = None, board_size: Tuple[int, int] = BOARD_SIZE):
+        """
+        Create a replay
+
+        Args:
+            seed (int): The seed of the game, between 0 and 2 ** 64 - 1
+            directions (Iterable[str]): The direction of the snake after each step (UP | DOWN | LEFT | RIGHT)
+            score (int): The score reached by the game
+            speed_level (int): The level reached by the game
+            death_cause (str): The cause of death ("eat_self" or "eat_gate"), or None if the game was not over
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board of the game
+        """
+        if not 0 <= seed < 1 << 64:
+            raise ValueError("The seed of a replay must fit in 64 bits, got {}".format(seed))
+        if not Replay.is_valid_board_size(board_size):
+            raise ValueError("A board must have from 3 to {} columns and rows, got {}x{}".format(
+                GameState.MAX_BOARD_SIZE, *board_size))
+
+        self._seed = seed
+        self._board_size = (board_size[0], board_size[1])
+        self._ticks = 0
+        self._moves = bytearray()
+        self._snapshots = {}
+        self._snapshot_ticks = []
+        for direction in directions:
+            self.append(direction)
+        self.set_result(score, speed_level, death_cause)
+
+    @staticmethod
+    def is_valid_board_size(board_size: Tuple[int, int]) -> bool:
+        """
+        Tells whether a game can be played on a board of the given size (see GameState)
+
+        Args:
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board
+
+        Returns:
+            True if the board has from 3 to GameState.MAX_BOARD_SIZE columns and rows
+        """
+        return (3 <= board_size[0] <= GameState.MAX_BOARD_SIZE and 3 <= board_size[1] <= GameState.MAX_BOARD_SIZE)
+
+    def get_seed(self) -> int:
+        """
+        Returns the seed of the game
+        """
+        return self._seed
+
+    def get_board_size(self) -> Tuple[int, int]:
+        """
+        Returns the number of (columns, rows) of the board of the game
+        """
+        return self._board_size
+
+    def get_ticks(self) -> int:
+        """
+        Returns the number of steps recorded
+        """
+        return self._ticks
+
+    def get_score(self) -> int:
+        """
+        Returns the score claimed by the game
+        """
+        return self._score
+
+    def get_speed_level(self) -> int:
+        """
+        Returns the level claimed by the game
+        """
+        return self._speed_level
+
+    def get_death_cause(self) -> Optional[str]:
+        """
+        Returns the cause of death claimed by the game, or None if the game was not over
+        """
+        return self._death_cause
+
+    def get_direction(self, tick: int) -> str:
+        """
+        Returns the direction of the snake after the given step
+
+        Args:
+            tick (int): The index of the step, from 0
+
+        Returns:
+            The direction (UP | DOWN | LEFT | RIGHT)
+        """
+        if not 0 <= tick < self._ticks:
+            raise IndexError("tick {} out of range for a replay of {} ticks".format(tick, self._ticks))
+        return DIRECTIONS[self._moves[tick >> 2] >> ((tick & 3) << 1) & 3]
+
+    def get_directions(self) -> Iterator[str]:
+        """
+        Returns the directions of all the steps in order
+        """
+        for tick in range(self._ticks):
+            yield DIRECTIONS[self._moves[tick >> 2] >> ((tick & 3) << 1) & 3]
+
+    def append(self, direction: str) -> None:
+        """
+        Records the direction of the snake after one more step
+
+        Args:
+            direction (str): The direction (UP | DOWN | LEFT | RIGHT)
+
+        Returns:
+            None
+        """
+        shift = (self._ticks & 3) << 1
+        if shift == 0:
+            self._moves.append(0)
+        self._moves[-1] |= DIRECTIONS.index(direction) << shift
+        self._ticks += 1
+
+    def set_result(self, score: int, speed_level: int, death_cause: Optional[str]) -> None:
+        """
+        Sets what the game claims to have reached
+
+        Args:
+            score (int): The score reached by the game
+            speed_level (int): The level reached by the game
+            death_cause (str): The cause of death ("eat_self" or "eat_gate"), or None if the game was not over
+
+        Returns:
+            None
+        """
+        if death_cause not in DEATH_CAUSES:
+            raise ValueError("Unknown death cause {!r}, expected one of {}".format(death_cause, DEATH_CAUSES))
+        self._score = score
+        self._speed_level = speed_level
+        self._death_cause = death_cause
+
+    def add_snapshot(self, game: GameState) -> None:
+        """
+        Keeps a snapshot of the game being recorded, at its current tick
+
+        Args:
+            game (GameState): The game, which must have played the steps recorded so far and no more
+
+        Returns:
+            None
+        """
+        if game.steps != self._ticks:
+            raise ValueError("A snapshot must be taken at the last tick recorded ({}), not {}".format(self._ticks, game.steps))
+        if game.steps not in self._snapshots:
+            bisect.insort(self._snapshot_ticks, game.steps)
+        self._snapshots[game.steps] = zlib.compress(game.to_bytes())
+
+    def get_snapshot_ticks(self) -> List[int]:
+        """
+        Returns the ticks of the snapshots, in increasing order
+        """
+        return self._snapshot_ticks
+
+    def get_snapshot(self, tick: int) -> GameState:
+        """
+        Rebuilds the game from the snapshot taken at the given tick
+
+        Args:
+            tick (int): The tick of the snapshot
+
+        Returns:
+            The GameState at that tick
+        """
+        return GameState.from_bytes(zlib.decompress(self._snapshots[tick]), self._board_size)
+
+    def get_nearest_snapshot(self, tick: int) -> Optional[int]:
+        """
+        Returns the tick of the last snapshot at or before the given tick, or None if there is none
+        """
+        index = bisect.bisect_right(self._snapshot_ticks, tick)
+        return self._snapshot_ticks[index - 1] if index > 0 else None
+
+    def simulate(self, tick: Optional[int] = None) -> GameState:
+        """
+        Plays the game again up to the given tick, from the last snapshot before it or from the seed
+
+        Args:
+            tick (int): The number of steps to play, or None to play the whole replay
+
+        Returns:
+            The GameState after the given number of steps
+        """
+        ticks = self._ticks if tick is None else tick
+        if not 0 <= ticks <= self._ticks:
+            raise IndexError("tick {} out of range for a replay of {} ticks".format(tick, self._ticks))
+
+        start = self.get_nearest_snapshot(ticks)
+        game = self.get_snapshot(start) if start is not None else GameState(self._seed, self._board_size)
+        self.play(game, ticks)
+        return game
+
+    def play(self, game: GameState, tick: int) -> None:
+        """
+        Plays the recorded directions on the given game from its current tick up to the given tick, or until the
+        snake dies. The snake is set moving in the recorded direction of every tick, even if it reverses it
+
+        Args:
+            game (GameState): A game of this replay, at or before the given tick
+            tick (int): The tick to stop at
+
+        Returns:
+            None
+        """
+        moves = self._moves
+        for step in range(game.steps, tick):
+            if not game.is_running:
+                break
+            # The recorded direction is the one the snake moved in, so it is set as it is rather than through
+            # turn(): the live game can turn several times in a tick, and two turns can reverse the snake
+            game.direction = DIRECTIONS[moves[step >> 2] >> ((step & 3) << 1) & 3]
+            game.step()
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the binary form of the replay
+        """
+        flags = Replay.FLAG_SNAPSHOTS if self._snapshots else 0
+        parts = [Replay.HEADER.pack(Replay.MAGIC, Replay.VERSION, DEATH_CAUSES.index(self._death_cause), flags,
+                                    self._seed, self._ticks, self._score, self._speed_level, *self._board_size),
+                 bytes(self._moves)]
+        if self._snapshots:
+            parts.append(struct.pack("<I", len(self._snapshots)))
+            for tick in self._snapshot_ticks:
+                snapshot = self._snapshots[tick]
+                parts.append(Replay._SNAPSHOT_HEADER.pack(tick, len(snapshot)))
+                parts.append(snapshot)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        """
+        Reads a replay from its binary form
+
+        Args:
+            data (bytes): The binary form of the replay
+
+        Returns:
+            The Replay
+        """
+        if len(data) < Replay._HEADER_V1.size:
+            raise ReplayError("Truncated replay header")
+        magic, version, death_cause, flags, seed, ticks, score, speed_level = Replay._HEADER_V1.unpack_from(data)
+        if magic != Replay.MAGIC:
+            raise ReplayError("Not a replay: bad magic {!r}".format(magic))
+        if version == 1:
+            header = Replay._HEADER_V1
+            board_size = BOARD_SIZE
+        elif version == Replay.VERSION:
+            header = Replay.HEADER
+            if len(data) < header.size:
+                raise ReplayError("Truncated replay header")
+            board_size = header.unpack_from(data)[-2:]
+        else:
+            raise ReplayError("Unsupported replay version {}".format(version))
+        if not Replay.is_valid_board_size(board_size):
+            raise ReplayError("Invalid board size {}x{}".format(*board_size))
+        if death_cause >= len(DEATH_CAUSES):
+            raise ReplayError("Unknown death cause {}".format(death_cause))
+
+        offset = header.size + (ticks + 3) // 4
+        moves = data[header.size:offset]
+        if len(moves) != (ticks + 3) // 4:
+            raise ReplayError("Truncated replay: {} ticks announced but {} bytes of moves".format(ticks, len(moves)))
+
+        replay = cls(seed, (), score, speed_level, DEATH_CAUSES[death_cause], board_size)
+        replay._moves = bytearray(moves)
+        replay._ticks = ticks
+        if flags & Replay.FLAG_SNAPSHOTS:
+            try:
+                count, = struct.unpack_from("<I", data, offset)
+                offset += 4
+                for _ in range(count):
+                    tick, size = Replay._SNAPSHOT_HEADER.unpack_from(data, offset)
+                    offset += Replay._SNAPSHOT_HEADER.size
+                    if offset + size > len(data) or tick > ticks:
+                        raise ReplayError("Truncated or invalid snapshot at tick {}".format(tick))
+                    replay._snapshots[tick] = bytes(data[offset:offset + size])
+                    offset += size
+            except struct.error as error:
+                raise ReplayError("Truncated snapshots: {}".format(error))
+            replay._snapshot_ticks = sorted(replay._snapshots)
+        return replay
+
+    def save(self, path: str) -> None:
+        """
+        Writes the replay to a file
+
+        Args:
+            path (str): The path of the file
+
+        Returns:
+            None
+        """
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        """
+        Reads a replay from a file
+
+        Args:
+            path (str): The path of the file
+
+        Returns:
+            The Replay
+        """
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+class ReplayRecorder(object):
+    """
+    Records the game being played: record() must be called after every step and start() after every reset.
+    A snapshot of the game is added to the replay every snapshot_every ticks
+
+    Constants:
+        SNAPSHOT_EVERY: The default number of ticks between two snapshots
+
+    Attributes:
+        game (GameState): The game being recorded
+        replay (Replay): The replay of the current game
+        snapshot_every (int): The number of ticks between two snapshots, or 0 for no snapshot
+    """
+    SNAPSHOT_EVERY = 4096
+
+    def __init__(self, game: GameState, snapshot_every: int = SNAPSHOT_EVERY):
+        """
+        Create a recorder and start recording the current game, which must not have been stepped yet
+
+        Args:
+            game (GameState): The game to record
+            snapshot_every (int): The number of ticks between two snapshots, or 0 for no snapshot
+        """
+        self.game = game
+        self.snapshot_every = snapshot_every
+        self.start()
+
+    def start(self) -> None:
+        """
+        Starts recording a new game, after the game has been reset
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.replay = Replay(self.game.seed, board_size=self.game.board_size)
+
+    def record(self) -> None:
+        """
+        Records the step the game has just played
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        game = self.game
+        # The direction after the step is the one the snake has moved in, whatever turns led to it
+        self.replay.append(game.direction)
+        self.replay.set_result(game.score, game.speed_level, game.get_death_cause())
+        if self.snapshot_every and game.is_running and game.steps % self.snapshot_every == 0:
+            self.replay.add_snapshot(game)
+
+    def get_replay(self) -> Replay:
+        """
+        Returns the replay of the current game
+        """
+        return self.replay
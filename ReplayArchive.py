@@ -0,0 +1,270 @@
+from Replay import Replay, ReplayError
+from typing import *
+from snake_rules import DEATH_CAUSES
+import mmap
+import os
+import numpy as np
+
+class ReplayArchive(object):
+    """
+    Many replays in one append-only file, with an index of fixed-size entries in a second file.
+
+    Both files are memory-mapped, so a replay is read straight from the page cache when it is asked for and
+    the index is a NumPy structured array over the mapped file: queries on scores, levels or death causes
+    are vectorized and never create one object per replay, and scanning the whole archive streams the
+    replays one at a time in constant memory.
+
+    The data file starts with MAGIC and then holds the replays one after the other in their binary form
+    (see Replay.to_bytes). Every replay has an entry in the index file (path + ".idx") with its game id, its
+    offset and length in the data file and what it claims (score, level, death cause, ticks). The data is
+    always written before the entry, so a crash can leave an unindexed record at the end of the data file,
+    which is dropped the next time the archive is opened for appending, but never an entry without its data.
+
+    Constants:
+        MAGIC: The bytes the data file starts with
+        ENTRY: The NumPy type of an entry of the index
+        INDEX_SUFFIX: The suffix added to the path of the data file to get the path of the index
+
+    Attributes:
+        path (str): The path of the data file
+        writable (bool): Was the archive opened for appending
+    """
+    MAGIC = b"SNKA\x01\x00\x00\x00"
+    ENTRY = np.dtype([("game_id", "<u8"), ("offset", "<u8"), ("length", "<u4"), ("ticks", "<u4"),
+                      ("score", "<u4"), ("speed_level", "<u4"), ("death_cause", "u1"), ("padding", "u1", 7)])
+    INDEX_SUFFIX = ".idx"
+
+    def __init__(self, path: str, mode: str = "r"):
+        """
+        Open an archive
+
+        Args:
+            path (str): The path of the data file
+            mode (str): "r" to read an existing archive, "a" to append to it, creating it if needed
+        """
+        if mode not in ("r", "a"):
+            raise ValueError("Unknown mode {!r}, expected 'r' or 'a'".format(mode))
+
+        self.path = path
+        self.writable = mode == "a"
+        if self.writable and not os.path.exists(path):
+            with open(path, "wb") as file:
+                file.write(ReplayArchive.MAGIC)
+            open(path + ReplayArchive.INDEX_SUFFIX, "wb").close()
+
+        self._data_file = open(path, "r+b" if self.writable else "rb")
+        self._index_file = open(path + ReplayArchive.INDEX_SUFFIX, "r+b" if self.writable else "rb")
+        if self._data_file.read(len(ReplayArchive.MAGIC)) != ReplayArchive.MAGIC:
+            self.close()
+            raise ReplayError("{} is not a replay archive".format(path))
+
+        self._data_map = None
+        self._index_map = None
+        self._index = np.zeros(0, ReplayArchive.ENTRY)
+        self._count = os.fstat(self._index_file.fileno()).st_size // ReplayArchive.ENTRY.itemsize
+        self._remap()
+
+        self._end = len(ReplayArchive.MAGIC)
+        if self._count:
+            last = self._index[self._count - 1]
+            self._end = int(last["offset"]) + int(last["length"])
+        if self.writable:
+            # Drop what a crash may have left after the last complete record
+            self._data_file.truncate(self._end)
+            self._index_file.truncate(self._count * ReplayArchive.ENTRY.itemsize)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_count(self) -> int:
+        """
+        Returns the number of replays in the archive
+        """
+        return self._count
+
+    def get_index(self) -> np.ndarray:
+        """
+        Returns the index as a read-only structured array over the mapped index file, with the fields of ENTRY.
+        It is only valid until the next append
+
+        Args:
+            None
+
+        Returns:
+            The entries of the replays, in the order they were appended
+        """
+        self._remap()
+        return self._index
+
+    def append(self, replay: Replay, game_id: Optional[int] = None) -> int:
+        """
+        Adds a replay at the end of the archive
+
+        Args:
+            replay (Replay): The replay to add
+            game_id (int): The id of the game, or None to use the number of the replay in the archive
+
+        Returns:
+            The id of the game
+        """
+        if not self.writable:
+            raise ValueError("The archive was opened read-only")
+
+        game_id = self._count if game_id is None else game_id
+        data = replay.to_bytes()
+        self._data_file.seek(self._end)
+        self._data_file.write(data)
+
+        entry = np.zeros(1, ReplayArchive.ENTRY)
+        entry[0] = (game_id, self._end, len(data), replay.get_ticks(), replay.get_score(), replay.get_speed_level(),
+                    DEATH_CAUSES.index(replay.get_death_cause()), 0)
+        self._data_file.flush()
+        self._index_file.seek(self._count * ReplayArchive.ENTRY.itemsize)
+        self._index_file.write(entry.tobytes())
+        self._end += len(data)
+        self._count += 1
+        return game_id
+
+    def flush(self) -> None:
+        """
+        Writes the appended replays to the files
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._data_file.flush()
+        self._index_file.flush()
+
+    def get_record(self, position: int) -> memoryview:
+        """
+        Returns the binary form of the replay at the given position, straight from the mapped file
+
+        Args:
+            position (int): The position of the replay in the archive
+
+        Returns:
+            The bytes of the replay
+        """
+        if not 0 <= position < self._count:
+            raise IndexError("position {} out of range for an archive of {} replays".format(position, self._count))
+        self._remap()
+        entry = self._index[position]
+        offset = int(entry["offset"])
+        return memoryview(self._data_map)[offset:offset + int(entry["length"])]
+
+    def get_replay(self, position: int) -> Replay:
+        """
+        Reads the replay at the given position
+
+        Args:
+            position (int): The position of the replay in the archive
+
+        Returns:
+            The Replay
+        """
+        record = self.get_record(position)
+        try:
+            return Replay.from_bytes(record)
+        finally:
+            record.release()
+
+    def find(self, game_id: int) -> Optional[int]:
+        """
+        Finds the position of the replay of a game
+
+        Args:
+            game_id (int): The id of the game
+
+        Returns:
+            The position of the first replay with that id, or None if there is none
+        """
+        ids = self.get_index()["game_id"]
+        # The ids are usually appended in increasing order, a binary search is enough then
+        position = int(np.searchsorted(ids, game_id))
+        if position < len(ids) and ids[position] == game_id:
+            return position
+        matches = np.flatnonzero(ids == game_id)
+        return int(matches[0]) if len(matches) else None
+
+    def select(self, min_score: Optional[int] = None, max_score: Optional[int] = None,
+               min_level: Optional[int] = None, death_cause: Union[str, None, Tuple[()]] = ()) -> np.ndarray:
+        """
+        Finds the replays matching all the given conditions, without reading them
+
+        Args:
+            min_score (int): The lowest score, or None for no limit
+            max_score (int): The highest score, or None for no limit
+            min_level (int): The lowest level, or None for no limit
+            death_cause (str): The cause of death ("eat_self", "eat_gate", or None for the games not over),
+                               or () for any cause
+
+        Returns:
+            The positions of the matching replays, in increasing order
+        """
+        index = self.get_index()
+        mask = np.ones(len(index), dtype=bool)
+        if min_score is not None:
+            mask &= index["score"] >= min_score
+        if max_score is not None:
+            mask &= index["score"] <= max_score
+        if min_level is not None:
+            mask &= index["speed_level"] >= min_level
+        if death_cause != ():
+            mask &= index["death_cause"] == DEATH_CAUSES.index(death_cause)
+        return np.flatnonzero(mask)
+
+    def iter_replays(self, positions: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, Replay]]:
+        """
+        Reads the replays one at a time
+
+        Args:
+            positions (Iterable[int]): The positions of the replays to read, or None for all of them in order
+
+        Returns:
+            An iterator over the (position, Replay) pairs
+        """
+        if positions is None:
+            positions = range(self._count)
+        for position in positions:
+            yield int(position), self.get_replay(int(position))
+
+    def close(self) -> None:
+        """
+        Closes the files of the archive. The arrays returned by get_index() cannot be used afterwards
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        # The maps are closed when the last array or view over them is gone
+        self._index = None
+        self._data_map = self._index_map = None
+        for file in (self._data_file, self._index_file):
+            if not file.closed:
+                file.close()
+
+    def __enter__(self) -> 'ReplayArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _remap(self) -> None:
+        """
+        Maps the files again if replays have been appended since they were last mapped
+        """
+        if len(self._index) == self._count:
+            return
+
+        if self.writable:
+            self.flush()
+        # The old maps are not closed here, the arrays handed out before may still use them
+        index_size = self._count * ReplayArchive.ENTRY.itemsize
+        self._data_map = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_map = mmap.mmap(self._index_file.fileno(), index_size, access=mmap.ACCESS_READ)
+        self._index = np.frombuffer(self._index_map, ReplayArchive.ENTRY, self._count)
@@ -0,0 +1,90 @@
+from GameState import GameState
+from Replay import Replay
+from typing import *
+
+class ReplayPlayer(object):
+    """
+    Plays a replay tick by tick and jumps to any tick of it.
+
+    Seeking restarts from the last snapshot of the replay before the target tick, or carries on from the
+    current tick when it is closer, so a seek never plays more ticks than the distance between two snapshots
+    (see ReplayRecorder.snapshot_every) whatever the length of the game.
+
+    Attributes:
+        replay (Replay): The replay being played
+        game (GameState): The state of the game at the current tick
+    """
+    def __init__(self, replay: Replay):
+        """
+        Create a player at the start of the replay
+
+        Args:
+            replay (Replay): The replay to play
+        """
+        self.replay = replay
+        self.game = GameState(replay.get_seed(), replay.get_board_size())
+
+    def get_game(self) -> GameState:
+        """
+        Returns the state of the game at the current tick. It is replaced by a new GameState when seeking backwards
+        """
+        return self.game
+
+    def get_tick(self) -> int:
+        """
+        Returns the current tick, the number of steps played
+        """
+        return self.game.steps
+
+    def is_finished(self) -> bool:
+        """
+        Checks if the whole replay has been played
+        """
+        return self.game.steps >= self.replay.get_ticks()
+
+    def advance(self, ticks: int = 1) -> int:
+        """
+        Plays the given number of ticks, or less if the replay ends before
+
+        Args:
+            ticks (int): The number of ticks to play
+
+        Returns:
+            The number of ticks played
+        """
+        start = self.game.steps
+        self.replay.play(self.game, min(start + ticks, self.replay.get_ticks()))
+        return self.game.steps - start
+
+    def seek(self, tick: int) -> GameState:
+        """
+        Moves to the given tick
+
+        Args:
+            tick (int): The tick to move to, clamped to the length of the replay
+
+        Returns:
+            The state of the game at that tick
+        """
+        tick = max(0, min(tick, self.replay.get_ticks()))
+        snapshot = self.replay.get_nearest_snapshot(tick)
+        start = snapshot if snapshot is not None else 0
+        if not start <= self.game.steps <= tick:
+            if snapshot is not None:
+                self.game = self.replay.get_snapshot(snapshot)
+            else:
+                self.game = GameState(self.replay.get_seed(), self.replay.get_board_size())
+        self.replay.play(self.game, tick)
+        return self.game
+
+    def play_to_end(self) -> GameState:
+        """
+        Plays the rest of the replay as fast as possible
+
+        Args:
+            None
+
+        Returns:
+            The state of the game at the end of the replay
+        """
+        return self.seek(self.replay.get_ticks())
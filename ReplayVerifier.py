@@ -0,0 +1,174 @@
+from GameState import GameState
+from Replay import Replay, ReplayError
+from ReplayArchive import ReplayArchive
+from typing import *
+import multiprocessing
+import os
+
+class VerificationResult(NamedTuple):
+    """
+    The outcome of the verification of one replay
+
+    Attributes:
+        source (str): Where the replay comes from: its path, or the path of its archive and its game id
+        seed (int): The seed of the game, or None if the replay could not be read
+        ticks (int): The number of ticks of the replay
+        mismatches (Tuple[str, ...]): What the replay claims and the game does not agree with, empty if it is valid
+    """
+    source: str
+    seed: Optional[int]
+    ticks: int
+    mismatches: Tuple[str, ...]
+
+def verify_replay(replay: Replay) -> List[str]:
+    """
+    Plays a replay again from its seed, following the rules of the game, and checks what it claims.
+    The snapshots of the replay are not used: they come from the same place as the claims
+
+    Args:
+        replay (Replay): The replay to check
+
+    Returns:
+        The mismatches between the claims of the replay and the game, empty if the replay is valid
+    """
+    game = GameState(replay.get_seed(), replay.get_board_size())
+    ticks = replay.get_ticks()
+    replay.play(game, ticks)
+
+    mismatches = []
+    if game.steps < ticks:
+        mismatches.append("the snake died at tick {} but the replay goes on to tick {}".format(game.steps, ticks))
+    for name, claimed, actual in (("score", replay.get_score(), game.score),
+                                  ("speed_level", replay.get_speed_level(), game.speed_level),
+                                  ("death_cause", replay.get_death_cause(), game.get_death_cause())):
+        if claimed != actual:
+            mismatches.append("{}: claimed {} but the game gives {}".format(name, claimed, actual))
+    return mismatches
+
+def _verify_files(paths: List[str]) -> Tuple[int, int, List[VerificationResult]]:
+    """
+    Verifies replay files in a worker process. Returns the number of replays and ticks checked and the
+    results of the invalid replays only, so that the valid ones cost nothing to send back
+    """
+    ticks = 0
+    failures = []
+    for path in paths:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ReplayError) as error:
+            failures.append(VerificationResult(path, None, 0, ("unreadable: {}".format(error),)))
+            continue
+
+        ticks += replay.get_ticks()
+        mismatches = verify_replay(replay)
+        if mismatches:
+            failures.append(VerificationResult(path, replay.get_seed(), replay.get_ticks(), tuple(mismatches)))
+    return len(paths), ticks, failures
+
+# The archives opened by a worker process, kept open between chunks
+_archives = {}
+
+def _verify_archive_range(task: Tuple[str, int, int]) -> Tuple[int, int, List[VerificationResult]]:
+    """
+    Verifies the replays start to stop - 1 of an archive in a worker process, like _verify_files
+    """
+    path, start, stop = task
+    if path not in _archives:
+        _archives[path] = ReplayArchive(path)
+    archive = _archives[path]
+    game_ids = archive.get_index()["game_id"]
+
+    ticks = 0
+    failures = []
+    for position in range(start, stop):
+        source = "{}#{}".format(path, int(game_ids[position]))
+        try:
+            replay = archive.get_replay(position)
+        except ReplayError as error:
+            failures.append(VerificationResult(source, None, 0, ("unreadable: {}".format(error),)))
+            continue
+
+        ticks += replay.get_ticks()
+        mismatches = verify_replay(replay)
+        if mismatches:
+            failures.append(VerificationResult(source, replay.get_seed(), replay.get_ticks(), tuple(mismatches)))
+    return stop - start, ticks, failures
+
+class ReplayVerifier(object):
+    """
+    Verifies many replays with a pool of worker processes.
+
+    The work is split in chunks of replays. A worker reads the replays of its chunk itself, from the files
+    or from the memory-mapped archive, so only the names of the replays go to the workers and only the
+    invalid replays come back. The results are aggregated as the chunks finish.
+
+    Attributes:
+        workers (int): The number of worker processes, 1 to verify in the current process
+        chunksize (int): The number of replays in a chunk
+        replays (int): The number of replays verified so far
+        ticks (int): The number of ticks played so far
+        failures (List[VerificationResult]): The invalid replays found so far
+    """
+    def __init__(self, workers: Optional[int] = None, chunksize: int = 64):
+        """
+        Create a verifier
+
+        Args:
+            workers (int): The number of worker processes, or None for one per core
+            chunksize (int): The number of replays in a chunk
+        """
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.replays = 0
+        self.ticks = 0
+        self.failures = []
+
+    def verify_files(self, paths: Sequence[str]) -> Iterator[VerificationResult]:
+        """
+        Verifies replay files
+
+        Args:
+            paths (Sequence[str]): The paths of the replay files
+
+        Returns:
+            An iterator over the invalid replays, as they are found
+        """
+        chunks = [list(paths[start:start + self.chunksize]) for start in range(0, len(paths), self.chunksize)]
+        return self._run(_verify_files, chunks)
+
+    def verify_archive(self, path: str) -> Iterator[VerificationResult]:
+        """
+        Verifies all the replays of an archive
+
+        Args:
+            path (str): The path of the archive
+
+        Returns:
+            An iterator over the invalid replays, as they are found
+        """
+        with ReplayArchive(path) as archive:
+            count = archive.get_count()
+        chunks = [(path, start, min(start + self.chunksize, count)) for start in range(0, count, self.chunksize)]
+        return self._run(_verify_archive_range, chunks)
+
+    def _run(self, function: Callable, chunks: List[Any]) -> Iterator[VerificationResult]:
+        """
+        Runs the function on every chunk, in the workers, and adds up the results
+        """
+        if self.workers == 1 or len(chunks) <= 1:
+            results = map(function, chunks)
+            yield from self._collect(results)
+            return
+
+        with multiprocessing.Pool(self.workers) as pool:
+            yield from self._collect(pool.imap_unordered(function, chunks))
+
+    def _collect(self, results: Iterable[Tuple[int, int, List[VerificationResult]]]) -> Iterator[VerificationResult]:
+        """
+        Adds up the results of the chunks and yields the invalid replays
+        """
+        for replays, ticks, failures in results:
+            self.replays += replays
+            self.ticks += ticks
+            self.failures.extend(failures)
+            yield from failures
@@ -0,0 +1,233 @@
+from GameState import GameState
+from Policy import Policy
+from collections import Counter
+from random import Random
+from typing import *
+import math
+import multiprocessing
+import os
+
+class GameResult(NamedTuple):
+    """
+    The outcome of one game played by a policy
+
+    Attributes:
+        policy (str): The name of the policy
+        seed (int): The seed of the game
+        score (int): The number of fruits eaten
+        speed_level (int): The number of gates the snake has gone through
+        death_cause (str): "eat_self" or "eat_gate", or None if the game was stopped after max_steps
+        steps (int): The number of steps played
+    """
+    policy: str
+    seed: int
+    score: int
+    speed_level: int
+    death_cause: Optional[str]
+    steps: int
+
+def play_game(policy: Policy, seed: int, max_steps: Optional[int] = None) -> GameResult:
+    """
+    Plays one headless game with the given policy until the snake dies or max_steps steps have been played
+
+    Args:
+        policy (Policy): The policy choosing the directions
+        seed (int): The seed of the game
+        max_steps (int): The number of steps after which the game is stopped, or None to play until the snake dies
+
+    Returns:
+        The result of the game
+    """
+    game = GameState(seed)
+    policy.reset(seed)
+    while game.is_running and (max_steps is None or game.steps < max_steps):
+        game.step(policy.act(game))
+
+    return GameResult(policy.get_name(), seed, game.score, game.speed_level, game.get_death_cause(), game.steps)
+
+def _play_task(task: Tuple[Policy, int, Optional[int]]) -> GameResult:
+    """
+    Plays the game of a task in a worker process
+    """
+    return play_game(*task)
+
+class ResultSummary(object):
+    """
+    Aggregates the results of the games played by one policy as they come in, without keeping them
+
+    Attributes:
+        games (int): The number of games
+        mean_score (float): The average score
+        score_m2 (float): The sum of the squared differences to the mean score (Welford's algorithm)
+        max_score (int): The best score
+        total_levels (int): The sum of the levels reached
+        level_counts (Counter): The number of games ending at each level
+        death_causes (Counter): The number of games ending with each death cause (None when stopped)
+        total_steps (int): The sum of the steps played
+    """
+    def __init__(self):
+        self._games = 0
+        self._mean_score = 0.0
+        self._score_m2 = 0.0
+        self._max_score = 0
+        self._total_levels = 0
+        self._level_counts = Counter()
+        self._death_causes = Counter()
+        self._total_steps = 0
+
+    def add(self, result: GameResult) -> None:
+        """
+        Adds the result of one more game
+
+        Args:
+            result (GameResult): The result of the game
+
+        Returns:
+            None
+        """
+        self._games += 1
+        delta = result.score - self._mean_score
+        self._mean_score += delta / self._games
+        self._score_m2 += delta * (result.score - self._mean_score)
+        self._max_score = max(self._max_score, result.score)
+        self._total_levels += result.speed_level
+        self._level_counts[result.speed_level] += 1
+        self._death_causes[result.death_cause] += 1
+        self._total_steps += result.steps
+
+    def get_games(self) -> int:
+        """
+        Returns the number of games added
+        """
+        return self._games
+
+    def get_mean_score(self) -> float:
+        """
+        Returns the average score of the games
+        """
+        return self._mean_score
+
+    def get_score_error(self) -> float:
+        """
+        Returns the standard error of the average score, 0 with less than two games
+        """
+        if self._games < 2:
+            return 0.0
+        return math.sqrt(self._score_m2 / (self._games - 1) / self._games)
+
+    def get_max_score(self) -> int:
+        """
+        Returns the best score of the games
+        """
+        return self._max_score
+
+    def get_mean_level(self) -> float:
+        """
+        Returns the average level reached by the games
+        """
+        return self._total_levels / self._games if self._games else 0.0
+
+    def get_level_counts(self) -> Counter:
+        """
+        Returns the number of games ending at each level
+        """
+        return self._level_counts
+
+    def get_death_causes(self) -> Counter:
+        """
+        Returns the number of games ending with each death cause, None counting the games stopped after max_steps
+        """
+        return self._death_causes
+
+    def get_total_steps(self) -> int:
+        """
+        Returns the number of steps played in all the games
+        """
+        return self._total_steps
+
+    def describe(self) -> str:
+        """
+        Returns a one line description of the results
+        """
+        causes = ", ".join("{} {}".format(cause or "stopped", count)
+                           for cause, count in sorted(self._death_causes.items(), key=lambda item: str(item[0])))
+        return "{} games, score {:.2f} +- {:.2f} (max {}), level {:.2f} (max {}), {:.0f} steps per game, {}".format(
+            self._games, self._mean_score, self.get_score_error(), self._max_score, self.get_mean_level(),
+            max(self._level_counts, default=0), self._total_steps / self._games if self._games else 0, causes)
+
+class SelfPlayRunner(object):
+    """
+    Plays many headless games in parallel with a pool of worker processes.
+
+    The games are handed out to the workers in chunks and their results are yielded as soon as each chunk
+    is done, in no particular order, so that they can be aggregated while the other games are still running.
+    Each game is decided by its seed and its policy, so the results do not depend on the number of workers.
+
+    Attributes:
+        workers (int): The number of worker processes, 1 to play in the current process
+        max_steps (int): The number of steps after which a game is stopped, or None to play until the snake dies
+        chunksize (int): The number of games sent to a worker at once
+    """
+    def __init__(self, workers: Optional[int] = None, max_steps: Optional[int] = 10000, chunksize: int = 16):
+        """
+        Create a runner
+
+        Args:
+            workers (int): The number of worker processes, or None for one per core
+            max_steps (int): The number of steps after which a game is stopped, or None to play until the snake dies
+            chunksize (int): The number of games sent to a worker at once
+        """
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.max_steps = max_steps
+        self.chunksize = chunksize
+
+    def run(self, games: Iterable[Tuple[Policy, int]]) -> Iterator[GameResult]:
+        """
+        Plays the given games and yields their results as they finish
+
+        Args:
+            games (Iterable[Tuple[Policy, int]]): The policy and the seed of every game
+
+        Returns:
+            An iterator over the results of the games, in the order they finish
+        """
+        tasks = ((policy, seed, self.max_steps) for policy, seed in games)
+        if self.workers == 1:
+            for task in tasks:
+                yield _play_task(task)
+            return
+
+        with multiprocessing.Pool(self.workers) as pool:
+            yield from pool.imap_unordered(_play_task, tasks, chunksize=self.chunksize)
+
+    def evaluate(self, policies: Sequence[Policy], games: int, seed: int = 0,
+                 progress: Optional[Callable[[Dict[str, ResultSummary]], None]] = None,
+                 every: int = 1000) -> Dict[str, ResultSummary]:
+        """
+        Plays the same games with every policy and summarizes the results of each policy. Playing the same
+        seeds makes the difference between two policies much less noisy than playing different games
+
+        Args:
+            policies (Sequence[Policy]): The policies to evaluate, with different names
+            games (int): The number of games played by each policy
+            seed (int): The seed from which the seeds of the games are drawn
+            progress (Callable): Called with the summaries every time `every` more games are done
+            every (int): The number of games between two calls to progress
+
+        Returns:
+            The summary of the results of each policy, by name
+        """
+        summaries = {policy.get_name(): ResultSummary() for policy in policies}
+        if len(summaries) != len(policies):
+            raise ValueError("The policies must have different names")
+
+        rng = Random(seed)
+        seeds = (rng.getrandbits(64) for _ in range(games))
+        done = 0
+        for result in self.run((policy, game_seed) for game_seed in seeds for policy in policies):
+            summaries[result.policy].add(result)
+            done += 1
+            if progress is not None and done % every == 0:
+                progress(summaries)
+
+        return summaries
@@ -0,0 +1,291 @@
+from SnakeEnv import SnakeEnv
+from snake_rules import BOARD_SIZE, DEATH_CAUSES
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from random import Random
+from typing import *
+import multiprocessing
+import os
+import traceback
+import numpy as np
+
+# The commands sent to the workers, and their answers
+_STEP = b"s"
+_RESET = b"r"
+_RESET_SEEDED = b"R"
+_CLOSE = b"c"
+_DONE = b"d"
+_ERROR = b"e"
+
+def _layout(num_envs: int, observation_shape: Tuple[int, ...],
+            observation_dtype: np.dtype) -> Tuple[List[Tuple[str, Tuple[int, ...], np.dtype, int]], int]:
+    """
+    Places the arrays shared with the workers in one block of memory. Returns the name, shape, type and
+    offset of every array and the size of the block
+    """
+    arrays = [
+        ("actions", (num_envs,), np.dtype(np.int8)),
+        ("seeds", (num_envs,), np.dtype(np.uint64)),
+        ("observations", (num_envs,) + tuple(observation_shape), np.dtype(observation_dtype)),
+        ("rewards", (num_envs,), np.dtype(np.float32)),
+        ("dones", (num_envs,), np.dtype(np.bool_)),
+        ("truncated", (num_envs,), np.dtype(np.bool_)),
+        ("scores", (num_envs,), np.dtype(np.int32)),
+        ("speed_levels", (num_envs,), np.dtype(np.int32)),
+        ("steps", (num_envs,), np.dtype(np.int32)),
+        ("death_causes", (num_envs,), np.dtype(np.int8)),
+    ]
+    layout = []
+    offset = 0
+    for name, shape, dtype in arrays:
+        layout.append((name, shape, dtype, offset))
+        size = int(np.prod(shape)) * dtype.itemsize
+        offset += (size + 63) // 64 * 64  # Keep every array on its own cache lines
+    return layout, offset
+
+def _attach(memory: SharedMemory, layout: List[Tuple[str, Tuple[int, ...], np.dtype, int]]) -> Dict[str, np.ndarray]:
+    """
+    Creates the arrays of the layout over the given block of shared memory
+    """
+    return {name: np.ndarray(shape, dtype, memory.buf, offset) for name, shape, dtype, offset in layout}
+
+def _run_worker(memory_name: str, layout: List[Tuple[str, Tuple[int, ...], np.dtype, int]], start: int, stop: int,
+                observation: str, max_steps: Optional[int], board_size: Tuple[int, int],
+                connection: Connection) -> None:
+    """
+    Steps the games start to stop - 1 in a worker process, reading the actions from and writing the results
+    to the shared memory every time it is told to
+    """
+    memory = SharedMemory(memory_name)
+    arrays = _attach(memory, layout)
+    actions, seeds, observations = arrays["actions"], arrays["seeds"], arrays["observations"]
+    try:
+        envs = [SnakeEnv(observation, max_steps, int(seeds[index]), board_size) for index in range(start, stop)]
+        while True:
+            command = connection.recv_bytes()
+            if command == _CLOSE:
+                break
+
+            try:
+                for index, env in enumerate(envs, start):
+                    if command == _RESET:
+                        observations[index] = env.reset()
+                        continue
+                    if command == _RESET_SEEDED:
+                        observations[index] = env.reset(int(seeds[index]))
+                        continue
+
+                    action = int(actions[index])
+                    next_observation, reward, done, info = env.step(action if action >= 0 else None)
+                    arrays["rewards"][index] = reward
+                    arrays["dones"][index] = done
+                    arrays["truncated"][index] = info["truncated"]
+                    arrays["scores"][index] = info["score"]
+                    arrays["speed_levels"][index] = info["speed_level"]
+                    arrays["steps"][index] = info["steps"]
+                    arrays["death_causes"][index] = SharedVecEnv.DEATH_CAUSES.index(info["death_cause"])
+                    # Like the main loop after a death, a new game starts right away
+                    observations[index] = env.reset() if done else next_observation
+            except Exception:
+                connection.send_bytes(_ERROR + traceback.format_exc().encode())
+            else:
+                connection.send_bytes(_DONE)
+    finally:
+        # The views must be gone before the memory can be closed
+        del arrays, actions, seeds, observations
+        memory.close()
+
+class SharedVecEnv(object):
+    """
+    A batch of SnakeEnv games stepped together by worker processes, each one playing a slice of the games.
+
+    The actions, observations, rewards, done flags and infos of all the games are kept in one block of shared
+    memory, so a step only sends a one byte command to each worker and nothing is pickled: the trainer reads
+    the results of all the games as contiguous arrays. The arrays returned are read-only views of the shared
+    memory, overwritten by the next step or reset.
+
+    A game that ends is reset at once by its worker, as the main loop of the game does after a death: the
+    observation returned for it is the first one of the next game, while the reward, the done flag and the
+    infos are those of the step that ended it.
+
+    Constants:
+        DEATH_CAUSES: The death causes, indexed by the death_causes info (None when the snake is alive)
+
+    Attributes:
+        num_envs (int): The number of games
+        workers (int): The number of worker processes
+        observation (str): The kind of observation (grid | features | rgb)
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board of every game
+        observation_shape (Tuple[int, ...]): The shape of the observation of one game
+        observation_dtype (np.dtype): The type of the values of the observations
+    """
+    DEATH_CAUSES = DEATH_CAUSES
+
+    def __init__(self, num_envs: int, workers: Optional[int] = None, observation: str = "grid",
+                 max_steps: Optional[int] = None, seed: Optional[int] = None,
+                 board_size: Tuple[int, int] = BOARD_SIZE):
+        """
+        Create the games and start the workers
+
+        Args:
+            num_envs (int): The number of games
+            workers (int): The number of worker processes, or None for one per core
+            observation (str): The kind of observation (grid | features | rgb)
+            max_steps (int): The number of steps after which a game is stopped, or None to play until the snake dies
+            seed (int): The seed from which the seeds of the games are drawn, or None for random seeds
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board of every game
+        """
+        template = SnakeEnv(observation, board_size=board_size)
+        self.num_envs = num_envs
+        self.workers = max(1, min(workers if workers is not None else os.cpu_count() or 1, num_envs))
+        self.observation = observation
+        self.board_size = (board_size[0], board_size[1])
+        self.observation_shape = template.observation_shape
+        self.observation_dtype = template.observation_dtype
+
+        layout, size = _layout(num_envs, self.observation_shape, self.observation_dtype)
+        self._memory = SharedMemory(create=True, size=size)
+        self._arrays = _attach(self._memory, layout)
+        self._views = {}
+        for name, array in self._arrays.items():
+            view = array.view()
+            view.flags.writeable = False
+            self._views[name] = view
+        self._write_seeds(seed)
+
+        self._connections = []
+        self._processes = []
+        self._waiting = False
+        bounds = np.linspace(0, num_envs, self.workers + 1).astype(int)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_worker, daemon=True,
+                                              args=(self._memory.name, layout, int(start), int(stop),
+                                                    observation, max_steps, self.board_size, child))
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def reset(self, seed: Optional[int] = None) -> np.ndarray:
+        """
+        Starts a new game in every slot
+
+        Args:
+            seed (int): The seed from which the seeds of the new games are drawn, or None to let every game
+                        draw the seed of the next one, as SnakeEnv.reset() does
+
+        Returns:
+            The (num_envs, *observation_shape) observations of the first step of the games
+        """
+        if self._waiting:
+            raise RuntimeError("step_wait() must be called before resetting")
+        if seed is not None:
+            self._write_seeds(seed)
+        self._send(_RESET if seed is None else _RESET_SEEDED)
+        self._wait()
+        return self._views["observations"]
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Plays one tick of every game
+
+        Args:
+            actions (Sequence[int]): The direction of every game (see SnakeEnv), or -1 to keep going straight
+
+        Returns:
+            The tuple (observations, rewards, dones, infos), infos holding the arrays truncated, scores,
+            speed_levels, steps and death_causes
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def step_async(self, actions: Sequence[int]) -> None:
+        """
+        Tells the workers to play one tick with the given actions without waiting for them, so that the
+        trainer can do something else in the meantime. step_wait() returns the results
+
+        Args:
+            actions (Sequence[int]): The direction of every game, or -1 to keep going straight
+
+        Returns:
+            None
+        """
+        if self._waiting:
+            raise RuntimeError("step_wait() must be called before stepping again")
+        self._arrays["actions"][:] = actions
+        self._send(_STEP)
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Waits for the tick started by step_async() and returns its results like step()
+        """
+        self._wait()
+        views = self._views
+        infos = {name: views[name] for name in ("truncated", "scores", "speed_levels", "steps", "death_causes")}
+        return views["observations"], views["rewards"], views["dones"], infos
+
+    def close(self) -> None:
+        """
+        Stops the workers and frees the shared memory. The arrays returned before cannot be used afterwards
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self._memory is None:
+            return
+
+        for connection, process in zip(self._connections, self._processes):
+            try:
+                connection.send_bytes(_CLOSE)
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            connection.close()
+
+        self._arrays = None
+        self._views = None
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self) -> 'SharedVecEnv':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write_seeds(self, seed: Optional[int]) -> None:
+        """
+        Draws the seed of every game from the given seed
+        """
+        rng = Random(seed)
+        self._arrays["seeds"][:] = [rng.getrandbits(64) for _ in range(self.num_envs)]
+
+    def _send(self, command: bytes) -> None:
+        """
+        Sends the command to all the workers
+        """
+        if self._memory is None:
+            raise RuntimeError("The environment has been closed")
+        for connection in self._connections:
+            connection.send_bytes(command)
+        self._waiting = True
+
+    def _wait(self) -> None:
+        """
+        Waits for all the workers to be done with the last command, raising the first error of a worker
+        """
+        errors = []
+        for connection in self._connections:
+            answer = connection.recv_bytes()
+            if answer.startswith(_ERROR):
+                errors.append(answer[len(_ERROR):].decode())
+        self._waiting = False
+        if errors:
+            raise RuntimeError("A worker failed:\n" + errors[0])
@@ -1,7 +1,13 @@
 from Block import Block
-from random import randint
+from FreeCellIndex import FreeCellIndex
+from collections import deque
+from random import Random
+import random
 from typing import *
-import pygame
+
+if TYPE_CHECKING:
+    # pygame is only needed to draw, so it is imported lazily to keep the game rules headless
+    import pygame
 
 class Snake(object):
     """
@@ -11,48 +17,103 @@ class Snake(object):
         MIN_LENGTH = 5: The minimum length of the snake
         MAX_LENGTH = 15: The maximum lenght of the snake, if the snake get over this length
                         the game will jump to the next level and the length will come back to minimum
-        BLOCK_SNAKE_SIZE = (20, 20): The size of each block making the body of the Snake
+        SNAKE_BLOCK_SIZE = (20, 20): The size in pixels of each block making the body of the Snake, when drawn
         SNAKE_COLOR = (255, 0, 0): The color of the Snake (Red)
 
     Attributes:
         length (int): The current length of the snake
-        body (List[Block]): The body of the snake, which contains several Blocks object
+        body (Deque[Block]): The body of the snake, which contains several Blocks object, from the head
+                             to the tail. A deque is used so that the snake can grow at the head and
+                             shrink at the tail in constant time
         dead (bool): Is the Snake dead or alive
+        occupied (Dict[Tuple[int, int], int]): The number of blocks of the body lying on each cell.
+                                               It is updated as the head advances and the tail retracts,
+                                               so checking if a coordinate is on the body takes constant time
+        free_cells (FreeCellIndex): The index of the empty cells of the board, kept in step with the body
     """
     MIN_LENGTH = 5
     SNAKE_BLOCK_SIZE = (20, 20)
     SNAKE_COLOR = (255, 0, 0)
-    SCREEN_SIZE = (1000, 700)
 
-    def __init__(self, board_width: int, board_height: int, length: int):
+    def __init__(self, board_width: int, board_height: int, length: int, free_cells: Optional[FreeCellIndex] = None,
+                 rng: Optional[Random] = None):
         """
         Create a snake with the given length and at random position in the board.
 
         Attributes:
-            board_width (int): The width of the window
-            board_height (int): The height of the window
-        """
-        x = randint(length + 1, Snake.SCREEN_SIZE[0] // Snake.SNAKE_BLOCK_SIZE[0] - 1)
-        y = randint(1, Snake.SCREEN_SIZE[1] // Snake.SNAKE_BLOCK_SIZE[0] - 1)
-        head_x = Snake.SNAKE_BLOCK_SIZE[0] * x
-        head_y = Snake.SNAKE_BLOCK_SIZE[0] * y
-        self._length = length
+            board_width (int): The number of columns of the board
+            board_height (int): The number of rows of the board
+            length (int): The length of the snake
+            free_cells (FreeCellIndex): The index of the empty cells to keep up to date as the snake moves
+            rng (Random): The random number generator used to place the snake, or None to use the
+                          global one of the random module
+        """
+        rng = rng if rng is not None else random
+        # A snake too long to fit in a row wraps around the left edge
+        x = rng.randint(min(length + 1, board_width - 1), board_width - 1)
+        y = rng.randint(1, board_height - 1)
+        coordinates = [((x - i) % board_width, y) for i in range(length)]
+        self._build(coordinates, free_cells)
+
+    @classmethod
+    def from_coordinates(cls, coordinates: Sequence[Tuple[int, int]], free_cells: Optional[FreeCellIndex] = None) -> 'Snake':
+        """
+        Create a snake whose blocks lie on the given coordinates
+
+        Args:
+            coordinates (Sequence[Tuple[int, int]]): The cells of the blocks, from the head to the tail
+            free_cells (FreeCellIndex): The index of the empty cells to keep up to date as the snake moves
+
+        Returns:
+            The new Snake
+        """
+        snake = cls.__new__(cls)
+        snake._build(coordinates, free_cells)
+        return snake
+
+    def copy(self, free_cells: Optional[FreeCellIndex] = None) -> 'Snake':
+        """
+        Returns a snake on the same cells that can move without changing this one. The blocks themselves are
+        shared, as a move only ever changes the new head it has just added (see teleport)
+
+        Args:
+            free_cells (FreeCellIndex): The index of the empty cells the copy keeps up to date, or None.
+                                        It must be in the same state as the index of this snake
+
+        Returns:
+            The copy of the snake
+        """
+        snake = self.__class__.__new__(self.__class__)
+        snake._length = self._length
+        snake._dead = self._dead
+        snake._body = self._body.copy()
+        snake._occupied = self._occupied.copy()
+        snake._free_cells = free_cells
+        return snake
+
+    def _build(self, coordinates: Sequence[Tuple[int, int]], free_cells: Optional[FreeCellIndex]) -> None:
+        """
+        Sets up the body of the snake from the coordinates of its blocks, from the head to the tail
+        """
+        self._length = len(coordinates)
         self._dead = False
-        self._body = []
-        self._body.append(Block(head_x, head_y, Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE))
-        for i in range(1, length):
-            block = Block(head_x - i * Snake.SNAKE_BLOCK_SIZE[0], head_y, Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+        self._body = deque()
+        self._occupied = {}
+        self._free_cells = free_cells
+        for coordinate in coordinates:
+            block = Block(coordinate[0], coordinate[1], Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
             self._body.append(block)
+            self._occupy(block.get_coordinate())
 
-    def get_body(self) -> List[Tuple[int, int]]:
+    def get_body(self) -> Deque[Block]:
         """
-        Return the body of the Snake, which is a List of Block objects
+        Return the body of the Snake, which is a sequence of Block objects from the head to the tail
 
         Args:
             None
 
         Returns:
-            The list containing all the blocks making the Snake 
+            The sequence containing all the blocks making the Snake 
         """
         return self._body
 
@@ -75,13 +136,37 @@ class Snake(object):
 
         return self._body[0]
 
+    def occupies(self, coordinate: Tuple[int, int]) -> bool:
+        """
+        Checks if any block of the Snake lies on the given coordinate
+
+        Args:
+            coordinate (Tuple[int, int]): The coordinate to check
+
+        Returns:
+            True if the coordinate is on the body of the Snake or False otherwise
+        """
+        return coordinate in self._occupied
+
+    def bites_itself(self) -> bool:
+        """
+        Checks if the head of the Snake lies on any other block of its body
+
+        Args:
+            None
+
+        Returns:
+            True if the head shares its coordinate with another block or False otherwise
+        """
+        return self._occupied.get(self._body[0].get_coordinate(), 0) > 1
+
     def is_dead(self) -> bool:
         """
         Is the Snake dead or alive?
         """
         return self._dead
 
-    def move_left(self) -> None:
+    def move_left(self) -> Block:
         """
         Turns the current direction of the Snake to the left and returns the old tail
 
@@ -92,20 +177,9 @@ class Snake(object):
             The block representing the old tail of the snake. This block will be erase when the 
             snake moves
         """
-        # Move all the blocks except for the head forward
-        head_x = self._body[0].get_x()
-        head_y = self._body[0].get_y()
-
-        tail = self._body[self._length - 1]  # Get the old tail
-        
-        for i in range(self._length - 1, 0, -1):
-            self._body[i] = self._body[i - 1]
-
-        self._body[0] = Block(head_x - Snake.SNAKE_BLOCK_SIZE[0], head_y, Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
-
-        return tail
+        return self._move(-1, 0)
     
-    def move_right(self) -> None:
+    def move_right(self) -> Block:
         """
         Turn the current direction of the Snake to the right and returns the old tail
 
@@ -116,22 +190,24 @@ class Snake(object):
             The block representing the old tail of the snake. This block will be erase when the 
             snake moves
         """
-        head_x = self._body[0].get_x()
-        head_y = self._body[0].get_y()
+        return self._move(1, 0)
 
-        tail = self._body[self._length - 1]  # Get the old tail
-
-        # Move all the blocks except for the head forward
-        for i in range(self._length - 1, 0, -1):
-            self._body[i] = self._body[i - 1]
+    def move_up(self) -> Block:
+        """
+        Turn the current direction of the Snake to go up and return the old tail
 
-        self._body[0] = Block(head_x + Snake.SNAKE_BLOCK_SIZE[0], head_y, Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+        Args:
+            None
 
-        return tail
+        Returns:
+            The block representing the old tail of the snake. This block will be erase when the 
+            snake moves
+        """
+        return self._move(0, -1)
 
-    def move_up(self) -> None:
+    def move_down(self) -> Block:
         """
-        Turn the current direction of the Snake to go up and return the old tail
+        Turn the current direction of the Snake to go down
 
         Args:
             None
@@ -140,42 +216,81 @@ class Snake(object):
             The block representing the old tail of the snake. This block will be erase when the 
             snake moves
         """
-        head_x = self._body[0].get_x()
-        head_y = self._body[0].get_y()
+        return self._move(0, 1)
 
-        tail = self._body[self._length - 1] # Get the old tail
+    def _move(self, x_change: int, y_change: int) -> Block:
+        """
+        Move the snake one block forward and return the old tail.
+        Only the head and the tail change when the snake moves, the other blocks stay where they are
 
-        # Move all the blocks except for the head forward
-        for i in range(self._length - 1, 0, -1):
-            self._body[i] = self._body[i - 1]
+        Args:
+            x_change (int): The number of columns the head moves by
+            y_change (int): The number of rows the head moves by
 
-        self._body[0] = Block(head_x, head_y - Snake.SNAKE_BLOCK_SIZE[1], Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+        Returns:
+            The block representing the old tail of the snake
+        """
+        head = self._body[0]
+        tail = self._body.pop()  # Get the old tail
+        self._vacate(tail.get_coordinate())
+        new_head = Block(head.get_x() + x_change, head.get_y() + y_change, Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+        self._body.appendleft(new_head)
+        self._occupy(new_head.get_coordinate())
 
         return tail
 
-    def move_down(self) -> None:
+    def _occupy(self, coordinate: Tuple[int, int]) -> None:
         """
-        Turn the current direction of the Snake to go down
+        Records that one more block of the Snake lies on the given coordinate
 
         Args:
-            None
+            coordinate (Tuple[int, int]): The coordinate of the block
 
         Returns:
-            The block representing the old tail of the snake. This block will be erase when the 
-            snake moves
+            None
         """
-        head_x = self._body[0].get_x()
-        head_y = self._body[0].get_y()
+        count = self._occupied.get(coordinate, 0)
+        self._occupied[coordinate] = count + 1
+        if count == 0 and self._free_cells is not None:
+            self._free_cells.block(coordinate)
 
-        tail = self._body[self._length - 1] # Get the old tail
+    def _vacate(self, coordinate: Tuple[int, int]) -> None:
+        """
+        Records that one block of the Snake has left the given coordinate
 
-        # Move all the blocks except for the head forward
-        for i in range(self._length - 1, 0, -1):
-            self._body[i] = self._body[i - 1]
+        Args:
+            coordinate (Tuple[int, int]): The coordinate of the block
 
-        self._body[0] = Block(head_x, head_y + Snake.SNAKE_BLOCK_SIZE[1], Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+        Returns:
+            None
+        """
+        count = self._occupied[coordinate] - 1
+        if count == 0:
+            del self._occupied[coordinate]
+            if self._free_cells is not None:
+                self._free_cells.unblock(coordinate)
+        else:
+            self._occupied[coordinate] = count
+
+    def leave_board(self) -> None:
+        """
+        Frees all the cells of the Snake in the index of empty cells and stops keeping the index up to date.
+        Used when the Snake has gone through the gate, so that its blocks can still be drawn disappearing
+        while a new Snake takes the board
 
-        return tail
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self._free_cells is not None:
+            # The cells are freed from the tail to the head, as the order decides where the next fruits go. The
+            # order of _occupied depends on how the snake was built, so a snake rebuilt from a saved game
+            # (see GameState.from_bytes) would not free them like the snake it was saved from
+            for coordinate in dict.fromkeys(block.get_coordinate() for block in reversed(self._body)):
+                self._free_cells.unblock(coordinate)
+            self._free_cells = None
 
     def die(self) -> None:
         """
@@ -192,16 +307,19 @@ class Snake(object):
 
     def teleport(self, new_coordinate: Tuple[int, int]) -> None:
         """
-        Teleport the snake to the given position (used when the snake go to the edge of the screen)
+        Teleport the snake to the given position (used when the snake go to the edge of the board)
 
         Args:
-            new_coordinate (Tuple[int, int]): The new coordinate of the snake
+            new_coordinate (Tuple[int, int]): The new cell of the head of the snake
 
         Returns:
             None
         """
-        self._body[0].set_x(new_coordinate[0])
-        self._body[0].set_y(new_coordinate[1])
+        head = self._body[0]
+        self._vacate(head.get_coordinate())
+        head.set_x(new_coordinate[0])
+        head.set_y(new_coordinate[1])
+        self._occupy(head.get_coordinate())
 
     def eat_fruit(self, direction: str, fruit: Block) -> None:
         """
@@ -216,15 +334,16 @@ class Snake(object):
         """
         new_block = None
         if direction == 'W':
-            new_block = Block(fruit.get_x(), fruit.get_y() - Snake.SNAKE_BLOCK_SIZE[0], Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+            new_block = Block(fruit.get_x(), fruit.get_y() - 1, Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
         elif direction == 'S':
-            new_block = Block(fruit.get_x(), fruit.get_y() + Snake.SNAKE_BLOCK_SIZE[0], Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+            new_block = Block(fruit.get_x(), fruit.get_y() + 1, Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
         elif direction == 'A':
-            new_block = Block(fruit.get_x() - Snake.SNAKE_BLOCK_SIZE[0], fruit.get_y(), Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+            new_block = Block(fruit.get_x() - 1, fruit.get_y(), Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
         elif direction == 'D':
-            new_block =  Block(fruit.get_x() + Snake.SNAKE_BLOCK_SIZE[0], fruit.get_y(), Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+            new_block =  Block(fruit.get_x() + 1, fruit.get_y(), Snake.SNAKE_COLOR, Snake.SNAKE_BLOCK_SIZE)
 
-        self._body = [new_block] + self._body
+        self._body.appendleft(new_block)
+        self._occupy(new_block.get_coordinate())
         self._length += 1
 
     def remove_tail(self) -> Block:
@@ -238,10 +357,11 @@ class Snake(object):
             The removed Block representing the tail of the snake
         """
         tail = self._body.pop()
+        self._vacate(tail.get_coordinate())
         self._length -= 1
         return tail
     
-    def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+    def draw(self, screen: 'pygame.Surface') -> List['pygame.Rect']:
         """
         Draw the whole Snake on the screen and returns the updated areas (for updating purpose)
 
@@ -251,10 +371,12 @@ class Snake(object):
         Returns:
             The List of pygame.Rect objects where the snake is drawn
         """
+        import pygame
+
         rect = []
         for block in self._body:
             surface = block.draw()
-            screen.blit(surface, block.get_coordinate())
-            rect.append(pygame.Rect(block.get_coordinate(), Snake.SNAKE_BLOCK_SIZE))
+            screen.blit(surface, block.get_screen_coordinate())
+            rect.append(pygame.Rect(block.get_screen_coordinate(), block.get_size()))
 
         return rect
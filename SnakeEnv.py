@@ -0,0 +1,182 @@
+from BoardGrid import BoardGrid
+from GameState import GameState
+from typing import *
+from snake_rules import BOARD_SIZE, DIRECTIONS, UP, DOWN, LEFT, RIGHT
+import numpy as np
+
+class SnakeEnv(object):
+    """
+    A reinforcement learning environment, in the style of gym, around the rules of the classic game.
+
+    The environment runs a GameState headless. The actions are the directions numbered like
+    snake_rules.DIRECTIONS (0: UP, 1: DOWN, 2: LEFT, 3: RIGHT), and turning back is ignored like in the game.
+
+    Three kinds of observation are available:
+        grid: a (5, rows, columns) uint8 tensor with one channel for each of empty, body, head, fruit and gate
+        features: a float32 vector describing what is around the head and where to go (see FEATURES)
+        rgb: a (rows, columns, 3) uint8 image of the board with one pixel per cell
+
+    The grid and rgb observations are read-only views of a BoardGrid updated in place at every step, so they
+    are only valid until the next step or reset. Copy them to keep them, in a replay buffer for example.
+
+    Constants:
+        OBSERVATIONS: The kinds of observation
+        EMPTY, BODY, HEAD, FRUIT, GATE: The channels of the grid observation
+        FEATURES: The names of the values of the features observation
+        FRUIT_REWARD: The reward for eating a fruit
+        LEVEL_REWARD: The reward for going through the gate
+        DEATH_REWARD: The reward for dying
+
+    Attributes:
+        game (GameState): The game being played
+        observation (str): The kind of observation
+        observation_shape (Tuple[int, ...]): The shape of the observations
+        observation_dtype (np.dtype): The type of the values of the observations
+        max_steps (int): The number of steps after which a game is stopped, or None to play until the snake dies
+    """
+    OBSERVATIONS = ("grid", "features", "rgb")
+    EMPTY, BODY, HEAD, FRUIT, GATE = BoardGrid.EMPTY, BoardGrid.BODY, BoardGrid.HEAD, BoardGrid.FRUIT, BoardGrid.GATE
+    FEATURES = ("danger_straight", "danger_left", "danger_right",
+                "moving_up", "moving_down", "moving_left", "moving_right",
+                "target_up", "target_down", "target_left", "target_right", "gate_open")
+    FRUIT_REWARD = 1.0
+    LEVEL_REWARD = 5.0
+    DEATH_REWARD = -1.0
+
+    # The directions on the left and on the right of each direction
+    _LEFT_OF = {UP: LEFT, LEFT: DOWN, DOWN: RIGHT, RIGHT: UP}
+    _RIGHT_OF = {UP: RIGHT, RIGHT: DOWN, DOWN: LEFT, LEFT: UP}
+    _MOVES = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)}
+
+    def __init__(self, observation: str = "grid", max_steps: Optional[int] = None, seed: Optional[int] = None,
+                 board_size: Tuple[int, int] = BOARD_SIZE):
+        """
+        Create the environment. reset() must be called before the first step.
+
+        Args:
+            observation (str): The kind of observation (grid | features | rgb)
+            max_steps (int): The number of steps after which a game is stopped, or None to play until the snake dies
+            seed (int): The seed of the first game, or None for a random seed
+            board_size (Tuple[int, int]): The number of (columns, rows) of the board
+        """
+        if observation not in SnakeEnv.OBSERVATIONS:
+            raise ValueError("Unknown observation {!r}, expected one of {}".format(observation, SnakeEnv.OBSERVATIONS))
+
+        self.columns, self.rows = board_size
+        self.observation = observation
+        self.max_steps = max_steps
+        if observation == "grid":
+            self.observation_shape = (5, self.rows, self.columns)
+        elif observation == "features":
+            self.observation_shape = (len(SnakeEnv.FEATURES),)
+        else:
+            self.observation_shape = (self.rows, self.columns, 3)
+        self.observation_dtype = np.dtype(np.float32 if observation == "features" else np.uint8)
+        self.game = GameState(seed, board_size)
+        self._board = None
+        if observation != "features":
+            self._board = BoardGrid(self.game, image=observation == "rgb")
+        self._done = True
+
+    def reset(self, seed: Optional[int] = None) -> np.ndarray:
+        """
+        Starts a new game
+
+        Args:
+            seed (int): The seed of the new game, or None to draw it from the previous game
+
+        Returns:
+            The first observation of the game
+        """
+        self.game.reset(seed)
+        self._done = False
+        return self._observe()
+
+    def step(self, action: Optional[int]) -> Tuple[np.ndarray, float, bool, Dict[str, Any]]:
+        """
+        Plays one tick of the game
+
+        Args:
+            action (int): The direction to turn to, or None to keep going straight
+
+        Returns:
+            The tuple (observation, reward, done, info). info holds the score, the level, the number of
+            steps and the reason of the death: eat_self, eat_gate and death_cause (None, "eat_self" or
+            "eat_gate"), and truncated when the game was stopped after max_steps
+        """
+        if self._done:
+            raise RuntimeError("The game has ended, reset() must be called before stepping again")
+
+        game = self.game
+        level = game.speed_level
+        alive = game.step(DIRECTIONS[action] if action is not None else None)
+
+        reward = 0.0
+        if game.ate_fruit:
+            reward += SnakeEnv.FRUIT_REWARD
+        if game.speed_level > level:
+            reward += SnakeEnv.LEVEL_REWARD
+        if not alive:
+            reward += SnakeEnv.DEATH_REWARD
+
+        truncated = alive and self.max_steps is not None and game.steps >= self.max_steps
+        self._done = not alive or truncated
+        return self._observe(), reward, self._done, self._info(truncated)
+
+    def _info(self, truncated: bool) -> Dict[str, Any]:
+        """
+        Returns the information about the game given with every step
+        """
+        game = self.game
+        return {
+            "score": game.score,
+            "speed_level": game.speed_level,
+            "food_count": game.food_count,
+            "steps": game.steps,
+            "eat_self": game.eat_self,
+            "eat_gate": game.eat_gate,
+            "death_cause": game.get_death_cause(),
+            "truncated": truncated,
+        }
+
+    def _observe(self) -> np.ndarray:
+        """
+        Returns the observation of the current state of the game
+        """
+        if self.observation == "features":
+            return self._features()
+
+        self._board.update()
+        if self.observation == "grid":
+            return self._board.get_view()
+        return self._board.get_image()
+
+    def _features(self) -> np.ndarray:
+        """
+        Builds the features observation: the dangers around the head, the direction and where the target is.
+        The target is the fruit, or the cell under the entrance of the gate when the gate is open
+        """
+        game = self.game
+        direction = game.direction
+        head_x, head_y = game.snake.get_head().get_coordinate()
+        gate_cells = set()
+        if game.gate_open:
+            gate_cells = {block.get_coordinate() for block in game.gate}
+            gate_x, gate_y = game.gate[0].get_coordinate()
+            target = (gate_x + 1, gate_y + 1) if (head_x, head_y) == (gate_x + 1, gate_y + 2) else (gate_x + 1, gate_y + 2)
+        elif game.fruit is not None:
+            target = game.fruit.get_coordinate()
+        else:
+            target = (head_x, head_y)
+
+        def danger(towards: str) -> float:
+            dx, dy = SnakeEnv._MOVES[towards]
+            cell = ((head_x + dx) % self.columns, (head_y + dy) % self.rows)
+            return float(game.snake.occupies(cell) or cell in gate_cells)
+
+        return np.array([
+            danger(direction), danger(SnakeEnv._LEFT_OF[direction]), danger(SnakeEnv._RIGHT_OF[direction]),
+            direction == UP, direction == DOWN, direction == LEFT, direction == RIGHT,
+            target[1] < head_y, target[1] > head_y, target[0] < head_x, target[0] > head_x,
+            game.gate_open,
+        ], dtype=np.float32)
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from typing import *
+
+if TYPE_CHECKING:
+    import pygame
+
+class SurfaceCache(object):
+    """
+    A bounded cache of filled surfaces, keyed by (color, size).
+
+    Every Block of the same color and size looks exactly the same on the screen, so instead of
+    creating and filling a new pygame.Surface each time a block is drawn, the surface is created once
+    and reused. When the cache is full, the least recently used surface is evicted.
+
+    The surfaces returned by the cache are shared, callers must only blit them and never draw on them.
+
+    Constants:
+        DEFAULT_CAPACITY = 64: The default maximum number of surfaces kept in the cache
+
+    Attributes:
+        _capacity (int): The maximum number of surfaces kept in the cache
+        _surfaces (OrderedDict): The cached surfaces, ordered from the least to the most recently used
+        _hits (int): The number of lookups served from the cache
+        _misses (int): The number of lookups that had to create a new surface
+    """
+    DEFAULT_CAPACITY = 64
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Create an empty cache.
+
+        Args:
+            capacity (int): The maximum number of surfaces kept in the cache
+        """
+        if capacity < 1:
+            raise ValueError("The capacity of the cache must be at least 1")
+
+        self._capacity = capacity
+        self._surfaces = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, color: Tuple[int, int, int], size: Tuple[int, int]) -> 'pygame.Surface':
+        """
+        Returns a surface of the given size filled with the given color, creating it on a miss
+
+        Args:
+            color (Tuple[int, int, int]): The color of the surface
+            size (Tuple[int, int]): The size of the surface, given as a tuple of (width, height)
+
+        Returns:
+            The shared surface filled with the given color
+        """
+        key = (tuple(color), tuple(size))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        import pygame  # Imported here so that the headless game never loads pygame
+
+        self._misses += 1
+        surface = pygame.Surface(key[1], depth=32)
+        surface.fill(key[0])
+        self._surfaces[key] = surface
+        # Evict the least recently used surface
+        if len(self._surfaces) > self._capacity:
+            self._surfaces.popitem(last=False)
+
+        return surface
+
+    def get_hits(self) -> int:
+        """
+        Returns the number of lookups served from the cache
+
+        Args:
+            None
+
+        Returns:
+            The number of cache hits
+        """
+        return self._hits
+
+    def get_misses(self) -> int:
+        """
+        Returns the number of lookups that had to create a new surface
+
+        Args:
+            None
+
+        Returns:
+            The number of cache misses
+        """
+        return self._misses
+
+    def get_size(self) -> int:
+        """
+        Returns the number of surfaces currently kept in the cache
+
+        Args:
+            None
+
+        Returns:
+            The number of cached surfaces
+        """
+        return len(self._surfaces)
+
+    def get_capacity(self) -> int:
+        """
+        Returns the maximum number of surfaces kept in the cache
+
+        Args:
+            None
+
+        Returns:
+            The capacity of the cache
+        """
+        return self._capacity
+
+    def clear(self) -> None:
+        """
+        Removes all the cached surfaces and resets the hit/miss counters
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._surfaces.clear()
+        self._hits = 0
+        self._misses = 0
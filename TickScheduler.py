@@ -0,0 +1,194 @@
+from FrameProfiler import PhaseHistogram
+from typing import *
+import time
+
+class TickScheduler(object):
+    """
+    Paces the ticks of the game on a fixed timestep.
+
+    The ticks are due at fixed times, one period apart, counted from the start of the schedule rather than from
+    the end of the previous tick, so the time the game takes to run and draw a tick does not add up and the rate
+    does not drift. wait() sleeps until the next tick is due: most of the time with time.sleep, which can wake
+    up late, then the last SPIN_TIME by checking the clock in a loop. due_ticks() then tells how many ticks the
+    game has to run to catch up. When the game falls more than MAX_CATCH_UP ticks behind, the extra ticks are
+    dropped instead of being run in a burst.
+
+    How late every tick runs after the time it was due is recorded, to measure the jitter of the ticks.
+
+    Constants:
+        SPIN_TIME = 0.002: The time before a tick is due spent checking the clock instead of sleeping, in seconds
+        MAX_CATCH_UP = 5: The maximum number of ticks run at once to catch up
+
+    Attributes:
+        _period (float): The time between two ticks, in seconds
+        _spin_time (float): The time before a tick is due spent checking the clock, in seconds
+        _max_catch_up (int): The maximum number of ticks run at once
+        _next (float): When the next tick is due, on the clock of the scheduler
+        _ticks (int): The number of ticks run
+        _dropped (int): The number of ticks dropped because the game fell too far behind
+        _lateness (PhaseHistogram): How late the ticks ran, in nanoseconds
+        _clock (Callable[[], float]): The clock, in seconds
+        _sleep (Callable[[float], None]): The function sleeping for a number of seconds
+    """
+    SPIN_TIME = 0.002
+    MAX_CATCH_UP = 5
+
+    def __init__(self, period: float, spin_time: float = SPIN_TIME, max_catch_up: int = MAX_CATCH_UP,
+                 clock: Callable[[], float] = time.perf_counter, sleep: Callable[[float], None] = time.sleep):
+        """
+        Create a scheduler whose first tick is due after one period
+
+        Args:
+            period (float): The time between two ticks, in seconds
+            spin_time (float): The time before a tick is due spent checking the clock instead of sleeping
+            max_catch_up (int): The maximum number of ticks run at once to catch up
+            clock (Callable[[], float]): The clock, in seconds
+            sleep (Callable[[float], None]): The function sleeping for a number of seconds
+        """
+        if period <= 0:
+            raise ValueError("The period of the ticks must be positive")
+
+        self._period = period
+        self._spin_time = spin_time
+        self._max_catch_up = max_catch_up
+        self._clock = clock
+        self._sleep = sleep
+        self._ticks = 0
+        self._dropped = 0
+        self._lateness = PhaseHistogram()
+        self._next = clock() + period
+
+    def get_period(self) -> float:
+        """
+        Returns the time between two ticks
+
+        Args:
+            None
+
+        Returns:
+            The period in seconds
+        """
+        return self._period
+
+    def set_period(self, period: float) -> None:
+        """
+        Changes the time between two ticks, starting from the next tick
+
+        Args:
+            period (float): The time between two ticks, in seconds
+
+        Returns:
+            None
+        """
+        if period <= 0:
+            raise ValueError("The period of the ticks must be positive")
+
+        self._next += period - self._period
+        self._period = period
+
+    def restart(self) -> None:
+        """
+        Starts the schedule again, the next tick being due after one period from now.
+        Used when the game has been paused, so that the time spent paused is not caught up
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._next = self._clock() + self._period
+
+    def wait(self) -> None:
+        """
+        Waits until the next tick is due
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        remaining = self._next - self._clock()
+        if remaining > self._spin_time:
+            self._sleep(remaining - self._spin_time)
+        while self._clock() < self._next:
+            pass
+
+    def due_ticks(self) -> int:
+        """
+        Returns the number of ticks due now, and counts them as run
+
+        Args:
+            None
+
+        Returns:
+            The number of ticks the game has to run, at most MAX_CATCH_UP
+        """
+        now = self._clock()
+        due = 0
+        while now >= self._next and due < self._max_catch_up:
+            self._lateness.record(int((now - self._next) * 1e9))
+            self._next += self._period
+            due += 1
+
+        if now >= self._next:
+            # Too far behind, the ticks that cannot be caught up are dropped
+            dropped = int((now - self._next) / self._period) + 1
+            self._next += dropped * self._period
+            self._dropped += dropped
+
+        self._ticks += due
+        return due
+
+    def cancel(self, ticks: int) -> None:
+        """
+        Gives back ticks returned by due_ticks() that the game has not run, because it has moved on to something
+        else (e.g. an animation), and starts the schedule again so that they do not fall due again in a burst.
+        They are counted as dropped
+
+        Args:
+            ticks (int): The number of ticks not run
+
+        Returns:
+            None
+        """
+        self._ticks -= ticks
+        self._dropped += ticks
+        self.restart()
+
+    def get_ticks(self) -> int:
+        """
+        Returns the number of ticks run
+
+        Args:
+            None
+
+        Returns:
+            The number of ticks
+        """
+        return self._ticks
+
+    def get_dropped(self) -> int:
+        """
+        Returns the number of ticks dropped because the game fell too far behind
+
+        Args:
+            None
+
+        Returns:
+            The number of dropped ticks
+        """
+        return self._dropped
+
+    def get_lateness(self) -> PhaseHistogram:
+        """
+        Returns the histogram of how late the ticks ran after the time they were due
+
+        Args:
+            None
+
+        Returns:
+            The histogram of the lateness of the ticks, in nanoseconds
+        """
+        return self._lateness
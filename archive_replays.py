@@ -0,0 +1,92 @@
+"""
+Manages replay archives (see ReplayArchive.py).
+
+    python archive_replays.py add ARCHIVE REPLAY_OR_DIRECTORY...   adds replay files to an archive
+    python archive_replays.py stats ARCHIVE                        summarizes an archive from its index
+    python archive_replays.py extract ARCHIVE GAME_ID OUTPUT       writes the replay of a game to a file
+"""
+import argparse
+import os
+from typing import Iterator, List
+
+import numpy as np
+
+from Replay import Replay
+from ReplayArchive import ReplayArchive
+from snake_rules import DEATH_CAUSES
+
+def find_replays(paths: List[str]) -> Iterator[str]:
+    """
+    Yields the given replay files and the .snkr files of the given directories, in a stable order
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, directories, files in os.walk(path):
+            directories.sort()
+            for name in sorted(files):
+                if name.endswith(".snkr"):
+                    yield os.path.join(root, name)
+
+def add(archive_path: str, paths: List[str]) -> None:
+    """
+    Appends the replay files to the archive, with the number of the replay in the archive as game id
+    """
+    with ReplayArchive(archive_path, "a") as archive:
+        count = 0
+        for path in find_replays(paths):
+            archive.append(Replay.load(path))
+            count += 1
+        print("added {} replays, {} in the archive".format(count, archive.get_count()))
+
+def stats(archive_path: str) -> None:
+    """
+    Prints the number of replays, the scores, levels and death causes found in the index
+    """
+    with ReplayArchive(archive_path) as archive:
+        index = archive.get_index()
+        print("{} replays, {:,} bytes".format(len(index), os.path.getsize(archive_path)))
+        if not len(index):
+            return
+
+        print("score: mean {:.2f}, max {}".format(index["score"].mean(), index["score"].max()))
+        print("level: mean {:.2f}, max {}".format(index["speed_level"].mean(), index["speed_level"].max()))
+        print("ticks: mean {:.0f}, total {:,}".format(index["ticks"].mean(), int(index["ticks"].sum())))
+        counts = np.bincount(index["death_cause"], minlength=len(DEATH_CAUSES))
+        print("deaths: " + ", ".join("{} {}".format(cause or "not over", count)
+                                     for cause, count in zip(DEATH_CAUSES, counts)))
+
+def extract(archive_path: str, game_id: int, output: str) -> None:
+    """
+    Writes the replay of the game with the given id to a file
+    """
+    with ReplayArchive(archive_path) as archive:
+        position = archive.find(game_id)
+        if position is None:
+            raise SystemExit("No game {} in {}".format(game_id, archive_path))
+        archive.get_replay(position).save(output)
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_parser = commands.add_parser("add", help="add replay files to an archive")
+    add_parser.add_argument("archive")
+    add_parser.add_argument("paths", nargs="+", help="replay files or directories of replay files")
+    stats_parser = commands.add_parser("stats", help="summarize an archive")
+    stats_parser.add_argument("archive")
+    extract_parser = commands.add_parser("extract", help="write the replay of a game to a file")
+    extract_parser.add_argument("archive")
+    extract_parser.add_argument("game_id", type=int)
+    extract_parser.add_argument("output")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        add(args.archive, args.paths)
+    elif args.command == "stats":
+        stats(args.archive)
+    else:
+        extract(args.archive, args.game_id, args.output)
+
+if __name__ == "__main__":
+    main()
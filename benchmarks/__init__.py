@@ -0,0 +1,5 @@
+"""
+Benchmarks for the snake game. Run them from the root of the repository, e.g.
+
+    python -m benchmarks.startup
+"""
@@ -0,0 +1,162 @@
+"""
+Measures how many game steps per second the NumPy batch engine plays, and checks that it follows the
+same rules as GameState.
+
+    python -m benchmarks.batch_engine [--games N] [--steps N] [--parity]
+
+With --parity, every game of the engine is mirrored by a GameState driven by the same actions. The
+random choices of the GameState (fruit, gate and new snake positions) are taken from the engine, and
+the two are compared after every step. The command then exits with status 1 if they differed anywhere,
+which makes it the check to run after changing the rules of either.
+"""
+import argparse
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from BatchEngine import BatchEngine
+from Block import Block
+from GameState import GameState
+from Snake import Snake
+from snake_rules import DIRECTIONS, FRUIT_COLOR, GATE_COLOR
+
+class MirroredGameState(GameState):
+    """
+    A GameState whose random choices are copied from one game of a BatchEngine
+    """
+    def __init__(self, engine: BatchEngine, game: int):
+        self._engine = engine
+        self._game = game
+        self._started = False
+        super().__init__(board_size=(engine.columns, engine.rows))
+        self._started = True
+
+    def _create_snake(self, length: int) -> Snake:
+        cells = self._engine.get_snake_cells(self._game)
+        if self._started:
+            # The engine has already moved the new snake one step, rebuild it from the cell behind the head
+            head_x, head_y = cells[1]
+            cells = [((head_x - i) % self._engine.columns, head_y) for i in range(length)]
+        return Snake.from_coordinates(cells, self.free_cells)
+
+    def _create_fruit(self) -> Optional[Block]:
+        fruit = self._engine.fruit[self._game]
+        if fruit < 0:
+            return None
+        x, y = self._engine.to_cell(fruit)
+        return Block(x, y, FRUIT_COLOR, Snake.SNAKE_BLOCK_SIZE)
+
+    def _create_gate(self) -> List[Block]:
+        x, y = self._engine.to_cell(self._engine.gate[self._game])
+        return [Block(x + dx, y + dy, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+                for dx, dy in BatchEngine.GATE_SHAPE]
+
+def compare(engine: BatchEngine, game: int, state: GameState) -> List[str]:
+    """
+    Returns the differences between one game of the engine and the GameState mirroring it
+    """
+    differences = []
+    expected = {
+        "alive": state.is_running,
+        "eat_self": state.eat_self,
+        "eat_gate": state.eat_gate,
+        "direction": DIRECTIONS.index(state.direction),
+        "gate_open": state.gate_open,
+        "food_count": state.food_count,
+        "speed_level": state.speed_level,
+        "score": state.score,
+        "steps": state.steps,
+        "length": state.snake.get_length(),
+    }
+    for name, value in expected.items():
+        if getattr(engine, name)[game] != value:
+            differences.append("{}: engine {} != GameState {}".format(name, getattr(engine, name)[game], value))
+
+    body = [block.get_coordinate() for block in state.snake.get_body()]
+    if engine.get_snake_cells(game) != body:
+        differences.append("body: engine {} != GameState {}".format(engine.get_snake_cells(game), body))
+
+    return differences
+
+def check_parity(games: int, steps: int, seed: int) -> int:
+    """
+    Plays the engine and the mirrored GameStates side by side and returns the number of mismatches
+    """
+    engine = BatchEngine(games, seed=seed)
+    states = [MirroredGameState(engine, game) for game in range(games)]
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for _ in range(steps):
+        # Mostly head for the fruit or the gate so that the games reach the next levels
+        actions = np.where(rng.random(games) < 0.03, rng.integers(-1, 4, games), greedy_actions(engine))
+        engine.step(actions)
+        for game, state in enumerate(states):
+            if not state.is_running:
+                continue
+
+            state.step(DIRECTIONS[actions[game]] if actions[game] >= 0 else None)
+            differences = compare(engine, game, state)
+            if differences:
+                mismatches += 1
+                print("game {} step {}: {}".format(game, state.steps, "; ".join(differences)))
+
+    alive = int(engine.alive.sum())
+    print("parity: {} games x {} steps, {} still alive, max level {}, {} mismatches".format(
+        games, steps, alive, int(engine.speed_level.max()), mismatches))
+    return mismatches
+
+def greedy_actions(engine: BatchEngine) -> np.ndarray:
+    """
+    Turns every snake toward its fruit or the entrance of its gate while avoiding its body and the gate,
+    used to play much longer games than random actions do
+    """
+    games = np.arange(engine.size)
+    width = engine.columns + 1
+    heads = engine.body[games, engine.head_index]
+    below_entrance = engine.gate + 2 * width + 1
+    target = np.where(engine.gate_open, below_entrance, engine.fruit)
+    target = np.where(engine.gate_open & (heads == below_entrance), engine.gate + width + 1, target)
+
+    best = np.full(engine.size, np.inf)
+    actions = engine.direction.copy()
+    for action in range(4):
+        x = (heads % width + BatchEngine.DELTA_X[action]) % engine.columns
+        y = (heads // width + BatchEngine.DELTA_Y[action]) % engine.rows
+        blocked = (engine.occupancy[games, y * width + x] > 0) | (action == BatchEngine.OPPOSITE[engine.direction]) \
+                  | (engine.gate_open & engine._on_gate(games, x, y))
+        distance = np.abs(x - target % width) + np.abs(y - target // width) + blocked * 10000
+        better = distance < best
+        best[better] = distance[better]
+        actions[better] = action
+
+    return actions
+
+def benchmark(games: int, steps: int, seed: int) -> float:
+    """
+    Plays the given number of steps in every game, resetting the finished games, and returns the steps per second
+    """
+    engine = BatchEngine(games, seed=seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        engine.step(greedy_actions(engine))
+        engine.reset(~engine.alive)
+    elapsed = time.perf_counter() - start
+    return games * steps / elapsed
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=4096, help="the number of games played at once")
+    parser.add_argument("--steps", type=int, default=500, help="the number of steps played in every game")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random number generator")
+    parser.add_argument("--parity", action="store_true", help="check the engine against GameState instead")
+    args = parser.parse_args(argv)
+
+    if args.parity:
+        raise SystemExit(1 if check_parity(args.games, args.steps, args.seed) else 0)
+
+    rate = benchmark(args.games, args.steps, args.seed)
+    print("{} games x {} steps: {:,.0f} steps per second".format(args.games, args.steps, rate))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Measures what copying a game, playing a tick and testing a cell cost with a BitBoard against a GameState
+and its lists of Blocks, for snakes from the start length to most of the board, and checks that a BitBoard
+follows the same rules as GameState.
+
+    python -m benchmarks.bitboard [--repeat N] [--parity] [--games N] [--steps N]
+
+A GameState is copied with copy.deepcopy, the only way to copy it so far. Every measure is the best mean
+time over repeat runs.
+
+With --parity, every GameState is mirrored by a BitBoard driven by the same directions. The random
+choices of the BitBoard (fruit, gate and new snake positions) are taken from the GameState, and the two
+are compared after every step. From time to time the BitBoard is also cloned and the clone played a few
+random steps, after which the BitBoard must be left exactly as it was.
+"""
+import argparse
+import copy
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from BitBoard import BitBoard
+from GameState import GameState
+from Policy import GreedyPolicy
+from Snake import Snake
+from snake_rules import BOARD_SIZE, RIGHT, create_free_cells
+
+LENGTHS = [5, 100, 1000]
+
+class MirroredBitBoard(BitBoard):
+    """
+    A BitBoard whose random choices are copied from a GameState stepped just before it
+    """
+    def __init__(self, game: GameState):
+        self._game = game
+        board = BitBoard.from_game(game)
+        self.__dict__.update(board.__dict__)
+
+    def _place_fruit(self) -> int:
+        fruit = self._game.fruit
+        return self.to_cell(fruit.get_coordinate()) if fruit is not None else BitBoard.NO_CELL
+
+    def _place_gate(self) -> int:
+        # A gate opened right under the head is gone through in the same step
+        gate = self._game.gate if self._game.gate is not None else self._game.old_gate
+        return self.to_cell(gate[0].get_coordinate())
+
+    def _place_snake(self, length: int) -> List[Tuple[int, int]]:
+        # The game has already moved the new snake one step, rebuild it from the cell behind the head
+        body = [block.get_coordinate() for block in self._game.snake.get_body()]
+        return body[1:] + [self._game.tail.get_coordinate()]
+
+def make_game(length: int, seed: int = 0) -> GameState:
+    """
+    Returns a game on the classic board with a snake of the given length coiled from the bottom right
+    corner, moving right with room to move
+    """
+    columns, rows = BOARD_SIZE
+    cells = []
+    y = rows - 1
+    while len(cells) < length:
+        row = [(x, y) for x in range(1, columns - 1)]
+        cells.extend(row if (rows - 1 - y) % 2 == 0 else row[::-1])
+        y -= 1
+    game = GameState(seed)
+    game.free_cells = create_free_cells(game.board_size)
+    game.snake = Snake.from_coordinates(cells[:length][::-1], game.free_cells)
+    game.direction = RIGHT
+    game.fruit = game._create_fruit()
+    return game
+
+def best_mean(action: Callable[[], object], count: int, repeat: int) -> float:
+    """
+    Returns the best mean time of the action in nanoseconds, over repeat runs of count calls
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(count):
+            action()
+        elapsed = (time.perf_counter_ns() - start) / count
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def measure(length: int, repeat: int) -> Dict[str, float]:
+    """
+    Returns the times in nanoseconds of copying, copying and stepping, and testing a cell, for both forms
+    """
+    game = make_game(length)
+    board = BitBoard.from_game(game)
+    coordinate = game.snake.get_body()[length // 2].get_coordinate()
+    cell = board.to_cell(coordinate)
+    count = max(10, 20000 // length)
+    return {
+        "deepcopy_ns": best_mean(lambda: copy.deepcopy(game), count, repeat),
+        "clone_ns": best_mean(board.clone, count * 10, repeat),
+        "deepcopy_step_ns": best_mean(lambda: copy.deepcopy(game).step(), count, repeat),
+        "clone_step_ns": best_mean(lambda: board.clone().step(), count * 10, repeat),
+        "occupies_ns": best_mean(lambda: game.snake.occupies(coordinate), 100000, repeat),
+        "bit_ns": best_mean(lambda: board.occupies(cell), 100000, repeat),
+    }
+
+def compare(game: GameState, board: BitBoard) -> List[str]:
+    """
+    Returns the differences between a GameState and the BitBoard mirroring it
+    """
+    differences = []
+    for name in ("is_running", "eat_self", "eat_gate", "direction", "gate_open", "food_count", "speed_level",
+                 "score", "steps"):
+        if getattr(game, name) != getattr(board, name):
+            differences.append("{}: GameState {} != BitBoard {}".format(name, getattr(game, name), getattr(board, name)))
+
+    body = [block.get_coordinate() for block in game.snake.get_body()]
+    if board.get_body() != body:
+        differences.append("body: GameState {} != BitBoard {}".format(body, board.get_body()))
+    fruit = game.fruit.get_coordinate() if game.fruit is not None else None
+    board_fruit = board.get_fruit().get_coordinate() if board.get_fruit() is not None else None
+    if fruit != board_fruit:
+        differences.append("fruit: GameState {} != BitBoard {}".format(fruit, board_fruit))
+    gate = [block.get_coordinate() for block in game.gate] if game.gate is not None else None
+    board_gate = [block.get_coordinate() for block in board.get_gate()] if board.get_gate() is not None else None
+    if gate != board_gate:
+        differences.append("gate: GameState {} != BitBoard {}".format(gate, board_gate))
+    return differences
+
+def get_state(board: BitBoard) -> Tuple:
+    """
+    Returns everything a step of the board depends on, to tell whether a clone has changed it
+    """
+    return (board.occupancy, board.get_body(), sorted(board._extra.items()), board.fruit, board.gate,
+            board._gate_mask, board.gate_open, board.direction, board.food_count, board.speed_level, board.score,
+            board.steps, board.is_running, board.rng.getstate())
+
+def check_clone(board: BitBoard, rng: random.Random) -> List[str]:
+    """
+    Clones the board and plays the clone a few random steps, and returns what has changed in the board if
+    anything
+    """
+    state = get_state(board)
+    clone = board.clone()
+    for _ in range(rng.randint(1, 20)):
+        if not clone.step(rng.choice([None, "W", "S", "A", "D"])):
+            break
+    if get_state(board) != state:
+        return ["playing a clone has changed the board it was cloned from"]
+    return []
+
+def check_parity(games: int, steps: int, seed: int) -> int:
+    """
+    Plays GameStates and the mirroring BitBoards side by side and returns the number of mismatches
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+    levels = 0
+    for number in range(games):
+        game = GameState(rng.getrandbits(64))
+        board = MirroredBitBoard(game)
+        policy = GreedyPolicy()
+        policy.reset(number)
+        for _ in range(steps):
+            # Mostly head for the fruit or the gate so that the games reach the next levels
+            direction = policy.act(game) if rng.random() >= 0.03 else rng.choice([None, "W", "S", "A", "D"])
+            game.step(direction)
+            board.step(direction)
+            differences = compare(game, board)
+            if not differences and rng.random() < 0.1:
+                differences = check_clone(board, rng)
+            if differences:
+                mismatches += 1
+                print("game {} step {}: {}".format(number, game.steps, "; ".join(differences)))
+                break
+            if not game.is_running:
+                break
+        levels = max(levels, game.speed_level)
+
+    print("parity: {} games x {} steps, max level {}, {} mismatches".format(games, steps, levels, mismatches))
+    return mismatches
+
+def main(argv: List[str] = None) -> Dict[int, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="the number of runs of every measure")
+    parser.add_argument("--parity", action="store_true", help="check BitBoard against GameState instead")
+    parser.add_argument("--games", type=int, default=50, help="the number of games played with --parity")
+    parser.add_argument("--steps", type=int, default=5000, help="the most steps of every game with --parity")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the games with --parity")
+    args = parser.parse_args(argv)
+
+    if args.parity:
+        raise SystemExit(1 if check_parity(args.games, args.steps, args.seed) else 0)
+
+    results = {}
+    print("{:>7} {:>18} {:>18} {:>18}".format("length", "copy", "copy + step", "occupies"))
+    for length in LENGTHS:
+        result = measure(length, args.repeat)
+        results[length] = result
+        print("{:>7} {:>8.0f} / {:>5.0f} ns {:>8.0f} / {:>5.0f} ns {:>8.0f} / {:>5.0f} ns".format(
+            length, result["deepcopy_ns"], result["clone_ns"], result["deepcopy_step_ns"], result["clone_step_ns"],
+            result["occupies_ns"], result["bit_ns"]))
+    print("(GameState with deepcopy / BitBoard)")
+    return results
+
+if __name__ == "__main__":
+    main()
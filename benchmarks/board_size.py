@@ -0,0 +1,87 @@
+"""
+Measures a new game and a tick of the game on boards from the classic 50x35 cells to 10000x10000 cells,
+to check that neither grows with the size of the board.
+
+    python -m benchmarks.board_size [--ticks N] [--repeat N]
+
+The snake is driven by GreedyPolicy, and a fruit is put under its head every FEED_EVERY ticks, so that it
+eats and goes through gates as often on the big boards as on the small ones. Only GameState.step is timed
+for the ticks, not the policy. The memory of a new game is measured with tracemalloc.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Dict, List
+
+from GameState import GameState
+from Policy import GreedyPolicy
+from snake_rules import create_fruit
+
+BOARDS = [(50, 35), (1000, 1000), (10000, 10000)]
+FEED_EVERY = 10
+
+def new_game(columns: int, rows: int, repeat: int) -> Dict[str, float]:
+    """
+    Returns the best time of creating a game in microseconds, and the memory it takes in KB
+    """
+    best = None
+    for seed in range(repeat):
+        start = time.perf_counter_ns()
+        GameState(seed, (columns, rows))
+        elapsed = (time.perf_counter_ns() - start) / 1000
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    game = GameState(0, (columns, rows))
+    memory = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+    del game
+    return {"new_game_us": best, "memory_kb": memory}
+
+def ticks(columns: int, rows: int, count: int, repeat: int) -> Dict[str, float]:
+    """
+    Returns the best mean time of a tick in nanoseconds over repeat games, and the fruits eaten and the
+    gates passed in the last one
+    """
+    best = None
+    for seed in range(repeat):
+        game = GameState(seed, (columns, rows))
+        policy = GreedyPolicy()
+        policy.reset(seed)
+        rng = random.Random(seed)
+        elapsed = 0
+        for tick in range(count):
+            if not game.is_running:
+                game.reset(rng.getrandbits(64))
+            if tick % FEED_EVERY == 0 and not game.gate_open:
+                game.fruit = create_fruit(game.snake.get_head().get_coordinate())
+            direction = policy.act(game)
+            start = time.perf_counter_ns()
+            game.step(direction)
+            elapsed += time.perf_counter_ns() - start
+        best = elapsed / count if best is None else min(best, elapsed / count)
+    return {"tick_ns": best, "score": game.score, "speed_level": game.speed_level}
+
+def main(argv: List[str] = None) -> Dict[str, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=20000, help="the number of ticks played on every board")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of games timed on every board")
+    args = parser.parse_args(argv)
+
+    # A first untimed pass warms up the interpreter
+    ticks(*BOARDS[0], args.ticks, 1)
+
+    results = {}
+    print("{:>12} {:>12} {:>12} {:>10} {:>14}".format("board", "new game", "memory", "tick", "score / level"))
+    for columns, rows in BOARDS:
+        result = new_game(columns, rows, args.repeat)
+        result.update(ticks(columns, rows, args.ticks, args.repeat))
+        results["{}x{}".format(columns, rows)] = result
+        print("{:>12} {:>9.0f} us {:>9.1f} KB {:>7.0f} ns {:>8} / {}".format(
+            "{}x{}".format(columns, rows), result["new_game_us"], result["memory_kb"], result["tick_ns"],
+            result["score"], result["speed_level"]))
+    return results
+
+if __name__ == "__main__":
+    main()
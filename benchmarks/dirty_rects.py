@@ -0,0 +1,95 @@
+"""
+Measures the drawing of the frames in which the snake eats a fruit, for several snake lengths, with the old
+drawing of the main loop, which drew the whole snake again, and with BoardRenderer, which only draws the
+cells that have changed.
+
+    python -m benchmarks.dirty_rects [--frames N]
+
+The snake moves right on the top row of a 200x200 board and a fruit is put under its head before every tick,
+so it eats on every frame. Only the drawing is timed, not the steps of the game.
+"""
+import argparse
+import time
+from typing import Dict, List
+
+import pygame
+
+import classic_snake_2D
+from BoardRenderer import BoardRenderer
+from Snake import Snake
+from benchmarks.suite import make_game
+from snake_rules import create_fruit
+
+LENGTHS = [5, 100, 1000, 10000]
+COLUMNS, ROWS = 200, 200
+
+def feed(game) -> None:
+    """
+    Puts a fruit under the head of the snake, and keeps the gate from opening
+    """
+    game.fruit = create_fruit(game.snake.get_head().get_coordinate())
+    game.food_count = 1
+
+def old_frames(length: int, frames: int, screen: pygame.Surface) -> Dict[str, float]:
+    """
+    Draws the frames like the main loop used to: the whole snake, the head, the tail and the fruit
+    """
+    game = make_game(COLUMNS, ROWS, length)
+    elapsed = 0
+    blits = 0
+    for _ in range(frames):
+        feed(game)
+        game.step()
+        start = time.perf_counter_ns()
+        rects = game.snake.draw(screen)
+        rects.append(classic_snake_2D.draw_block(game.snake.get_head(), screen))
+        rects.append(classic_snake_2D.erase_block(game.tail, screen))
+        rects.append(classic_snake_2D.draw_block(game.fruit, screen))
+        elapsed += time.perf_counter_ns() - start
+        blits += len(rects)
+    return {"us_per_frame": elapsed / frames / 1000, "blits_per_frame": blits / frames,
+            "rects_per_frame": blits / frames}
+
+def renderer_frames(length: int, frames: int, screen: pygame.Surface) -> Dict[str, float]:
+    """
+    Draws the frames with a BoardRenderer
+    """
+    game = make_game(COLUMNS, ROWS, length)
+    renderer = BoardRenderer(game, screen)
+    renderer.flush()
+    elapsed = 0
+    blits = 0
+    rects = 0
+    for _ in range(frames):
+        feed(game)
+        game.step()
+        start = time.perf_counter_ns()
+        renderer.add_changes()
+        rects += len(renderer.flush())
+        elapsed += time.perf_counter_ns() - start
+        blits += renderer.blits
+    return {"us_per_frame": elapsed / frames / 1000, "blits_per_frame": blits / frames,
+            "rects_per_frame": rects / frames}
+
+def main(argv: List[str] = None) -> Dict[str, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=50, help="the number of frames drawn for every length")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    # The surface covers the whole board, so that no blit is clipped away
+    screen = pygame.Surface((COLUMNS * Snake.SNAKE_BLOCK_SIZE[0], ROWS * Snake.SNAKE_BLOCK_SIZE[1]))
+    results = {}
+    print("{:>7} {:>22} {:>22}".format("length", "whole snake", "changed cells"))
+    for length in LENGTHS:
+        old = old_frames(length, args.frames, screen)
+        new = renderer_frames(length, args.frames, screen)
+        results["old/L{}".format(length)] = old
+        results["renderer/L{}".format(length)] = new
+        print("{:>7} {:>9.1f} us {:>6.0f} blits {:>9.1f} us {:>6.1f} blits ({:.1f} rects)".format(
+            length, old["us_per_frame"], old["blits_per_frame"], new["us_per_frame"], new["blits_per_frame"],
+            new["rects_per_frame"]))
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Measures how many steps per second SnakeEnv plays on one core, for every kind of observation.
+
+    python -m benchmarks.env_throughput [--steps N]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from SnakeEnv import SnakeEnv
+
+def measure(observation: str, steps: int, seed: int) -> float:
+    """
+    Plays the given number of steps with random actions, starting a new game whenever one ends,
+    and returns the number of steps per second
+    """
+    env = SnakeEnv(observation)
+    rng = random.Random(seed)
+    env.reset(seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, done, _ = env.step(rng.randrange(4))
+        if done:
+            env.reset()
+    return steps / (time.perf_counter() - start)
+
+def main(argv: List[str] = None) -> Dict[str, float]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=50000, help="the number of steps played for every observation")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the games and the actions")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for observation in SnakeEnv.OBSERVATIONS:
+        results[observation] = measure(observation, args.steps, args.seed)
+        print("{:<10} {:>10,.0f} steps per second".format(observation, results[observation]))
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares drawing the board block by block (BoardRenderer) with drawing one pixel per cell and scaling it to
+the window (GridRenderer), on boards from the classic 50x35 cells to 10000x10000 cells.
+
+    python -m benchmarks.grid_render [--frames N]
+
+The window keeps the size of the classic game. For every board, a snake covering a quarter of it moves right
+on the top row, and two costs are timed: an ordinary frame, and drawing the whole board, as after a reset
+or a new level. Only the drawing is timed, not the steps of the game.
+
+On the boards bigger than the window, BoardRenderer only shows their top left corner, the other blocks being
+clipped, while GridRenderer shows the whole board, reduced to the size of the window when it is bigger.
+"""
+import argparse
+import time
+from typing import Dict, List
+
+import pygame
+
+from BoardRenderer import BoardRenderer
+from GridRenderer import GridRenderer
+from benchmarks.suite import SCREEN, make_game
+
+BOARDS = [(50, 35), (200, 200), (1000, 1000), (10000, 10000)]
+MAX_LENGTH = 100000
+
+def measure(renderer_class: type, columns: int, rows: int, length: int, frames: int,
+            screen: pygame.Surface) -> Dict[str, float]:
+    """
+    Returns the time of a whole board and of an ordinary frame in microseconds, and the cells drawn in a frame
+    """
+    game = make_game(columns, rows, length)
+    start = time.perf_counter_ns()
+    renderer = renderer_class(game, screen)
+    renderer.flush()
+    full = (time.perf_counter_ns() - start) / 1000
+
+    elapsed = 0
+    blits = 0
+    for _ in range(frames):
+        game.step()
+        start = time.perf_counter_ns()
+        renderer.add_changes()
+        renderer.flush()
+        elapsed += time.perf_counter_ns() - start
+        blits += renderer.blits
+    return {"full_us": full, "frame_us": elapsed / frames / 1000, "cells_per_frame": blits / frames}
+
+def main(argv: List[str] = None) -> Dict[str, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=30, help="the number of frames drawn on every board")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    screen = pygame.Surface(SCREEN)
+    results = {}
+    print("{:>10} {:>8} {:>28} {:>28}".format("board", "length", "blocks (full / frame)", "grid (full / frame)"))
+    for columns, rows in BOARDS:
+        length = min(columns * rows // 4, MAX_LENGTH)
+        blocks = measure(BoardRenderer, columns, rows, length, args.frames, screen)
+        grid = measure(GridRenderer, columns, rows, length, args.frames, screen)
+        results["blocks/{}x{}".format(columns, rows)] = blocks
+        results["grid/{}x{}".format(columns, rows)] = grid
+        print("{:>10} {:>8} {:>14,.0f} / {:>8,.0f} us {:>14,.0f} / {:>8,.0f} us".format(
+            "{}x{}".format(columns, rows), length, blocks["full_us"], blocks["frame_us"], grid["full_us"],
+            grid["frame_us"]))
+    return results
+
+if __name__ == "__main__":
+    main()
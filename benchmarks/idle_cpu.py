@@ -0,0 +1,55 @@
+"""
+Measures how much of the processor the game uses while it waits on a menu for a key.
+
+    python -m benchmarks.idle_cpu [--seconds N]
+
+The greeting screen is shown and a key press is posted after --seconds. The processor time used while waiting
+is compared with the time passed, for the old way of waiting (polling the events in a loop) and for the
+greeting screen of the game, which sleeps until an event comes.
+"""
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import pygame
+from pygame.locals import KEYDOWN, K_SPACE, QUIT, K_ESCAPE
+
+import classic_snake_2D
+
+def poll_for_key() -> int:
+    """
+    Waits for a key like the menus used to, by polling the events in a loop
+    """
+    while True:
+        for event in pygame.event.get():
+            if event.type == KEYDOWN:
+                return event.key
+            elif event.type == QUIT:
+                return K_ESCAPE
+
+def measure(name: str, wait: Callable[[], int], seconds: float) -> float:
+    """
+    Posts a key press after the given time, waits for it and returns the share of a core used while waiting
+    """
+    pygame.event.clear()
+    pygame.time.set_timer(pygame.event.Event(KEYDOWN, key=K_SPACE), int(seconds * 1000), loops=1)
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    wait()
+    usage = (time.process_time() - start_cpu) / (time.perf_counter() - start)
+    print("{:<14} {:>6.1%} of a core".format(name, usage))
+    return usage
+
+def main(argv: List[str] = None) -> Dict[str, float]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3, help="how long every way of waiting is measured")
+    args = parser.parse_args(argv)
+
+    screen = classic_snake_2D.init_display()
+    return {
+        "polling": measure("polling", poll_for_key, args.seconds),
+        "greeting": measure("greeting", lambda: classic_snake_2D.greeting(screen), args.seconds),
+    }
+
+if __name__ == "__main__":
+    main()
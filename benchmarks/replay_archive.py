@@ -0,0 +1,87 @@
+"""
+Measures how fast a replay archive is written, queried and scanned, and how much memory a full scan uses.
+
+    python -m benchmarks.replay_archive [--replays N] [--ticks N] [--path FILE]
+
+The replays are made of random directions with made up results: only the reading and writing of the
+archive is measured, not the game.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from Replay import Replay
+from ReplayArchive import ReplayArchive
+from snake_rules import DIRECTIONS, DEATH_CAUSES
+
+def build(path: str, replays: int, ticks: int, seed: int) -> float:
+    """
+    Writes an archive of random replays and returns the number of replays written per second
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    with ReplayArchive(path, "a") as archive:
+        for _ in range(replays):
+            directions = [rng.choice(DIRECTIONS) for _ in range(rng.randrange(1, ticks))]
+            archive.append(Replay(rng.getrandbits(64), directions, rng.randrange(100), rng.randrange(20),
+                                  rng.choice(DEATH_CAUSES)))
+    return replays / (time.perf_counter() - start)
+
+def measure(path: str) -> Dict[str, float]:
+    """
+    Times a query on the index, random reads and a full scan of the archive
+    """
+    results = {}
+    with ReplayArchive(path) as archive:
+        start = time.perf_counter()
+        selected = archive.select(min_score=50, death_cause="eat_gate")
+        results["query_ms"] = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(0)
+        positions = [rng.randrange(archive.get_count()) for _ in range(10000)]
+        start = time.perf_counter()
+        for position in positions:
+            archive.get_replay(position)
+        results["random_reads_per_second"] = len(positions) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in archive.iter_replays():
+            pass
+        results["scan_replays_per_second"] = archive.get_count() / (time.perf_counter() - start)
+
+        # Tracing the allocations slows the scan down, so the memory is measured on a second scan
+        tracemalloc.start()
+        for _ in archive.iter_replays():
+            pass
+        results["scan_peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+        results["selected"] = len(selected)
+    return results
+
+def main(argv: List[str] = None) -> Dict[str, float]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replays", type=int, default=100000, help="the number of replays in the archive")
+    parser.add_argument("--ticks", type=int, default=400, help="the maximum number of ticks of a replay")
+    parser.add_argument("--path", help="where to write the archive (default: a temporary file)")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random replays")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.path or os.path.join(directory, "replays.snka")
+        written = build(path, args.replays, args.ticks, args.seed)
+        results = measure(path)
+        results["written_per_second"] = written
+        print("{:,} replays, {:,} bytes".format(args.replays, os.path.getsize(path)))
+        print("write:        {:>12,.0f} replays per second".format(written))
+        print("query:        {:>12.2f} ms ({} matches)".format(results["query_ms"], results["selected"]))
+        print("random reads: {:>12,.0f} replays per second".format(results["random_reads_per_second"]))
+        print("full scan:    {:>12,.0f} replays per second, peak {:.0f} KB allocated".format(
+            results["scan_replays_per_second"], results["scan_peak_kb"]))
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Measures how long seeking to a random tick of a replay takes with snapshots and without, and checks that a
+game rebuilt from a snapshot plays on exactly like the game played from the seed.
+
+    python -m benchmarks.replay_seek [--games N] [--ticks N] [--snapshot-every N] [--check]
+
+The games are played by GreedyPolicy, with a few random turns, so that they go through many gates: going
+through a gate frees the cells of the old snake, and the order they are freed in decides where the next
+fruits go. Some ticks take two turns, like two keys pressed in the same frame of the game, which can
+reverse the snake.
+
+With --check, Replay.simulate(t) must give the same state (GameState.to_bytes) as the game played from the
+seed at every tick t of every game, ReplayPlayer.seek must too when jumping between the ticks in a random
+order, and every game must pass verify_replay. The command exits with status 1 if they differ anywhere.
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple
+
+from GameState import GameState
+from Policy import GreedyPolicy
+from Replay import Replay, ReplayRecorder
+from ReplayPlayer import ReplayPlayer
+from ReplayVerifier import verify_replay
+from snake_rules import DIRECTIONS
+
+def record(seed: int, ticks: int, snapshot_every: int) -> Tuple[Replay, List[bytes], int]:
+    """
+    Plays and records a game, and returns its replay, the state of the game at every tick and the tick of
+    the first gate passed, or None if the game passed none
+    """
+    rng = random.Random(seed)
+    game = GameState(rng.getrandbits(64))
+    recorder = ReplayRecorder(game, snapshot_every)
+    policy = GreedyPolicy()
+    policy.reset(seed)
+    states = [game.to_bytes()]
+    first_gate = None
+    while game.is_running and game.steps < ticks:
+        chance = rng.random()
+        if chance < 0.03:
+            # Two keys in the same frame, both turning the snake like the main loop of the game does
+            game.turn(rng.choice(DIRECTIONS))
+            game.turn(rng.choice(DIRECTIONS))
+            game.step()
+        else:
+            game.step(policy.act(game) if chance >= 0.06 else rng.choice(DIRECTIONS))
+        recorder.record()
+        states.append(game.to_bytes())
+        if first_gate is None and game.old_snake is not None:
+            first_gate = game.steps
+    return recorder.get_replay(), states, first_gate
+
+def check(games: int, ticks: int, snapshot_every: int) -> int:
+    """
+    Compares the states rebuilt by simulate() and seek() with the states of the games played from the seed,
+    and returns the number of mismatches
+    """
+    mismatches = 0
+    checked = 0
+    for seed in range(games):
+        replay, states, first_gate = record(seed, ticks, snapshot_every)
+        for tick, state in enumerate(states):
+            if replay.simulate(tick).to_bytes() != state:
+                mismatches += 1
+                print("game {}: simulate({}) differs from the game played from the seed".format(seed, tick))
+                break
+        if first_gate is not None:
+            checked += len(states) - first_gate
+
+        for mismatch in verify_replay(replay):
+            mismatches += 1
+            print("game {}: {}".format(seed, mismatch))
+
+        player = ReplayPlayer(replay)
+        order = list(range(len(states)))
+        random.Random(seed).shuffle(order)
+        for tick in order:
+            if player.seek(tick).to_bytes() != states[tick]:
+                mismatches += 1
+                print("game {}: seek({}) differs from the game played from the seed".format(seed, tick))
+                break
+
+    print("check: {} games, {} ticks after a gate checked, {} mismatches".format(games, checked, mismatches))
+    return mismatches
+
+def measure(games: int, ticks: int, snapshot_every: int) -> Dict[str, float]:
+    """
+    Returns the mean time of a seek to a random tick in microseconds, from the seed and with snapshots
+    """
+    results = {"seed_us": 0.0, "snapshots_us": 0.0}
+    seeks = 0
+    for seed in range(games):
+        replay, states, _ = record(seed, ticks, snapshot_every)
+        rng = random.Random(seed)
+        for _ in range(20):
+            tick = rng.randrange(len(states))
+            start = time.perf_counter()
+            game = GameState(replay.get_seed(), replay.get_board_size())
+            replay.play(game, tick)
+            results["seed_us"] += (time.perf_counter() - start) * 1e6
+            start = time.perf_counter()
+            replay.simulate(tick)
+            results["snapshots_us"] += (time.perf_counter() - start) * 1e6
+            seeks += 1
+    return {name: total / seeks for name, total in results.items()}
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=20, help="the number of games played")
+    parser.add_argument("--ticks", type=int, default=3000, help="the most ticks of every game")
+    parser.add_argument("--snapshot-every", type=int, default=100, help="the number of ticks between two snapshots")
+    parser.add_argument("--check", action="store_true", help="check the rebuilt states instead")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        raise SystemExit(1 if check(args.games, args.ticks, args.snapshot_every) else 0)
+
+    result = measure(args.games, args.ticks, args.snapshot_every)
+    print("seek to a random tick: {:,.0f} us from the seed, {:,.0f} us with a snapshot every {} ticks".format(
+        result["seed_us"], result["snapshots_us"], args.snapshot_every))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Measures how the self-play runner scales with the number of worker processes.
+
+    python -m benchmarks.self_play_scaling [--games N] [--workers N ...]
+
+Every run plays the same games with the greedy policy, so the runs must also agree on the results.
+"""
+import argparse
+import os
+import time
+from typing import Dict, List
+
+from Policy import GreedyPolicy
+from SelfPlayRunner import SelfPlayRunner
+
+def measure(workers: int, games: int, max_steps: int, seed: int) -> float:
+    """
+    Evaluates the greedy policy on the given number of games and returns the number of games per second
+    """
+    runner = SelfPlayRunner(workers, max_steps)
+    start = time.perf_counter()
+    summary = runner.evaluate([GreedyPolicy()], games, seed)["GreedyPolicy"]
+    elapsed = time.perf_counter() - start
+    print("{:>3} workers {:>10,.1f} games per second   {}".format(workers, games / elapsed, summary.describe()))
+    return games / elapsed
+
+def main(argv: List[str] = None) -> Dict[int, float]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=400, help="the number of games played in every run")
+    parser.add_argument("--workers", type=int, nargs="+", help="the numbers of workers to try (default: 1, 2, 4, ... up to the cores)")
+    parser.add_argument("--max-steps", type=int, default=2000, help="the number of steps after which a game is stopped")
+    parser.add_argument("--seed", type=int, default=0, help="the seed from which the seeds of the games are drawn")
+    args = parser.parse_args(argv)
+
+    workers = args.workers
+    if not workers:
+        cores = os.cpu_count() or 1
+        workers = [1 << i for i in range(cores.bit_length()) if 1 << i <= cores]
+        if workers[-1] != cores:
+            workers.append(cores)
+
+    results = {count: measure(count, args.games, args.max_steps, args.seed) for count in workers}
+    for count, rate in results.items():
+        print("{:>3} workers: {:.2f}x".format(count, rate / results[workers[0]]))
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Measures what saving a game and playing on from the saved state cost with GameState.snapshot() and
+restore() against copy.deepcopy, for snakes from the start length to most of the board, and checks that a
+restored game plays on exactly like a deep copy.
+
+    python -m benchmarks.snapshot [--repeat N] [--check] [--games N]
+
+A search bot saves the game once and plays every move it tries from the saved state, so "play on" is a
+restore and a step against a deep copy and a step. Two steps are timed: a move, which only copies the
+snake, and a step eating a fruit, which also copies the free cells and the random number generator to
+place the next one.
+
+With --check, the games are saved at random ticks and several random lines of play are tried from every
+snapshot: each one must end in the same state (GameState.to_bytes) as the same line played on a deep copy,
+and restoring the snapshot must give back the state it was taken in.
+"""
+import argparse
+import copy
+import random
+from typing import Dict, List
+
+from GameState import GameState
+from Policy import GreedyPolicy
+from benchmarks.suite import best_time, make_game
+from snake_rules import BOARD_SIZE, create_fruit
+
+LENGTHS = [5, 100, 1000]
+TRIES = 3
+
+def measure(length: int, repeat: int) -> Dict[str, float]:
+    """
+    Returns the times in nanoseconds of saving the game and of playing one step on from the saved state,
+    with deepcopy and with a snapshot
+    """
+    game = make_game(*BOARD_SIZE, length)
+    # Put the fruit in the top left corner, away from the snake, so that the step only moves it
+    game.fruit = create_fruit((1, 1))
+    calls = max(10, 20000 // length)
+    move = game.snapshot()
+    # Then under the head so that the step eats it and draws a new one
+    game.fruit = create_fruit(game.snake.get_head().get_coordinate())
+    eat = game.snapshot()
+
+    def restore_step(snapshot) -> None:
+        game.restore(snapshot)
+        game.step()
+
+    return {
+        "deepcopy_ns": best_time(lambda: copy.deepcopy(game), calls, repeat),
+        "snapshot_ns": best_time(game.snapshot, calls * 10, repeat),
+        "deepcopy_step_ns": best_time(lambda: copy.deepcopy(game).step(), calls, repeat),
+        "restore_move_ns": best_time(lambda: restore_step(move), calls * 10, repeat),
+        "restore_step_ns": best_time(lambda: restore_step(eat), calls * 10, repeat),
+    }
+
+def check(games: int, seed: int) -> int:
+    """
+    Tries random lines of play from snapshots and from deep copies of the same games, and returns the number
+    of lines that ended differently
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+    lines = 0
+    for number in range(games):
+        game = GameState(rng.getrandbits(64))
+        policy = GreedyPolicy()
+        policy.reset(number)
+        while game.is_running and game.steps < 3000:
+            if rng.random() < 0.05:
+                saved = game.to_bytes()
+                reference = copy.deepcopy(game)
+                snapshot = game.snapshot()
+                for _ in range(TRIES):
+                    directions = [policy.act(game) if rng.random() < 0.7 else rng.choice("WASD")
+                                  for _ in range(rng.randint(1, 200))]
+                    copied = copy.deepcopy(reference)
+                    for direction in directions:
+                        game.step(direction)
+                        copied.step(direction)
+                    lines += 1
+                    if game.to_bytes() != copied.to_bytes():
+                        mismatches += 1
+                        print("game {} tick {}: the snapshot and the deep copy differ after {} steps".format(
+                            number, reference.steps, len(directions)))
+                    game.restore(snapshot)
+                    if game.to_bytes() != saved:
+                        mismatches += 1
+                        print("game {} tick {}: the restored game differs from the saved one".format(
+                            number, reference.steps))
+            game.step(policy.act(game) if rng.random() >= 0.03 else rng.choice("WASD"))
+
+    print("check: {} games, {} lines of play, {} mismatches".format(games, lines, mismatches))
+    return mismatches
+
+def main(argv: List[str] = None) -> Dict[int, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="the number of runs of every measure")
+    parser.add_argument("--check", action="store_true", help="check snapshots against deep copies instead")
+    parser.add_argument("--games", type=int, default=10, help="the number of games played with --check")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the games with --check")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        raise SystemExit(1 if check(args.games, args.seed) else 0)
+
+    results = {}
+    print("{:>7} {:>22} {:>22} {:>11}".format("length", "save", "play on", "move"))
+    for length in LENGTHS:
+        result = measure(length, args.repeat)
+        results[length] = result
+        print("{:>7} {:>10.0f} / {:>6.0f} ns {:>10.0f} / {:>6.0f} ns {:>8.0f} ns".format(
+            length, result["deepcopy_ns"], result["snapshot_ns"], result["deepcopy_step_ns"],
+            result["restore_step_ns"], result["restore_move_ns"]))
+    print("(deepcopy / snapshot, play on eats a fruit, move is a restore and a step that does not)")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures how long it takes to get a game ready, with and without the display.
+
+Every case runs in a fresh interpreter so that nothing is already imported, and the time is measured
+inside the child process from before the first import to when the game is ready to be stepped.
+
+    python -m benchmarks.startup [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Each case prints the number of milliseconds it took
+CASES = {
+    "headless rules": """
+import snake_rules
+from Snake import Snake
+free_cells = snake_rules.create_free_cells()
+snake = Snake(snake_rules.BOARD_SIZE[0], snake_rules.BOARD_SIZE[1], Snake.MIN_LENGTH, free_cells)
+fruit = snake_rules.generate_fruit(free_cells)
+""",
+    "import classic_snake_2D": """
+import classic_snake_2D
+""",
+    "classic_snake_2D with display": """
+import classic_snake_2D
+from GameState import GameState
+classic_snake_2D.init_display()
+GameState()
+""",
+}
+
+CHILD = """
+import time
+start = time.perf_counter()
+{code}
+print((time.perf_counter() - start) * 1000)
+"""
+
+def run_case(code: str) -> float:
+    """
+    Runs the code of a case in a fresh interpreter and returns how long it took in milliseconds
+    """
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    output = subprocess.run([sys.executable, "-c", CHILD.format(code=code)], env=env, check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return float(output.split()[-1])
+
+def main(argv: List[str] = None) -> Dict[str, float]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="the number of runs of every case")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, code in CASES.items():
+        timings = [run_case(code) for _ in range(args.repeat)]
+        results[name] = statistics.median(timings)
+        print("{:<32} {:>9.1f} ms (median of {})".format(name, results[name], args.repeat))
+
+    return results
+
+if __name__ == "__main__":
+    main()
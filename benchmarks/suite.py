@@ -0,0 +1,219 @@
+"""
+Times the hot paths of the simulation and the drawing for several snake lengths and board sizes, writes the
+results to a JSON file and compares them with a baseline.
+
+    python -m benchmarks.suite [--output FILE] [--compare BASELINE] [--threshold 0.1] [--quick]
+
+Every case is run for every board size (in cells) and snake length that fits on the board. The snake is
+laid out row after row, its head on the top row moving right into empty cells, or turned around for the
+moves in the other directions. A result is the best time of one call over --repeat runs, in nanoseconds,
+under a name like "move_right/200x200/L1000". The results are written to benchmarks/benchmark_results.json
+unless --output says otherwise.
+
+With --compare, the results are checked against a JSON file written by an earlier run: a case slower than
+the baseline by more than --threshold (a fraction) is reported as a regression and the exit status is 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import snake_rules
+from GameState import GameState
+from Snake import Snake
+from snake_rules import UP, DOWN, LEFT, RIGHT
+
+BOARDS = [(50, 35), (200, 200), (2000, 2000)]
+LENGTHS = [5, 100, 1000, 10000, 100000]
+QUICK_BOARDS = [(50, 35), (200, 200)]
+QUICK_LENGTHS = [5, 100, 1000]
+SCREEN = snake_rules.SCREEN_SIZE  # The surface drawn on, whatever the size of the board
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results.json")
+
+def snake_coordinates(columns: int, length: int) -> List[Tuple[int, int]]:
+    """
+    Returns the cells of a snake laid out row after row from the second row down, its head on the top row
+    above the start of the second row, from the head to the tail
+    """
+    coordinates = [(0, 0)]
+    for index in range(length - 1):
+        row, column = divmod(index, columns)
+        if row % 2:
+            column = columns - 1 - column
+        coordinates.append((column, row + 1))
+    return coordinates
+
+def make_game(columns: int, rows: int, length: int, seed: int = 0, direction: str = RIGHT) -> GameState:
+    """
+    Creates a game on a board of the given size, whose snake has the given length and moves right on the top row.
+    For the other directions the snake is turned around so that its head moves along an edge of the board, into
+    empty cells
+    """
+    if direction in (RIGHT, LEFT):
+        coordinates = snake_coordinates(columns, length)
+    else:
+        coordinates = [(y, x) for x, y in snake_coordinates(rows, length)]
+    if direction == LEFT:
+        coordinates = [(columns - 1 - x, y) for x, y in coordinates]
+    elif direction == UP:
+        coordinates = [(x, rows - 1 - y) for x, y in coordinates]
+
+    game = GameState(seed, (columns, rows))
+    game.snake.leave_board()
+    game.free_cells = snake_rules.create_free_cells(game.board_size)
+    game.snake = Snake.from_coordinates(coordinates, game.free_cells)
+    game.fruit = game._create_fruit()
+    game.direction = direction
+    return game
+
+def best_time(function: Callable[[], None], calls: int, repeat: int, setup: Optional[Callable[[], None]] = None,
+              batch: Optional[int] = None) -> float:
+    """
+    Returns the time of one call in nanoseconds in the fastest of repeat runs of the function. The setup
+    is called, untimed, before every batch of calls. The fastest run is the one least disturbed by the rest
+    of the machine, which keeps two runs of the suite comparable
+    """
+    batch = batch or calls
+    best = None
+    for _ in range(repeat):
+        elapsed = 0
+        for done in range(0, calls, batch):
+            if setup is not None:
+                setup()
+            start = time.perf_counter_ns()
+            for _ in range(min(batch, calls - done)):
+                function()
+            elapsed += time.perf_counter_ns() - start
+        best = elapsed / calls if best is None else min(best, elapsed / calls)
+    return best
+
+def run_cases(columns: int, rows: int, length: int, repeat: int, draw: bool) -> Dict[str, float]:
+    """
+    Times every case for one board size and snake length
+    """
+    results = {}
+    suffix = "/{}x{}/L{}".format(columns, rows, length)
+    # The head can move right on the top row for columns - 1 ticks before coming back on its own trail,
+    # then a new snake is laid out
+    batch = min(columns - 1, 1000)
+    moves = max(batch, 1000)
+    state = {}
+
+    def new_snake(direction: str = RIGHT) -> None:
+        state["game"] = make_game(columns, rows, length, direction=direction)
+
+    # Each move runs along the edge it starts from, the vertical ones for rows - 1 ticks
+    for direction, name in ((UP, "move_up"), (DOWN, "move_down"), (LEFT, "move_left"), (RIGHT, "move_right")):
+        along = min((columns if direction in (LEFT, RIGHT) else rows) - 1, 1000)
+        results[name + suffix] = best_time(lambda: getattr(state["game"].snake, name)(), max(along, 1000), repeat,
+                                           lambda: new_snake(direction), along)
+    results["advance_snake" + suffix] = best_time(lambda: snake_rules.advance_snake(RIGHT, state["game"].snake,
+                                                                                    (columns, rows)),
+                                                  moves, repeat, new_snake, batch)
+    results["tick" + suffix] = best_time(lambda: state["game"].step(), moves, repeat, new_snake, batch)
+
+    new_snake()
+    game = state["game"]
+    snake = game.snake
+    rng = random.Random(0)
+    gate = snake_rules.create_gate(rng, (columns, rows))
+    results["check_eat_self" + suffix] = best_time(lambda: snake_rules.check_eat_self(snake), 1000, repeat)
+    results["generate_fruit" + suffix] = best_time(lambda: snake_rules.generate_fruit(game.free_cells, rng),
+                                                   1000, repeat)
+    fruit = game.fruit
+    results["is_valid" + suffix] = best_time(lambda: snake_rules.is_valid(fruit, snake), 1000, repeat)
+    results["check_gate_collision" + suffix] = best_time(lambda: snake_rules.check_gate_collision(snake, gate),
+                                                         1000, repeat)
+
+    if draw:
+        import pygame
+        screen = pygame.Surface(SCREEN)
+        block = snake.get_head()
+        results["block_draw" + suffix] = best_time(block.draw, 1000, repeat)
+        # Blocks outside of the surface are clipped, but still cost a call to blit
+        results["snake_draw" + suffix] = best_time(lambda: snake.draw(screen), max(1, 10000 // length), repeat)
+    return results
+
+def run_suite(boards: List[Tuple[int, int]], lengths: List[int], repeat: int) -> Dict[str, float]:
+    """
+    Times every case for every board size and every snake length that fits in half of the board
+    """
+    try:
+        import pygame
+        draw = True
+    except ImportError:
+        print("pygame is not installed, the drawing cases are skipped")
+        draw = False
+
+    # A first untimed pass warms up the interpreter and lets the processor reach its working frequency
+    run_cases(boards[0][0], boards[0][1], lengths[0], repeat, draw)
+
+    results = {}
+    for columns, rows in boards:
+        for length in lengths:
+            if length > columns * rows // 2:
+                continue
+            start = time.perf_counter()
+            results.update(run_cases(columns, rows, length, repeat, draw))
+            print("{}x{} L{}: {:.1f}s".format(columns, rows, length, time.perf_counter() - start))
+            sys.stdout.flush()
+    return results
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """
+    Prints how every case changed against the baseline and returns the names of the regressions
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        ratio = results[name] / baseline[name]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print("{:<44} {:>12.0f} ns {:>12.0f} ns {:>7.2f}x{}".format(name, baseline[name], results[name], ratio, flag))
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=OUTPUT, help="the JSON file the results are written to")
+    parser.add_argument("--compare", metavar="BASELINE", help="a JSON file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="the slowdown reported as a regression")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of runs of every case")
+    parser.add_argument("--quick", action="store_true", help="only the small boards and the short snakes")
+    args = parser.parse_args(argv)
+
+    boards, lengths = (QUICK_BOARDS, QUICK_LENGTHS) if args.quick else (BOARDS, LENGTHS)
+    results = run_suite(boards, lengths, args.repeat)
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "unit": "ns per call",
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+    print("{} results written to {}".format(len(results), args.output))
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        print("{} regressions".format(len(regressions)))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+"""
+Compares how steady the ticks are when they are paced by waiting a fixed delay after every tick, as the game
+used to do, and with the fixed-timestep TickScheduler.
+
+    python -m benchmarks.tick_pacing [--level N] [--ticks N] [--work MS]
+
+Every tick does a random amount of busy work, up to --work milliseconds, standing for the simulation and the
+drawing. The rate the ticks actually ran at is printed against the rate of the level, with the jitter of the
+intervals between two ticks.
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from TickScheduler import TickScheduler
+
+def busy(milliseconds: float) -> None:
+    """
+    Keeps the processor busy for the given time
+    """
+    end = time.perf_counter() + milliseconds / 1000
+    while time.perf_counter() < end:
+        pass
+
+def fixed_delay(period: float, ticks: int, work: Callable[[], None]) -> List[float]:
+    """
+    Waits the period after every tick, whatever the tick took, and returns the times of the ticks
+    """
+    times = []
+    for _ in range(ticks):
+        time.sleep(period)
+        times.append(time.perf_counter())
+        work()
+    return times
+
+def fixed_timestep(period: float, ticks: int, work: Callable[[], None]) -> List[float]:
+    """
+    Runs the ticks with a TickScheduler and returns the times of the ticks
+    """
+    scheduler = TickScheduler(period)
+    times = []
+    while len(times) < ticks:
+        scheduler.wait()
+        for _ in range(scheduler.due_ticks()):
+            times.append(time.perf_counter())
+            work()
+    return times
+
+def describe(name: str, period: float, times: List[float]) -> Dict[str, float]:
+    """
+    Prints and returns the rate of the ticks and the jitter of the intervals between them
+    """
+    intervals = [(after - before) * 1000 for before, after in zip(times, times[1:])]
+    rate = len(intervals) / (times[-1] - times[0])
+    results = {"rate": rate, "error": rate * period - 1, "jitter_ms": statistics.pstdev(intervals),
+               "worst_ms": max(abs(interval - period * 1000) for interval in intervals)}
+    print("{:<15} {:>7.2f} ticks/s ({:+.1%})   jitter {:.3f} ms   worst interval off by {:.3f} ms".format(
+        name, rate, results["error"], results["jitter_ms"], results["worst_ms"]))
+    return results
+
+def main(argv: List[str] = None) -> Dict[str, Dict[str, float]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--level", type=int, default=8, help="the level whose tick rate is used")
+    parser.add_argument("--ticks", type=int, default=200, help="the number of ticks of every run")
+    parser.add_argument("--work", type=float, default=8, help="the most busy work done in a tick, in milliseconds")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the amounts of work")
+    args = parser.parse_args(argv)
+
+    import classic_snake_2D
+    period = classic_snake_2D.get_delay(args.level) / 1000
+    print("level {}: one tick every {:.0f} ms, {:.2f} ticks/s".format(args.level, period * 1000, 1 / period))
+
+    results = {}
+    for name, pace in (("fixed delay", fixed_delay), ("fixed timestep", fixed_timestep)):
+        rng = random.Random(args.seed)
+        times = pace(period, args.ticks, lambda: busy(rng.uniform(0, args.work)))
+        results[name] = describe(name, period, times)
+    return results
+
+if __name__ == "__main__":
+    main()
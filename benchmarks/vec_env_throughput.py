@@ -0,0 +1,96 @@
+"""
+Measures how many steps per second SharedVecEnv plays, against the same batch of games stepped by
+workers that pickle their results back through pipes.
+
+    python -m benchmarks.vec_env_throughput [--envs N] [--workers N] [--steps N] [--observation KIND]
+"""
+import argparse
+import multiprocessing
+import time
+from multiprocessing.connection import Connection
+from typing import Dict, List
+
+import numpy as np
+
+from SharedVecEnv import SharedVecEnv
+from SnakeEnv import SnakeEnv
+
+def _run_pickling_worker(count: int, observation: str, seed: int, connection: Connection) -> None:
+    """
+    Steps count games with the actions received and sends back the observations, rewards and done flags
+    """
+    envs = [SnakeEnv(observation, seed=seed + index) for index in range(count)]
+    for env in envs:
+        env.reset()
+    while True:
+        actions = connection.recv()
+        if actions is None:
+            break
+        results = []
+        for env, action in zip(envs, actions):
+            obs, reward, done, _ = env.step(int(action))
+            results.append((env.reset() if done else obs, reward, done))
+        observations, rewards, dones = zip(*results)
+        connection.send((np.stack(observations), np.array(rewards, np.float32), np.array(dones)))
+
+def measure_pickling(envs: int, workers: int, steps: int, observation: str, seed: int) -> float:
+    """
+    Plays the given number of steps with pipes and pickling and returns the number of steps per second
+    """
+    bounds = np.linspace(0, envs, workers + 1).astype(int)
+    connections, processes = [], []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_run_pickling_worker, daemon=True,
+                                          args=(int(stop - start), observation, seed + int(start), child))
+        process.start()
+        connections.append(parent)
+        processes.append(process)
+
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+    for _ in range(steps):
+        actions = rng.integers(0, 4, envs)
+        for connection, start, stop in zip(connections, bounds[:-1], bounds[1:]):
+            connection.send(actions[start:stop])
+        results = [connection.recv() for connection in connections]
+        np.concatenate([result[0] for result in results])
+    elapsed = time.perf_counter() - start_time
+
+    for connection, process in zip(connections, processes):
+        connection.send(None)
+        process.join()
+    return envs * steps / elapsed
+
+def measure_shared(envs: int, workers: int, steps: int, observation: str, seed: int) -> float:
+    """
+    Plays the given number of steps with SharedVecEnv and returns the number of steps per second
+    """
+    with SharedVecEnv(envs, workers, observation, seed=seed) as venv:
+        venv.reset()
+        rng = np.random.default_rng(seed)
+        start_time = time.perf_counter()
+        for _ in range(steps):
+            venv.step(rng.integers(0, 4, envs))
+        elapsed = time.perf_counter() - start_time
+    return envs * steps / elapsed
+
+def main(argv: List[str] = None) -> Dict[str, float]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--envs", type=int, default=64, help="the number of games in the batch")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="the number of worker processes")
+    parser.add_argument("--steps", type=int, default=500, help="the number of steps played in every game")
+    parser.add_argument("--observation", default="grid", choices=SnakeEnv.OBSERVATIONS, help="the kind of observation")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the games and the actions")
+    args = parser.parse_args(argv)
+
+    results = {
+        "pickling": measure_pickling(args.envs, args.workers, args.steps, args.observation, args.seed),
+        "shared": measure_shared(args.envs, args.workers, args.steps, args.observation, args.seed),
+    }
+    for name, rate in results.items():
+        print("{:<10} {:>10,.0f} steps per second".format(name, rate))
+    return results
+
+if __name__ == "__main__":
+    main()
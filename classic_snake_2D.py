@@ -1,128 +1,76 @@
+import argparse
+import os
 import pygame
 from pygame.locals import *
-from sys import exit
 from Block import Block
 from Snake import Snake
-from typing import List, Tuple
-from random import randint
-
-pygame.init()
-
-SCREEN_SIZE = (1000, 700)
-BACKGROUND_COLOR = (0, 0, 0)
-GATE_COLOR = (144, 99, 255)
-
-# Controlling keys
-UP = 'W'
-DOWN = 'S'
-LEFT = 'A'
-RIGHT = 'D'
-
-DIRECTION = RIGHT  # Always start the game with a moving right snake
-FRUIT_COLOR = (0, 255, 0)
-LEVEL_UP = 5  # Must eat 4  (5 - 1 = 4) fruits to go to the next level
-
-# Setting up the GUI
-pygame.display.set_caption("Classic Snake 2D")
-screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
-icon = pygame.image.load("icon.png")
-pygame.display.set_icon(icon)
-large_font = pygame.font.Font("font.ttf", 35)
-small_font = pygame.font.Font("font.ttf", 18)
-screen.fill(BACKGROUND_COLOR)
-
-# The snake of the game
-snake = Snake(SCREEN_SIZE[0], SCREEN_SIZE[1], Snake.MIN_LENGTH)
-# The fruit
-fruit = None
-
-# The boolean flag to tell the reason why the snake is dead
-eat_self = False
-eat_gate = False
-
-# Open/close the gate flag
-gate_open = False
-# The gate
-gate = None
-
-# Stop the game
-is_running = True
-
-# Keep track of the number of fruits eaten
-# If the number of fruit eaten reaches a certain number
-# Reset it to 1 and speed up the game (level up)
-food_count = 1
+from GameState import GameState
+from BoardRenderer import BoardRenderer
+from GridRenderer import GridRenderer
+from GateAnimation import GateAnimation
+from FrameProfiler import FrameProfiler, NullProfiler
+from TickScheduler import TickScheduler
+from Replay import ReplayRecorder
+from ReplayArchive import ReplayArchive
+from typing import Iterable, List, Optional, Tuple
+from snake_rules import SCREEN_SIZE, BOARD_SIZE, BACKGROUND_COLOR, UP, DOWN, LEFT, RIGHT
+
+# The GUI, only set up when the game is displayed (see init_display)
+screen = None
+large_font = None
+small_font = None
 
 # Contants controlling the speed of the game
 time = 70
 time_diff = 5
-speed_level = 0
+min_delay = 5  # The delay stops decreasing from level 13 on
 
-def generate_fruit(snake: Snake) -> Block:
-    """
-    Generate a fruit and make sure it is in a valid position
+# The keys controlling the snake
+KEY_DIRECTIONS = {K_w: UP, K_s: DOWN, K_a: LEFT, K_d: RIGHT}
 
-    Args:
-        snake (Snake) : The Snake object, to check if the fruit generated is in valid position
+# The phases of a frame of the main loop, in the order they run, as measured with --profile
+FRAME_PHASES = ("input", "wait", "simulation", "gate", "draw", "overlay", "display")
+OVERLAY_KEY = K_F3  # Shows or hides the timings of the frames while profiling
+OVERLAY_REFRESH = 500  # The time between two refreshes of the overlay, in milliseconds
+IDLE_TIMEOUT = 1000  # The longest time an idle screen sleeps waiting for an event, in milliseconds
 
-    Returns:
-        A valid fruit 
+def get_delay(speed_level: int) -> int:
     """
-    fruit = create_fruit()
-    # Keep creating the fruit until we have a valid position of the fruit
-    while not is_valid(fruit, snake):
-        fruit = create_fruit()
-
-    return fruit
-
-def create_fruit() -> Block:
-    """
-    Create a fruit at random position on the screen
+    Returns the time to wait between two ticks of the game at the given level
 
     Args:
-        None
+        speed_level (int): The number of gates the snake has gone through
 
     Returns:
-        A Block object representing the fruit
+        The delay in milliseconds, never less than min_delay
     """
-    # Randomize the coordinate
-    x = randint(1, SCREEN_SIZE[0] // Snake.SNAKE_BLOCK_SIZE[0] - 1)
-    y = randint(1, SCREEN_SIZE[1] // Snake.SNAKE_BLOCK_SIZE[0] - 1)
-    fruit_x = x * Snake.SNAKE_BLOCK_SIZE[0]
-    fruit_y = y * Snake.SNAKE_BLOCK_SIZE[0]
+    return max(time - speed_level * time_diff, min_delay)
 
-    return Block(fruit_x, fruit_y, FRUIT_COLOR, Snake.SNAKE_BLOCK_SIZE)
-
-def is_valid(fruit: Block, snake: Snake) -> Block:
+def init_display() -> pygame.Surface:
     """
-    Check if the fruit is in a valid coordinate.
-    The coordinate is valid if it does not lie on the body of the snake
+    Set up the window and load the fonts and the icon of the game.
+    Importing this module does not touch the display, so this must be called before anything is drawn
 
     Args:
-        fruit (Block): The fruit
-        snake (Snake): The snake
+        None
 
     Returns:
-        True if the fruit is in valid position or False otherwise
-    """
-    for block in snake.get_body():
-        if fruit.get_x() == block.get_x() and fruit.get_y() == block.get_y():
-            return False
-
-    return True
-
-def check_fruit_collision(fruit: Block, snake: Snake) -> bool:
-    """
-    Checks if the snake has collided with the fruit
-
-    Args:
-        fruit (Block): The fruit
-        snake (Snake): The Snake
+        The screen of the game
+    """
+    global screen, large_font, small_font
+    if screen is not None:
+        return screen
+
+    pygame.init()
+    pygame.display.set_caption("Classic Snake 2D")
+    screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+    icon = pygame.image.load("icon.png")
+    pygame.display.set_icon(icon)
+    large_font = pygame.font.Font("font.ttf", 35)
+    small_font = pygame.font.Font("font.ttf", 18)
+    screen.fill(BACKGROUND_COLOR)
 
-    Returns:
-        True if the snake collides with the fruit or False otherwise
-    """
-    return fruit.get_x() == snake.get_head().get_x() and fruit.get_y() == snake.get_head().get_y()
+    return screen
 
 def erase_block(block: Block, screen: pygame.Surface) -> None:
     """
@@ -135,9 +83,8 @@ def erase_block(block: Block, screen: pygame.Surface) -> None:
     Returns:
         The pygame.Rect object where the Block is located
     """
-    block.change_color(BACKGROUND_COLOR)  # Change the color of the block to the background color
-    screen.blit(block.draw(), block.get_coordinate())
-    return pygame.Rect(block.get_coordinate(), block.get_size())
+    # Only the screen is changed, the block keeps its color
+    return screen.fill(BACKGROUND_COLOR, (block.get_screen_coordinate(), block.get_size()))
 
 def draw_block(block: Block, screen: pygame.Surface) -> None:
     """
@@ -149,98 +96,8 @@ def draw_block(block: Block, screen: pygame.Surface) -> None:
     Returns:
         The pygame.Rect object where the Block is located
     """
-    screen.blit(block.draw(), block.get_coordinate())
-    return pygame.Rect(block.get_coordinate(), block.get_size())
-
-def move_snake(direction: str, snake: Snake) -> List[pygame.Rect]:
-    """
-    Move the snake along the given direction and returns a List of pygame.Rect objects
-    for updating the screen when the snake has moved.
-
-    Args:
-        direction (str): The direction of the snake (UP | DOWN | LEFT | RIGHT)
-        snake (Snake): The Snake object
-
-    Returns:
-        The List of pyagme.Rect objects for updating the screen purpose
-    """
-    # When the snake is moving, only its head and tail are changed in terms of displaying on the screen
-    # The head and tail will move one step forward
-    # Therefore when the snake is moving, we only need to update the first and the last block on the screen
-    # A new block will be added and the old_tail will be deleted
-
-    # The new block represent the new head 
-    new_block = None 
-    # The old tail to be removed
-    erased_block = None
-    old_tail = None
-
-    # Move the snake along the direction
-    if DIRECTION == RIGHT:
-        old_tail = snake.move_right()    
-    elif DIRECTION == LEFT:
-        old_tail = snake.move_left()
-    elif DIRECTION == UP:
-        old_tail = snake.move_up()
-    else:
-        old_tail = snake.move_down()
-
-    # Teleport if collides with any edges
-    check_edge_collision(snake)
-
-    new_block = draw_block(snake.get_head(), screen)
-    erased_block = erase_block(old_tail, screen)
-    return [erased_block, new_block]  # The updated areas
-
-def check_edge_collision(snake: Snake) -> None:
-    """
-    Checks if the snake collides with any edges of the screen.
-    If it does, teleport it to the opposite edge.
-
-    Args:
-        snake (Snake): The Snake object
-
-    Returns:
-        None
-    """
-    head_x = snake.get_head().get_x()
-    head_y = snake.get_head().get_y()
-
-    # The left edge
-    if head_x < 0:
-        snake.teleport((SCREEN_SIZE[0] - Snake.SNAKE_BLOCK_SIZE[0], head_y))
-    # The right edge
-    elif head_x >= SCREEN_SIZE[0]:
-        snake.teleport((0, head_y))
-    # The upper edge
-    elif head_y < 0:
-        snake.teleport((head_x, SCREEN_SIZE[1] - Snake.SNAKE_BLOCK_SIZE[0]))
-    # The lower edge
-    elif head_y >= SCREEN_SIZE[1]:
-        snake.teleport((head_x, 0))
-
-def check_eat_self(snake: Snake) -> bool:
-    """
-    Checks if the snake eat itself.
-
-    Args:
-        snake: The Snake
-
-    Returns:
-        True if the snake has eaten itself or False otherwise
-    """
-    eaten = False
-    head_x = snake.get_head().get_x()
-    head_y = snake.get_head().get_y()
-    body = snake.get_body()
-    curr = 1
-
-    # Checks the coordinate of the head against all the other blocks of the body
-    while curr < len(body) and not eaten:
-        eaten = head_x == body[curr].get_x() and head_y == body[curr].get_y()
-        curr += 1
-
-    return eaten
+    screen.blit(block.draw(), block.get_screen_coordinate())
+    return pygame.Rect(block.get_screen_coordinate(), block.get_size())
 
 def end_game(message: str) -> None:
     """
@@ -279,51 +136,6 @@ def end_game(message: str) -> None:
     pygame.display.update()
     pygame.time.wait(200)
 
-def create_gate() -> List[Block]:
-    """
-    Creates a gate and returns the List of Blocks objects that makes the gate
-    The gate will comprise of 5 Blocks and will have the shape like this:
-    ###
-    # #
-
-    Args:
-        None
-
-    Returns:
-        The List of Blocks representing the gate
-    """
-    gate_blocks = []
-    x = randint(0, SCREEN_SIZE[0] // Snake.SNAKE_BLOCK_SIZE[0] - 3)
-    y = randint(0, SCREEN_SIZE[1] // Snake.SNAKE_BLOCK_SIZE[1] - 3)
-
-    first_block_x = x * Snake.SNAKE_BLOCK_SIZE[0]
-    first_block_y = y * Snake.SNAKE_BLOCK_SIZE[1]
-
-    first_block = Block(first_block_x, first_block_y, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE)
-    gate_blocks.append(first_block)  #  "#"
-    """
-    #
-    #
-    """
-    gate_blocks.append(Block(first_block_x, first_block_y + Snake.SNAKE_BLOCK_SIZE[0], GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
-    """
-    ##
-    #
-    """
-    gate_blocks.append(Block(first_block_x + Snake.SNAKE_BLOCK_SIZE[0], first_block_y, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
-    """
-    ###
-    #
-    """
-    gate_blocks.append(Block(first_block_x + 2 * Snake.SNAKE_BLOCK_SIZE[0], first_block_y, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
-    """
-    ###
-    # #
-    """
-    gate_blocks.append(Block(first_block_x + 2 * Snake.SNAKE_BLOCK_SIZE[0], first_block_y + Snake.SNAKE_BLOCK_SIZE[0], GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
-
-    return gate_blocks
-
 def draw_gate(gate: List[Block], screen: pygame.Surface) -> List[pygame.Rect]:
     """
     Draw the gate and returns the areas that need to be updated 
@@ -342,97 +154,40 @@ def draw_gate(gate: List[Block], screen: pygame.Surface) -> List[pygame.Rect]:
 
     return update_areas
 
-def passed_gate(snake: Snake, gate: List[Block]) -> bool:
+def wait_events(timeout: int = IDLE_TIMEOUT) -> List[pygame.event.Event]:
     """
-    Checks if the snake has passed the gate
+    Sleeps until an event comes or the timeout passes, without using the processor in the meantime
 
     Args:
-        snake (Snake): The snake
-        gate (List[Block]): The List of Blocks object representing the gate
+        timeout (int): The longest time to wait, in milliseconds
 
     Returns:
-        True if the snake has reached the entrance of the gate and False otherwise        
+        The events waiting, empty if the timeout has passed
     """
+    event = pygame.event.wait(timeout)
+    if event.type == NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
-    
-    # Since there is only one way to go throught the gate which is throught the front.
-    # We only need to check if the snake has reached the front of the gate (marked * in the figure below)
-    # ###
-    # #*#
-    # If the snake has reached to that position, it can definitely pass the gate
-    snake_head = snake.get_head()
-    first_block = gate[0]
-
-    if snake_head.get_x() == first_block.get_x() + Snake.SNAKE_BLOCK_SIZE[0] and snake_head.get_y() == first_block.get_y() + Snake.SNAKE_BLOCK_SIZE[0]:
-        return True
-    else:
-        return False
-
-def check_gate_collision(snake: Snake, gate: List[Block]) -> bool:
+def wait_for_key() -> int:
     """
-    Check if the snake has collided with the gate but not going in the gate
+    Sleeps until a key is pressed or the window is closed. The screen is only shown again when the
+    window has been covered or restored, as nothing else changes on it while waiting
 
     Args:
-        snake (Snake): The snake
-        gate (List[Block]): The List of Blocks object representing the gate
-
-    Returns:
-        True if the snake has collided with the gate but has not reached the entrance of the gate
-        and False otherwise
-    """
-    collided = False
-
-    # Check for every block of the gate to see if the snake has stumbled on that block
-    snake_x = snake.get_head().get_x()
-    snake_y = snake.get_head().get_y()
-    for block in gate:
-        if block.get_x() == snake_x and block.get_y() == snake_y:
-            collided = True
-
-    return collided
-
-def go_throught_gate(snake: Snake, screen: pygame.Surface) -> None:
-    """
-    Moves throught the gate to get to the next level and update the action on the screen
-
-    Args:
-        snake (Snake): The Snake
-
-    Returns:
-        The old length of the snake
-    """
-    # To create the going throught the gate effect, 
-    # we simply just delete the tail of the snake and keep everything the same
-    update_rects = []
-    length = snake.get_length()
-    while snake.get_length() > 0:
-        # Get the removed tail and delete it from the screen
-        old_tail = snake.remove_tail()  
-        update_rects = snake.draw(screen)
-        update_rects.append(erase_block(old_tail, screen))
-        pygame.display.update(update_rects)
-        pygame.time.wait(time - speed_level * time_diff)
-
-    return length
-
-def remove_gate(gate: List[Block], screen: pygame.Surface) -> None:
-    """
-    After the snake has passed the gate, remove it
-
-    Args:
-        gate (List[Block]): The gate
-        screen (pygame.Surface): The screen to remove the gate from
+        None
 
     Returns:
-        None
+        The key pressed, or K_ESCAPE if the window was closed
     """
-
-    update_rects = []
-    for block in gate:
-        update_rects.append(erase_block(block, screen))
-
-    pygame.display.update(update_rects)
-
+    while True:
+        for event in wait_events():
+            if event.type == KEYDOWN:
+                return event.key
+            elif event.type == QUIT:
+                return K_ESCAPE
+            elif event.type in (VIDEOEXPOSE, WINDOWEXPOSED):
+                pygame.display.update()
 
 def greeting(screen: pygame.Surface) -> None:
     """
@@ -462,18 +217,7 @@ def greeting(screen: pygame.Surface) -> None:
 
     pygame.display.update()
 
-    key_pressed = False
-    key = None
-    while not key_pressed:
-        for event in pygame.event.get():
-            if event.type == KEYDOWN:
-                key_pressed = True
-                key = event.key
-            elif event.type == QUIT:
-                key = K_ESCAPE
-                key_pressed = True
-
-    return key
+    return wait_for_key()
 
 def play_again(screen: pygame.Surface) -> bool:
     """
@@ -493,149 +237,207 @@ def play_again(screen: pygame.Surface) -> bool:
     screen.blit(text_surf, text_rect)
     pygame.display.update(text_rect)
 
-    key_pressed = False
-    key = None
-    while not key_pressed:
-        for event in pygame.event.get():
-            if event.type == KEYDOWN:
-                key_pressed = True
-                key = event.key
-            elif event.type == QUIT:
-                key = K_ESCAPE
-                key_pressed = True
-
-    return key != K_ESCAPE
+    return wait_for_key() != K_ESCAPE
 
-def reset_game() -> None:
+def render_overlay(lines: Iterable[str]) -> pygame.Surface:
     """
-    Resets the game to the initial state
+    Renders lines of text on an opaque surface, to be shown over the game
 
     Args:
-        None
+        lines (Iterable[str]): The lines of text
 
     Returns:
-        None
+        The surface of the text
     """
-    global snake, fruit, eat_self, eat_gate, gate_open, gate, is_running, food_count, time, time_diff, speed_level, DIRECTION
-    # The snake of the game
-    snake = Snake(SCREEN_SIZE[0], SCREEN_SIZE[1], Snake.MIN_LENGTH)
-    # The fruit
-    fruit = generate_fruit(snake)
+    surfaces = [small_font.render(line, True, (57, 170, 245), BACKGROUND_COLOR) for line in lines]
+    overlay = pygame.Surface((max(surface.get_width() for surface in surfaces),
+                              sum(surface.get_height() for surface in surfaces)))
+    overlay.fill(BACKGROUND_COLOR)
+    y = 0
+    for surface in surfaces:
+        overlay.blit(surface, (0, y))
+        y += surface.get_height()
+    return overlay
 
-    # The boolean flag to tell the reason why the snake is dead
-    eat_self = False
-    eat_gate = False
+def parse_board_size(text: str) -> Tuple[int, int]:
+    """
+    Reads the size of a board given as COLUMNSxROWS, e.g. 50x35
 
-    # Open/close the gate flag
-    gate_open = False
-    # The gate
-    gate = None
+    Args:
+        text (str): The size of the board
 
-    # Stop the game
-    is_running = True
+    Returns:
+        The tuple of (columns, rows)
+    """
+    try:
+        columns, rows = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected COLUMNSxROWS, got {!r}".format(text))
+    if not (3 <= columns <= GameState.MAX_BOARD_SIZE and 3 <= rows <= GameState.MAX_BOARD_SIZE):
+        raise argparse.ArgumentTypeError("a board must have from 3 to {} columns and rows".format(
+            GameState.MAX_BOARD_SIZE))
+    return (columns, rows)
 
-    # Keep track of the number of fruits eaten
-    # If the number of fruit eaten reaches a certain number
-    # Reset it to 1 and speed up the game (level up)
-    food_count = 1
+def save_replay(recorder: ReplayRecorder, directory: Optional[str], archive: Optional[str] = None) -> None:
+    """
+    Saves the replay of the current game in the given directory, named after the seed of the game,
+    and appends it to the given archive
 
-    # Contants controlling the speed of the game
-    time = 70
-    time_diff = 5
-    speed_level = 0
+    Args:
+        recorder (ReplayRecorder): The recorder of the game
+        directory (str): The directory where the replays are saved, or None to not save them
+        archive (str): The path of the archive the replays are appended to, or None to not archive them
 
-    DIRECTION = RIGHT
+    Returns:
+        None
+    """
+    replay = recorder.get_replay()
+    if replay.get_ticks() == 0:
+        return
 
-fruit = generate_fruit(snake)
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+        replay.save(os.path.join(directory, "{:016x}.snkr".format(replay.get_seed())))
+    if archive is not None:
+        with ReplayArchive(archive, "a") as replays:
+            replays.append(replay)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="The classic snake game")
+    parser.add_argument("--record", metavar="DIRECTORY", help="save the replay of every game in this directory")
+    parser.add_argument("--archive", metavar="FILE", help="append the replay of every game to this archive")
+    parser.add_argument("--render", choices=("cells", "grid"), default="cells",
+                        help="draw the changed cells on the screen, or one pixel per cell scaled to the screen")
+    parser.add_argument("--board", metavar="COLUMNSxROWS", type=parse_board_size, default=BOARD_SIZE,
+                        help="the size of the board in cells (default: {}x{}). With --render cells, only the "
+                             "cells that fit in the window are shown".format(*BOARD_SIZE))
+    parser.add_argument("--profile", metavar="FILE", nargs="?", const="frame_profile.json",
+                        help="measure the phases of every frame, show them over the game (F3 to hide them) "
+                             "and write them to this file at exit (default: frame_profile.json)")
+    args = parser.parse_args()
+
+    init_display()
+    game = GameState(board_size=args.board)
+    recorder = ReplayRecorder(game)
+    profiler = FrameProfiler(FRAME_PHASES) if args.profile else NullProfiler(FRAME_PHASES)
+    show_overlay = profiler.enabled
+    overlay = None
+    overlay_rect = pygame.Rect(0, 0, 0, 0)
+    overlay_time = 0
     key = greeting(screen)
 
-    if key == K_ESCAPE:
-        is_running = False
+    is_running = key != K_ESCAPE
+    scheduler = TickScheduler(get_delay(game.speed_level) / 1000)
+    profiler.add_histogram("tick_late", scheduler.get_lateness())
 
+    renderer = GridRenderer(game, screen) if args.render == "grid" else BoardRenderer(game, screen)
+    animation = None
     if is_running:
-        screen.fill(BACKGROUND_COLOR)
-        pygame.display.update()
-        pygame.display.update(snake.draw(screen))
+        pygame.display.update(renderer.flush())
 
     while is_running:
-        # Has the snake eaten itself?
-        if check_eat_self(snake):
-            is_running = False
-            eat_self = True
-
-        # Has the snake stumbled on the wall of the gate
-        if gate_open and check_gate_collision(snake, gate):
-            is_running = False
-            eat_gate = True
-
         # If the snake is not dead yet
-        if is_running:
+        if game.is_running:
             update_rects = []
+            profiler.start_frame()
             
             # Capture the key
             for event in pygame.event.get():
                 if event.type == QUIT:
                     is_running = False
-                elif event.type == KEYDOWN:
-                    if event.key == K_w and DIRECTION != DOWN:
-                        DIRECTION = UP
-                    elif event.key == K_s and DIRECTION != UP:
-                        DIRECTION = DOWN
-                    elif event.key == K_d and DIRECTION != LEFT:
-                        DIRECTION = RIGHT
-                    elif event.key == K_a and DIRECTION != RIGHT:
-                        DIRECTION = LEFT
-
-            # Check if eats fruit
-            if not gate_open and check_fruit_collision(fruit, snake):
-                snake.eat_fruit(DIRECTION, fruit)
-                fruit = generate_fruit(snake)
-                update_rects += snake.draw(screen)
-                food_count += 1
-
-            # Check for level up
-            if food_count % LEVEL_UP == 0:
-                gate_open = True
-                food_count = 1
-                gate = create_gate()
-
-            if gate_open:
-                # If the snake passed the gate, make it go throught the gate
-                # and after going through it, remove the gate and place the snake
-                # at a new random position with the same length
-                if passed_gate(snake, gate):
-                    snake_length = go_throught_gate(snake, screen)
-                    remove_gate(gate, screen)
-                    gate = None
-                    snake = Snake(SCREEN_SIZE[0], SCREEN_SIZE[1], snake_length)
-                    speed_level += 1
-                    gate_open = False
-
-            pygame.time.wait(time - speed_level * time_diff)
-            
-            update_rects += move_snake(DIRECTION, snake)
-
-            # When the gate is opening, the snake will have no fruit to eat
-            if not gate_open:
-                update_rects.append(draw_block(fruit, screen))
-            else:
-                update_rects += draw_gate(gate, screen)
+                elif event.type == KEYDOWN and event.key in KEY_DIRECTIONS:
+                    game.turn(KEY_DIRECTIONS[event.key])
+                elif event.type == KEYDOWN and event.key == OVERLAY_KEY and profiler.enabled:
+                    show_overlay = not show_overlay
+                    if not show_overlay:
+                        renderer.add_area(overlay_rect)
+            profiler.mark("input")
+
+            if not is_running:
+                save_replay(recorder, args.record, args.archive)
+                break
+
+            scheduler.wait()
+            profiler.mark("wait")
+
+            # Usually one tick is due, more if the game has fallen behind. The cells changed by all of them are
+            # drawn and shown once they are done
+            due = scheduler.due_ticks()
+            ran = 0
+            while ran < due:
+                ran += 1
+                if animation is not None:
+                    # The game waits while the old snake goes through the gate, one block per tick
+                    update_rects += animation.step()
+                    profiler.mark("gate")
+                    if animation.is_finished():
+                        # Remove the gate and show the new snake, at the speed of the next level
+                        animation = None
+                        renderer.add_changes()
+                        scheduler.set_period(get_delay(game.speed_level) / 1000)
+                        break
+                    continue
+
+                game.step()
+                recorder.record()
+                profiler.mark("simulation")
+
+                if game.old_snake is not None:
+                    # The snake has passed the gate, show it going throught the gate before the new snake appears.
+                    # The cells changed by this step are drawn once the animation is over
+                    update_rects += renderer.flush(game.old_snake)
+                    animation = GateAnimation(game.old_snake, renderer)
+                    break
+
+                renderer.add_changes()
+                if not game.is_running:
+                    break
+
+            if ran < due:
+                # The animation has started or ended, or the snake has died: the ticks left are not run later
+                scheduler.cancel(due - ran)
+
+            if animation is None:
+                update_rects += renderer.flush()
+            profiler.mark("draw")
+
+            if show_overlay:
+                # The text is rendered again only from time to time, but drawn over the game on every frame
+                if overlay is None or pygame.time.get_ticks() - overlay_time >= OVERLAY_REFRESH:
+                    # While the snake goes through the gate, the board under the overlay is drawn after it
+                    renderer.add_area(overlay_rect)
+                    if animation is None:
+                        update_rects += renderer.flush()
+                    overlay = render_overlay(profiler.format_lines())
+                    overlay_rect = overlay.get_rect()
+                    overlay_time = pygame.time.get_ticks()
+                update_rects.append(screen.blit(overlay, overlay_rect))
+            profiler.mark("overlay")
 
             pygame.display.update(update_rects)
+            profiler.mark("display")
+            profiler.end_frame()
         else:
+            save_replay(recorder, args.record, args.archive)
+
             # Ending the game with a proper message base on the reason for the dead of the snake
-            if eat_self:
+            if game.eat_self:
                 end_game("You are not delicous!")
-            elif eat_gate:
+            elif game.eat_gate:
                 end_game("Gate is not delicous!")
 
             # Ask player if they want to play again
-            start_again = play_again(screen)
-            if start_again:
+            is_running = play_again(screen)
+            if is_running:
                 # If they want to play again, reset everything to initial state
-                is_running = True
-                screen.fill(BACKGROUND_COLOR)
-                pygame.display.update()
-                reset_game()
+                game.reset()
+                recorder.start()
+                renderer.add_changes()
+                pygame.display.update(renderer.flush())
+                scheduler.set_period(get_delay(game.speed_level) / 1000)
+                scheduler.restart()
+
+    if profiler.enabled:
+        profiler.dump(args.profile)
+        print("{} ticks, {} dropped, late by {:.2f} ms at p99".format(
+            scheduler.get_ticks(), scheduler.get_dropped(), scheduler.get_lateness().get_percentile(99) / 1e6))
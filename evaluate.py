@@ -0,0 +1,67 @@
+"""
+Evaluates policies on many headless games played in parallel, printing the results as they come in.
+
+    python evaluate.py [--policy NAME ...] [--games N] [--workers N] [--max-steps N] [--seed N]
+
+A policy is either one of the built-in ones (random, greedy) or a Policy subclass given as
+module:ClassName, which is created without arguments. All the policies play the same games.
+"""
+import argparse
+import importlib
+import sys
+import time
+from typing import *
+
+from Policy import Policy, RandomPolicy, GreedyPolicy
+from SelfPlayRunner import SelfPlayRunner, ResultSummary
+
+POLICIES = {"random": RandomPolicy, "greedy": GreedyPolicy}
+
+def load_policy(name: str) -> Policy:
+    """
+    Creates the policy with the given name, either a built-in one or a module:ClassName
+    """
+    if name in POLICIES:
+        return POLICIES[name]()
+
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise SystemExit("Unknown policy {!r}, expected one of {} or module:ClassName".format(name, sorted(POLICIES)))
+    return getattr(importlib.import_module(module_name), class_name)()
+
+def print_summaries(summaries: Dict[str, ResultSummary]) -> None:
+    """
+    Prints one line for each policy
+    """
+    for name, summary in summaries.items():
+        print("{:<16} {}".format(name, summary.describe()))
+    sys.stdout.flush()
+
+def main(argv: List[str] = None) -> Dict[str, ResultSummary]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policy", action="append", help="a policy to evaluate (default: greedy), can be repeated")
+    parser.add_argument("--games", type=int, default=1000, help="the number of games played by each policy")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes (default: one per core)")
+    parser.add_argument("--max-steps", type=int, default=10000, help="the number of steps after which a game is stopped")
+    parser.add_argument("--seed", type=int, default=0, help="the seed from which the seeds of the games are drawn")
+    parser.add_argument("--every", type=int, default=1000, help="the number of games between two progress reports")
+    args = parser.parse_args(argv)
+
+    policies = [load_policy(name) for name in args.policy or ["greedy"]]
+    runner = SelfPlayRunner(args.workers, args.max_steps)
+    start = time.perf_counter()
+
+    def progress(summaries: Dict[str, ResultSummary]) -> None:
+        done = sum(summary.get_games() for summary in summaries.values())
+        print("{} games in {:.1f}s".format(done, time.perf_counter() - start))
+        print_summaries(summaries)
+
+    summaries = runner.evaluate(policies, args.games, args.seed, progress, args.every)
+    elapsed = time.perf_counter() - start
+    print("done: {} games in {:.1f}s with {} workers ({:,.0f} games per second)".format(
+        args.games * len(policies), elapsed, runner.workers, args.games * len(policies) / elapsed))
+    print_summaries(summaries)
+    return summaries
+
+if __name__ == "__main__":
+    main()
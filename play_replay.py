@@ -0,0 +1,123 @@
+"""
+Plays a replay saved by the game (see classic_snake_2D.py --record).
+
+    python play_replay.py REPLAY [--speed X] [--start TICK] [--headless]
+
+The replay is shown at the speed it was played, times --speed. While it is playing:
+    SPACE pauses, LEFT and RIGHT jump 10 seconds backwards and forwards,
+    UP and DOWN double and halve the speed, HOME and END go to the start and the end, ESC quits.
+
+With --headless nothing is shown: the replay is played as fast as possible and the final state is printed.
+"""
+import argparse
+import time
+from typing import List
+
+from Replay import Replay
+from ReplayPlayer import ReplayPlayer
+
+SEEK_SECONDS = 10
+FRAME_RATE = 60
+
+def play_headless(player: ReplayPlayer, start: int) -> None:
+    """
+    Plays the replay to the end without a display and prints where it ends
+    """
+    begin = time.perf_counter()
+    player.seek(start)
+    game = player.play_to_end()
+    elapsed = time.perf_counter() - begin
+    replay = player.replay
+    print("seed {:016x}: {} ticks played in {:.3f}s ({:,.0f} ticks per second)".format(
+        replay.get_seed(), replay.get_ticks() - start, elapsed, (replay.get_ticks() - start) / max(elapsed, 1e-9)))
+    print("claimed:   score {}, level {}, death {}".format(replay.get_score(), replay.get_speed_level(),
+                                                           replay.get_death_cause()))
+    print("simulated: score {}, level {}, death {}".format(game.score, game.speed_level, game.get_death_cause()))
+
+def play_window(player: ReplayPlayer, start: int, speed: float) -> None:
+    """
+    Shows the replay in the window of the game
+    """
+    import pygame
+    from pygame.locals import QUIT, KEYDOWN, K_ESCAPE, K_SPACE, K_LEFT, K_RIGHT, K_UP, K_DOWN, K_HOME, K_END
+    import classic_snake_2D
+    from snake_rules import BACKGROUND_COLOR
+
+    screen = classic_snake_2D.init_display()
+    player.seek(start)
+    clock = pygame.time.Clock()
+    paused = False
+    budget = 0.0
+    redraw = True
+    while True:
+        if (paused or player.is_finished()) and not redraw:
+            # Nothing moves on the screen, so sleep until something happens
+            events = classic_snake_2D.wait_events()
+            clock.tick()  # The time spent waiting is not played
+        else:
+            events = pygame.event.get()
+
+        for event in events:
+            if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
+                return
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                redraw = True
+            if event.type != KEYDOWN:
+                continue
+
+            redraw = True
+
+            if event.key == K_SPACE:
+                paused = not paused
+            elif event.key in (K_LEFT, K_RIGHT):
+                ticks = SEEK_SECONDS * 1000 // max(classic_snake_2D.get_delay(player.get_game().speed_level), 1)
+                player.seek(player.get_tick() + (ticks if event.key == K_RIGHT else -ticks))
+            elif event.key == K_UP:
+                speed *= 2
+            elif event.key == K_DOWN:
+                speed /= 2
+            elif event.key == K_HOME:
+                player.seek(0)
+            elif event.key == K_END:
+                player.play_to_end()
+
+        # Play as many ticks as the time elapsed allows at the current speed, each tick lasting like in the game
+        budget += clock.tick(FRAME_RATE) * speed
+        if paused or player.is_finished():
+            budget = 0.0
+        while budget > 0 and not player.is_finished():
+            budget -= max(classic_snake_2D.get_delay(player.get_game().speed_level), 1)
+            player.advance()
+            redraw = True
+
+        if not redraw:
+            continue
+        redraw = False
+        game = player.get_game()
+        screen.fill(BACKGROUND_COLOR)
+        game.snake.draw(screen)
+        if game.gate_open:
+            classic_snake_2D.draw_gate(game.gate, screen)
+        elif game.fruit is not None:
+            classic_snake_2D.draw_block(game.fruit, screen)
+        status = "tick {}/{}  x{:g}{}".format(player.get_tick(), player.replay.get_ticks(), speed,
+                                              "  paused" if paused else "")
+        screen.blit(classic_snake_2D.small_font.render(status, True, (255, 255, 255)), (5, 5))
+        pygame.display.update()
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("replay", help="the replay file")
+    parser.add_argument("--speed", type=float, default=1.0, help="the multiple of the real speed to play at")
+    parser.add_argument("--start", type=int, default=0, help="the tick to start at")
+    parser.add_argument("--headless", action="store_true", help="play as fast as possible without a display")
+    args = parser.parse_args(argv)
+
+    player = ReplayPlayer(Replay.load(args.replay))
+    if args.headless:
+        play_headless(player, args.start)
+    else:
+        play_window(player, args.start, args.speed)
+
+if __name__ == "__main__":
+    main()
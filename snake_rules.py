@@ -0,0 +1,281 @@
+"""
+The rules of the classic snake game.
+
+Nothing in this module touches the display, so the rules can be imported and stepped in batch jobs
+without initialising pygame or loading any asset.
+"""
+from Block import Block
+from Snake import Snake
+from FreeCellIndex import FreeCellIndex
+from typing import List, Optional, Tuple
+from random import Random
+import random
+
+SCREEN_SIZE = (1000, 700)
+BOARD_SIZE = (50, 35)  # The default number of (columns, rows) of the board, one block of the snake per cell
+BACKGROUND_COLOR = (0, 0, 0)
+GATE_COLOR = (144, 99, 255)
+
+# Controlling keys
+UP = 'W'
+DOWN = 'S'
+LEFT = 'A'
+RIGHT = 'D'
+
+# The directions in the order used to number them (e.g. for the actions of the batch engine)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# The direction the snake cannot turn to from each direction
+OPPOSITE_DIRECTIONS = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+FRUIT_COLOR = (0, 255, 0)
+LEVEL_UP = 5  # Must eat 4  (5 - 1 = 4) fruits to go to the next level
+DEATH_CAUSES = (None, "eat_self", "eat_gate")  # None while the snake is alive
+
+def create_free_cells(board_size: Tuple[int, int] = BOARD_SIZE) -> FreeCellIndex:
+    """
+    Create the index of the empty cells where a fruit can be placed.
+    The fruit is never placed on the first row or the first column of the board
+
+    Args:
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board
+
+    Returns:
+        The FreeCellIndex with all the cells of the board free
+    """
+    return FreeCellIndex((1, 1), (board_size[0] - 1, board_size[1] - 1))
+
+def generate_fruit(free_cells: FreeCellIndex, rng: Optional[Random] = None) -> Optional[Block]:
+    """
+    Generate a fruit at a random empty cell of the board
+
+    Args:
+        free_cells (FreeCellIndex): The index of the empty cells, kept in step with the snake and the gate
+        rng (Random): The random number generator used to place the fruit, or None to use the
+                      global one of the random module
+
+    Returns:
+        A valid fruit, or None if the board is full
+    """
+    coordinate = free_cells.pick(rng)
+    if coordinate is None:
+        return None
+
+    return create_fruit(coordinate)
+
+def create_fruit(coordinate: Tuple[int, int]) -> Block:
+    """
+    Create a fruit at the given cell of the board
+
+    Args:
+        coordinate (Tuple[int, int]): The (column, row) of the fruit
+
+    Returns:
+        A Block object representing the fruit
+    """
+    return Block(coordinate[0], coordinate[1], FRUIT_COLOR, Snake.SNAKE_BLOCK_SIZE)
+
+def is_valid(fruit: Block, snake: Snake) -> Block:
+    """
+    Check if the fruit is in a valid coordinate.
+    The coordinate is valid if it does not lie on the body of the snake
+
+    Args:
+        fruit (Block): The fruit
+        snake (Snake): The snake
+
+    Returns:
+        True if the fruit is in valid position or False otherwise
+    """
+    return not snake.occupies(fruit.get_coordinate())
+
+def check_fruit_collision(fruit: Optional[Block], snake: Snake) -> bool:
+    """
+    Checks if the snake has collided with the fruit
+
+    Args:
+        fruit (Block): The fruit
+        snake (Snake): The Snake
+
+    Returns:
+        True if the snake collides with the fruit or False otherwise
+    """
+    if fruit is None:
+        return False
+
+    return fruit.get_x() == snake.get_head().get_x() and fruit.get_y() == snake.get_head().get_y()
+
+def advance_snake(direction: str, snake: Snake, board_size: Tuple[int, int] = BOARD_SIZE) -> Block:
+    """
+    Move the snake one step along the given direction, teleporting it if it goes over an edge
+
+    Args:
+        direction (str): The direction of the snake (UP | DOWN | LEFT | RIGHT)
+        snake (Snake): The Snake object
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board
+
+    Returns:
+        The old tail of the snake, which is no longer part of its body
+    """
+    # Move the snake along the direction
+    if direction == RIGHT:
+        old_tail = snake.move_right()
+    elif direction == LEFT:
+        old_tail = snake.move_left()
+    elif direction == UP:
+        old_tail = snake.move_up()
+    else:
+        old_tail = snake.move_down()
+
+    # Teleport if collides with any edges
+    check_edge_collision(snake, board_size)
+
+    return old_tail
+
+def check_edge_collision(snake: Snake, board_size: Tuple[int, int] = BOARD_SIZE) -> None:
+    """
+    Checks if the snake collides with any edges of the board.
+    If it does, teleport it to the opposite edge.
+
+    Args:
+        snake (Snake): The Snake object
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board
+
+    Returns:
+        None
+    """
+    head_x = snake.get_head().get_x()
+    head_y = snake.get_head().get_y()
+
+    # The left edge
+    if head_x < 0:
+        snake.teleport((board_size[0] - 1, head_y))
+    # The right edge
+    elif head_x >= board_size[0]:
+        snake.teleport((0, head_y))
+    # The upper edge
+    elif head_y < 0:
+        snake.teleport((head_x, board_size[1] - 1))
+    # The lower edge
+    elif head_y >= board_size[1]:
+        snake.teleport((head_x, 0))
+
+def check_eat_self(snake: Snake) -> bool:
+    """
+    Checks if the snake eat itself.
+
+    Args:
+        snake: The Snake
+
+    Returns:
+        True if the snake has eaten itself or False otherwise
+    """
+    return snake.bites_itself()
+
+def create_gate(rng: Optional[Random] = None, board_size: Tuple[int, int] = BOARD_SIZE) -> List[Block]:
+    """
+    Creates a gate and returns the List of Blocks objects that makes the gate
+    The gate will comprise of 5 Blocks and will have the shape like this:
+    ###
+    # #
+
+    Args:
+        rng (Random): The random number generator used to place the gate, or None to use the
+                      global one of the random module
+        board_size (Tuple[int, int]): The number of (columns, rows) of the board
+
+    Returns:
+        The List of Blocks representing the gate
+    """
+    rng = rng if rng is not None else random
+    x = rng.randint(0, board_size[0] - 3)
+    y = rng.randint(0, board_size[1] - 3)
+
+    return create_gate_at((x, y))
+
+def create_gate_at(coordinate: Tuple[int, int]) -> List[Block]:
+    """
+    Creates the gate whose top left block is at the given cell
+
+    Args:
+        coordinate (Tuple[int, int]): The (column, row) of the top left block of the gate
+
+    Returns:
+        The List of Blocks representing the gate
+    """
+    gate_blocks = []
+    first_block_x, first_block_y = coordinate
+
+    first_block = Block(first_block_x, first_block_y, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE)
+    gate_blocks.append(first_block)  #  "#"
+    """
+    #
+    #
+    """
+    gate_blocks.append(Block(first_block_x, first_block_y + 1, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
+    """
+    ##
+    #
+    """
+    gate_blocks.append(Block(first_block_x + 1, first_block_y, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
+    """
+    ###
+    #
+    """
+    gate_blocks.append(Block(first_block_x + 2, first_block_y, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
+    """
+    ###
+    # #
+    """
+    gate_blocks.append(Block(first_block_x + 2, first_block_y + 1, GATE_COLOR, Snake.SNAKE_BLOCK_SIZE))
+
+    return gate_blocks
+
+def passed_gate(snake: Snake, gate: List[Block]) -> bool:
+    """
+    Checks if the snake has passed the gate
+
+    Args:
+        snake (Snake): The snake
+        gate (List[Block]): The List of Blocks object representing the gate
+
+    Returns:
+        True if the snake has reached the entrance of the gate and False otherwise        
+    """
+
+    
+    # Since there is only one way to go throught the gate which is throught the front.
+    # We only need to check if the snake has reached the front of the gate (marked * in the figure below)
+    # ###
+    # #*#
+    # If the snake has reached to that position, it can definitely pass the gate
+    snake_head = snake.get_head()
+    first_block = gate[0]
+
+    if snake_head.get_x() == first_block.get_x() + 1 and snake_head.get_y() == first_block.get_y() + 1:
+        return True
+    else:
+        return False
+
+def check_gate_collision(snake: Snake, gate: List[Block]) -> bool:
+    """
+    Check if the snake has collided with the gate but not going in the gate
+
+    Args:
+        snake (Snake): The snake
+        gate (List[Block]): The List of Blocks object representing the gate
+
+    Returns:
+        True if the snake has collided with the gate but has not reached the entrance of the gate
+        and False otherwise
+    """
+    collided = False
+
+    # Check for every block of the gate to see if the snake has stumbled on that block
+    snake_x = snake.get_head().get_x()
+    snake_y = snake.get_head().get_y()
+    for block in gate:
+        if block.get_x() == snake_x and block.get_y() == snake_y:
+            collided = True
+
+    return collided
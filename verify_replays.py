@@ -0,0 +1,55 @@
+"""
+Verifies replays by playing them again and checking the score, level and cause of death they claim.
+
+    python verify_replays.py PATH... [--workers N] [--chunksize N]
+
+A path is a replay file, a directory of replay files (.snkr) or a replay archive. Every invalid
+replay is printed as soon as it is found, then the number of replays checked and the throughput.
+The exit status is 1 if any replay is invalid.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+from ReplayArchive import ReplayArchive
+from ReplayVerifier import ReplayVerifier
+from archive_replays import find_replays
+
+def is_archive(path: str) -> bool:
+    """
+    Checks if the file at the given path is a replay archive rather than a replay or a directory
+    """
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as file:
+        return file.read(len(ReplayArchive.MAGIC)) == ReplayArchive.MAGIC
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="replay files, directories of replay files or archives")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes (default: one per core)")
+    parser.add_argument("--chunksize", type=int, default=64, help="the number of replays sent to a worker at once")
+    args = parser.parse_args(argv)
+
+    verifier = ReplayVerifier(args.workers, args.chunksize)
+    archives = [path for path in args.paths if is_archive(path)]
+    files = list(find_replays([path for path in args.paths if path not in archives]))
+
+    start = time.perf_counter()
+    runs = [verifier.verify_files(files)] if files else []
+    runs += [verifier.verify_archive(path) for path in archives]
+    for run in runs:
+        for failure in run:
+            print("{} (seed {}): {}".format(failure.source, failure.seed, "; ".join(failure.mismatches)))
+            sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+
+    print("{} replays, {} invalid, {:,} ticks in {:.1f}s with {} workers ({:,.0f} replays per minute)".format(
+        verifier.replays, len(verifier.failures), verifier.ticks, elapsed, verifier.workers,
+        verifier.replays / max(elapsed, 1e-9) * 60))
+    return 1 if verifier.failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())